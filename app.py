@@ -1,4 +1,5 @@
 import os
+import click
 from flask import Flask, render_template, redirect, url_for
 from blueprints.api.category_condition_api import category_condition_api
 from models import BusinessCondition
@@ -17,17 +18,38 @@ def register_error_handlers(app):
         db.session.rollback()
         return render_template('errors/500.html'), 500
 
-def create_app():
+def create_app(config_name=None):
     """Application factory for Girasoul Business Dashboard"""
     app = Flask(__name__)
     
-    # Load configuration
-    app.config.from_object('config.Config')
+    # Load configuration (FLASK_CONFIG=development|production|testing selects a profile)
+    config_name = config_name or os.environ.get('FLASK_CONFIG')
+    if config_name:
+        from config import config
+        app.config.from_object(config[config_name])
+    else:
+        app.config.from_object('config.Config')
+    
+    # Faster jsonify (orjson when installed) and gzip/brotli responses
+    from blueprints.utils.json_provider import init_json_provider
+    from blueprints.utils.compression import init_compression
+    encoder = init_json_provider(app)
+    if encoder:
+        print(f"✅ JSON provider: {encoder}")
+    encodings = init_compression(app)
+    if encodings:
+        print(f"✅ Response compression: {', '.join(encodings)}")
     
     # Import and initialize database with app
     from models import db
     db.init_app(app)
     
+    # Apply SQLite engine profile (WAL, busy_timeout, cache/mmap sizes) to every connection
+    from blueprints.utils.database import configure_sqlite_engine
+    with app.app_context():
+        if configure_sqlite_engine(db.engine, app.config.get('SQLITE_PRAGMAS')):
+            print(f"✅ SQLite engine profile applied: {app.config['SQLITE_PRAGMAS']}")
+    
     # Ensure data directory exists
     data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
     if not os.path.exists(data_dir):
@@ -42,9 +64,37 @@ def create_app():
         create_database_tables()
         # migrate_database_schema()  # Temporarily disabled
     
+    # Domain event subscribers (cache invalidation after committed writes)
+    from blueprints.utils.events import register_default_subscribers
+    if register_default_subscribers():
+        print("✅ Domain event subscribers registered")
+    
+    # Insights cache with its background recompute thread
+    from blueprints.utils.insights_cache import init_insights_cache
+    from blueprints.services.insights_service import InsightsService
+    if init_insights_cache(app, InsightsService.compute_section, InsightsService.SECTIONS):
+        print("✅ Insights cache enabled")
+    
+    # Worker threads computing the insights page's sections concurrently
+    from blueprints.utils.task_pool import init_task_pool
+    if init_task_pool(app):
+        print(f"✅ Insights task pool enabled ({app.config['INSIGHTS_PARALLEL_WORKERS']} workers)")
+    
+    # Comparable-sales index for price suggestions (built on first lookup)
+    from blueprints.utils.comparables import init_comparables_index
+    init_comparables_index(app)
+    
+    # Optional group-commit writer thread for sell/create bursts
+    from blueprints.utils.write_queue import init_write_queue
+    if init_write_queue(app):
+        print(f"✅ Write queue enabled (batches of up to {app.config['WRITE_QUEUE_MAX_BATCH']})")
+    
     # Register error handlers
     register_error_handlers(app)
     
+    # Register maintenance CLI commands (flask --app app <command>)
+    register_cli_commands(app)
+    
     print("🚀 Girasoul Business Dashboard initialized successfully!")
     return app
 
@@ -79,12 +129,16 @@ def register_blueprints(app):
         from blueprints.api.inventory import inventory_api_bp
         from blueprints.api.transactions import transactions_api_bp
         from blueprints.api.insights import insights_api_bp
+        from blueprints.api.imports import import_api_bp
+        from blueprints.api.system import system_api_bp
         
         # Register API blueprints with /api prefix only
         app.register_blueprint(assets_api_bp, url_prefix='/api/assets')
         app.register_blueprint(inventory_api_bp, url_prefix='/api/inventory')
         app.register_blueprint(transactions_api_bp, url_prefix='/api/transactions')
         app.register_blueprint(insights_api_bp)  # Already has /api/insights prefix
+        app.register_blueprint(import_api_bp)  # Already has /api/import prefix
+        app.register_blueprint(system_api_bp)  # Already has /api/system prefix
         print("✅ API blueprints registered correctly")
         
     except ImportError as e:
@@ -107,21 +161,127 @@ def register_blueprints(app):
                                  assets_summary={}, 
                                  inventory_summary={})
 
+def register_cli_commands(app):
+    """Register database maintenance commands"""
+    
+    @app.cli.command('rebuild-rollup')
+    def rebuild_rollup_command():
+        """Recompute the monthly ledger rollup from business_transactions"""
+        from models import rebuild_monthly_rollup
+        rows = rebuild_monthly_rollup()
+        print(f"✅ Monthly ledger rollup rebuilt ({rows} rows)")
+    
+    @app.cli.command('create-indexes')
+    def create_indexes_command():
+        """Create any model indexes missing from the current database"""
+        from models import ensure_indexes
+        created = ensure_indexes()
+        if created:
+            print(f"✅ Created indexes: {', '.join(created)}")
+        else:
+            print("✅ All indexes already exist")
+    
+    @app.cli.command('rebuild-search-index')
+    def rebuild_search_index_command():
+        """Re-index inventory text for full-text search"""
+        from blueprints.utils.search import rebuild_inventory_search_index
+        if rebuild_inventory_search_index():
+            print("✅ Inventory search index rebuilt")
+        else:
+            print("⚠️ Full-text search is not available for this database")
+    
+    @app.cli.command('import-csv')
+    @click.argument('kind', type=click.Choice(['transactions', 'inventory', 'sold']))
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--chunk-size', default=500, show_default=True, help='Rows validated and committed per batch')
+    def import_csv_command(kind, path, chunk_size):
+        """Import transactions, inventory or sold items from a CSV file"""
+        from blueprints.services.import_service import ImportService
+        
+        def report_progress(stats):
+            click.echo(f"📥 {stats['rows_read']} rows read, {stats['inserted']} inserted, "
+                       f"{stats['duplicates']} duplicates, {stats['invalid']} invalid")
+        
+        with open(path, newline='', encoding='utf-8-sig') as csv_file:
+            result = ImportService.import_csv(csv_file, kind, chunk_size=chunk_size, progress=report_progress)
+        
+        for error in result.get('errors', []):
+            click.echo(f"⚠️ Row {error['row']}: {error['error']}")
+        if result['success']:
+            click.echo(f"✅ Imported {result['inserted']} {kind} rows "
+                       f"({result['transactions_created']} transactions, {result['duplicates']} duplicates skipped)")
+        else:
+            raise click.ClickException(result['error'])
+
+    @app.cli.command('reconcile-ledger')
+    @click.option('--batch-size', default=5000, show_default=True, help='Links written and committed per batch')
+    @click.option('--dry-run', is_flag=True, help='Match and report without writing links')
+    @click.option('--report', 'report_path', type=click.Path(dir_okay=False, writable=True),
+                  help='Write ambiguous and unmatched transactions to this CSV file')
+    def reconcile_ledger_command(batch_size, dry_run, report_path):
+        """Link legacy inventory purchase/sale transactions to their items (safe to re-run)"""
+        import csv
+        from blueprints.services.reconciliation_service import ReconciliationService
+
+        result = ReconciliationService.reconcile(
+            batch_size=batch_size, dry_run=dry_run, progress=lambda message: click.echo(f"🔗 {message}")
+        )
+        if not result['success']:
+            raise click.ClickException(result['error'])
+
+        if report_path:
+            with open(report_path, 'w', newline='', encoding='utf-8') as report_file:
+                writer = csv.writer(report_file)
+                writer.writerow(['status', 'transaction_id', 'source_type', 'description', 'amount', 'reason', 'candidate_ids'])
+                for status in ('ambiguous', 'unmatched'):
+                    for row in result[status]:
+                        writer.writerow([status, row['transaction_id'], row['source_type'], row['description'],
+                                         row['amount'], row['reason'], ' '.join(map(str, row['candidate_ids']))])
+            click.echo(f"📝 Report written to {report_path}")
+
+        matched_by = ', '.join(f"{count} by {method}" for method, count in result['matched_by'].items()) or 'none'
+        action = 'would link' if dry_run else 'linked'
+        click.echo(f"✅ {action} {result['matched'] if dry_run else result['linked']} transactions ({matched_by}); "
+                   f"{result['ambiguous_count']} ambiguous, {result['unmatched_count']} unmatched "
+                   f"in {result['elapsed_seconds']}s")
+
 def create_database_tables():
     """Create all database tables if they don't exist"""
     try:
         # Import models to register them with SQLAlchemy
         from models import (
             db, BusinessTransaction, BusinessAsset, 
-            BusinessInventory, BusinessSold, BusinessCategory  # Added BusinessSold, removed BusinessReport
+            BusinessInventory, BusinessSold, BusinessCategory,  # Added BusinessSold, removed BusinessReport
+            ensure_monthly_rollup, ensure_columns, ensure_indexes
         )
         
         # Create all tables
         db.create_all()
         
+        # Add columns and indexes introduced after the database was first created
+        added_columns = ensure_columns()
+        if added_columns:
+            print(f"✅ Added {len(added_columns)} missing columns: {', '.join(added_columns)}")
+        created_indexes = ensure_indexes()
+        if created_indexes:
+            print(f"✅ Created {len(created_indexes)} missing indexes: {', '.join(created_indexes)}")
+        
+        # Full-text search table and sync triggers for inventory
+        from blueprints.utils.search import ensure_inventory_search_index
+        ensure_inventory_search_index()
+        
+        # Per-table data versions (ETags / 304 responses) and their bump triggers
+        from blueprints.utils.data_versions import ensure_data_versions
+        ensure_data_versions()
+        
         # Initialize default data
         initialize_default_data()
         
+        # Build the monthly ledger rollup for databases created before it existed
+        rebuilt_rows = ensure_monthly_rollup()
+        if rebuilt_rows:
+            print(f"✅ Built monthly ledger rollup ({rebuilt_rows} rows)")
+        
         print("✅ Database tables created/verified")
         
     except Exception as e:
@@ -132,7 +292,7 @@ def create_database_tables():
 def initialize_default_data():
     """Initialize default business categories and sample data"""
     try:
-        from models import BusinessCategory, BusinessCondition
+        from models import db, BusinessCategory, BusinessCondition
         
         # Check if we already have data
         if BusinessCategory.query.count() > 0:
@@ -0,0 +1,129 @@
+"""
+Multi-worker write contention benchmark for Girasoul Business Dashboard
+
+Starts several processes - like gunicorn workers - that each create and sell
+inventory items and add ledger transactions through the JSON API against the
+same SQLite file. A short busy_timeout (default 20ms) makes lock contention
+show up quickly. Reports write throughput, how many (valid) requests failed, and,
+per endpoint, the lock-wait time and busy retries recorded by the write
+path.
+
+Usage:
+    python benchmarks/contention_benchmark.py [--workers 4] [--writes 150] [--busy-timeout-ms 20] [--db path]
+"""
+
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+from contextlib import redirect_stdout
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def configure_environment(path, busy_timeout_ms):
+    # The engine profile is read from the environment when config is imported
+    os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+    os.environ['SQLITE_JOURNAL_MODE'] = 'WAL'
+    os.environ['SQLITE_SYNCHRONOUS'] = 'NORMAL'
+    os.environ['SQLITE_BUSY_TIMEOUT_MS'] = str(busy_timeout_ms)
+
+
+def worker(worker_id, path, busy_timeout_ms, writes, start_at, results):
+    configure_environment(path, busy_timeout_ms)
+    with redirect_stdout(io.StringIO()):
+        from app import create_app
+        app = create_app()
+    client = app.test_client()
+
+    statuses = Counter()
+    while time.time() < start_at:
+        time.sleep(0.001)
+
+    with redirect_stdout(io.StringIO()):
+        for i in range(writes):
+            kind = i % 3
+            if kind == 0:
+                response = client.post('/api/inventory', json={
+                    'name': f'Worker {worker_id} item {i}', 'category': 'Tops', 'cost_of_item': '8.50',
+                    'selling_price': '25.00', 'brand': 'Zara', 'size': 'M', 'condition': 'good'
+                })
+                if response.status_code == 201:
+                    sku = response.get_json()['item']['sku']
+            elif kind == 1 and statuses['create 201']:
+                response = client.post(f'/api/inventory/{sku}/sell', json={'final_price': 30})
+            else:
+                response = client.post('/api/transactions', json={
+                    'date': '2025-03-14', 'description': f'Worker {worker_id} supplies {i}', 'amount': 12.5,
+                    'category': 'Operations', 'transaction_type': 'Expense', 'account_name': 'Business Checking'
+                })
+            statuses[f"{('create', 'sell', 'ledger')[kind]} {response.status_code}"] += 1
+
+        stats = {}
+        stats_response = client.get('/api/system/write-stats')
+        if stats_response.status_code == 200:
+            stats = stats_response.get_json().get('write_contention', {})
+
+    results.put((dict(statuses), stats))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--writes', type=int, default=150, help='Writes per worker')
+    parser.add_argument('--busy-timeout-ms', type=int, default=20)
+    parser.add_argument('--db', help='SQLite file to use (default: a temporary file)')
+    args = parser.parse_args()
+
+    path = args.db or os.path.join(tempfile.mkdtemp(prefix='girasoul-contention-bench-'), 'bench.db')
+    if os.path.exists(path):
+        os.remove(path)
+
+    # Create the schema once so the workers do not race on it
+    configure_environment(path, args.busy_timeout_ms)
+    with redirect_stdout(io.StringIO()):
+        from app import create_app
+        create_app()
+
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    start_at = time.time() + 3
+    processes = [
+        context.Process(target=worker, args=(n, path, args.busy_timeout_ms, args.writes, start_at, results))
+        for n in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+    collected = [results.get() for _ in processes]
+    elapsed = time.time() - start_at
+    for process in processes:
+        process.join()
+
+    statuses = Counter()
+    endpoints = {}
+    for worker_statuses, worker_stats in collected:
+        statuses.update(worker_statuses)
+        for name, stats in worker_stats.items():
+            merged = endpoints.setdefault(name, Counter())
+            merged.update({key: stats[key] for key in ('writes', 'retries', 'retried_writes', 'gave_up')})
+            merged['lock_wait_ms_max'] = max(merged['lock_wait_ms_max'], stats['lock_wait_ms']['max'])
+
+    total = sum(statuses.values())
+    # Every request is valid, so anything but a 2xx is a write lost to contention
+    failed = sum(count for label, count in statuses.items() if not label.split()[1].startswith('2'))
+    print(f"SQLite WAL, busy_timeout={args.busy_timeout_ms}ms, {args.workers} workers x {args.writes} writes, "
+          f"database {path}")
+    print(f"writes   n={total}  throughput={total / elapsed:.1f} req/s  failed={failed}")
+    print('statuses ' + ', '.join(f'{label}={count}' for label, count in sorted(statuses.items())))
+    for name, stats in sorted(endpoints.items()):
+        print(f"  {name:<40} {json.dumps(dict(stats))}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+"""
+Composite index benchmark for Girasoul Business Dashboard
+
+Builds a throwaway SQLite database with a synthetic ledger (500k transactions
+by default) and inventory, then times the hot dashboard/insights query shapes
+with only the original single-column indexes and again with the composite
+indexes declared in models.py.
+
+Usage:
+    python benchmarks/index_benchmark.py [--transactions 500000] [--inventory 50000] [--db path]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import create_engine, select, func, and_
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import db, BusinessTransaction, BusinessInventory  # noqa: E402
+
+COMPOSITE_INDEXES = [
+    index
+    for model in (BusinessTransaction, BusinessInventory)
+    for index in model.__table__.indexes
+    if len(index.columns) > 1
+]
+
+TRANSACTION_CATEGORIES = ['Sales Revenue', 'Cost of Goods Sold', 'Operations', 'Marketing & Advertising',
+                          'Equipment & Supplies', 'Professional Services', 'Other Income', 'Other Expenses']
+INVENTORY_CATEGORIES = ['Tops', 'Bottoms', 'Dresses', 'Shoes', 'Accessories', 'Outerwear', 'Activewear']
+BRANDS = ['Zara', 'H&M', 'Levis', 'Nike', 'Adidas', 'Free People', 'Madewell', 'Everlane',
+          'Reformation', 'Aritzia', 'Lululemon', 'Gap', 'Uniqlo', 'Mango', 'COS']
+CONDITIONS = ['good', 'NWT', 'NWOT']
+STATUSES = ['inventory', 'listed', 'sold', 'sold', 'kept']
+
+
+def seed(engine, transactions, inventory):
+    """Populate the ledger and inventory tables with deterministic random data"""
+    rng = random.Random(42)
+    start = date(2019, 1, 1)
+    span = (date(2025, 12, 31) - start).days
+
+    with engine.begin() as conn:
+        batch = []
+        for i in range(transactions):
+            is_income = rng.random() < 0.45
+            batch.append({
+                'date': start + timedelta(days=rng.randint(0, span)),
+                'description': f'Synthetic transaction {i}',
+                'amount': round(rng.uniform(5, 500), 2),
+                'category': rng.choice(TRANSACTION_CATEGORIES),
+                'transaction_type': 'Income' if is_income else 'Expense',
+                'account_name': 'Business Checking',
+            })
+            if len(batch) == 10000:
+                conn.execute(BusinessTransaction.__table__.insert(), batch)
+                batch = []
+        if batch:
+            conn.execute(BusinessTransaction.__table__.insert(), batch)
+
+        batch = []
+        for i in range(inventory):
+            status = rng.choice(STATUSES)
+            cost = round(rng.uniform(3, 80), 2)
+            sold = status == 'sold'
+            batch.append({
+                'sku': f'BENCH{i:08d}',
+                'name': f'Synthetic item {i}',
+                'category': rng.choice(INVENTORY_CATEGORIES),
+                'cost_of_item': cost,
+                'selling_price': round(cost * rng.uniform(1.5, 4), 2),
+                'sold_price': round(cost * rng.uniform(1.2, 3.5), 2) if sold else None,
+                'listing_status': status,
+                'sold_date': start + timedelta(days=rng.randint(0, span)) if sold else None,
+                'condition': rng.choice(CONDITIONS),
+                'brand': rng.choice(BRANDS),
+            })
+            if len(batch) == 10000:
+                conn.execute(BusinessInventory.__table__.insert(), batch)
+                batch = []
+        if batch:
+            conn.execute(BusinessInventory.__table__.insert(), batch)
+
+
+def hot_queries():
+    """The query shapes the composite indexes are designed for"""
+    t = BusinessTransaction
+    i = BusinessInventory
+    month_start, month_end = date(2024, 6, 1), date(2024, 7, 1)
+    year_start, year_end = date(2024, 1, 1), date(2025, 1, 1)
+    thirty_days_ago = date(2025, 12, 1)
+
+    return [
+        ('monthly income SUM(amount)',
+         select(func.sum(t.amount)).where(t.transaction_type == 'Income', t.date >= month_start, t.date < month_end)),
+        ('YTD expense SUM(amount)',
+         select(func.sum(t.amount)).where(t.transaction_type == 'Expense', t.date >= year_start, t.date < year_end)),
+        ('recent transactions (date DESC, id DESC LIMIT 10)',
+         select(t.id, t.date, t.description, t.amount).order_by(t.date.desc(), t.id.desc()).limit(10)),
+        ('sold revenue last 30 days',
+         select(func.count(i.id), func.sum(i.sold_price)).where(i.listing_status == 'sold', i.sold_date >= thirty_days_ago)),
+        ('comparable sold items (category/brand/condition)',
+         select(i.sold_price).where(and_(i.listing_status == 'sold', i.category == 'Dresses',
+                                         i.brand == 'Zara', i.condition == 'NWT'))),
+    ]
+
+
+def time_query(conn, statement, repeat):
+    """Best-of-N wall time in milliseconds"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        conn.execute(statement).fetchall()
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def query_plan(conn, statement):
+    compiled = statement.compile(dialect=conn.dialect, compile_kwargs={'literal_binds': True})
+    rows = conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {compiled}').fetchall()
+    return '; '.join(row[-1] for row in rows)
+
+
+def run(conn, repeat, label):
+    results = {}
+    print(f'\n--- {label} ---')
+    for name, statement in hot_queries():
+        results[name] = time_query(conn, statement, repeat)
+        print(f'{name:52s} {results[name]:9.2f} ms   {query_plan(conn, statement)}')
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--transactions', type=int, default=500000)
+    parser.add_argument('--inventory', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--db', help='SQLite file to use (default: temporary file)')
+    args = parser.parse_args()
+
+    path = args.db or os.path.join(tempfile.mkdtemp(prefix='girasoul-bench-'), 'bench.db')
+    if os.path.exists(path):
+        os.remove(path)
+    engine = create_engine(f'sqlite:///{path}')
+
+    tables = [BusinessTransaction.__table__, BusinessInventory.__table__]
+    db.metadata.create_all(engine, tables=tables)
+    with engine.begin() as conn:
+        for index in COMPOSITE_INDEXES:
+            index.drop(conn)
+
+    print(f'Seeding {args.transactions} transactions and {args.inventory} inventory items into {path}')
+    started = time.perf_counter()
+    seed(engine, args.transactions, args.inventory)
+    print(f'Seeded in {time.perf_counter() - started:.1f}s')
+
+    with engine.begin() as conn:
+        conn.exec_driver_sql('ANALYZE')
+    with engine.connect() as conn:
+        before = run(conn, args.repeat, 'single-column indexes only')
+
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        for index in COMPOSITE_INDEXES:
+            index.create(conn)
+        conn.exec_driver_sql('ANALYZE')
+    print(f'\nCreated {len(COMPOSITE_INDEXES)} composite indexes in {time.perf_counter() - started:.1f}s')
+
+    with engine.connect() as conn:
+        after = run(conn, args.repeat, 'with composite indexes')
+
+    print('\n--- speedup ---')
+    for name in before:
+        ratio = before[name] / after[name] if after[name] else float('inf')
+        print(f'{name:52s} {before[name]:9.2f} -> {after[name]:9.2f} ms  ({ratio:.1f}x)')
+
+    engine.dispose()
+    if not args.db:
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+"""
+Concurrent sell benchmark for Girasoul Business Dashboard
+
+Creates a batch of inventory items, then has several threads sell them
+through the JSON API at the same time. Every item is sold by each thread
+(in a different order per thread), so every sell after the first must be
+rejected as already sold; with ``--distinct`` the items are split between
+the threads instead, so every sell succeeds (a drop-night burst). Reports
+sell throughput, latency and the accepted/rejected split, and checks that
+each item was sold exactly once with exactly one income transaction.
+
+Usage:
+    python benchmarks/sell_benchmark.py [--items 200] [--threads 8] [--synchronous NORMAL] [--distinct] [--write-queue] [--db path]
+
+``--write-queue`` routes the sells through the group-commit write queue and
+prints its batch size and queue latency metrics.
+"""
+
+import argparse
+import io
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--items', type=int, default=200)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--synchronous', default='NORMAL', choices=['OFF', 'NORMAL', 'FULL', 'EXTRA'])
+    parser.add_argument('--distinct', action='store_true', help='Give each thread its own items')
+    parser.add_argument('--write-queue', action='store_true', help='Enable the group-commit write queue')
+    parser.add_argument('--db', help='SQLite file to use (default: a temporary file)')
+    args = parser.parse_args()
+
+    path = args.db or os.path.join(tempfile.mkdtemp(prefix='girasoul-sell-bench-'), 'bench.db')
+    if os.path.exists(path):
+        os.remove(path)
+
+    # The engine profile is read from the environment when config is imported
+    os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+    os.environ['SQLITE_JOURNAL_MODE'] = 'WAL'
+    os.environ['SQLITE_SYNCHRONOUS'] = args.synchronous
+    os.environ['WRITE_QUEUE_ENABLED'] = 'true' if args.write_queue else 'false'
+
+    with redirect_stdout(io.StringIO()):
+        from app import create_app
+        app = create_app()
+
+    from sqlalchemy import select, func
+    from models import db, BusinessInventory, BusinessTransaction
+
+    client = app.test_client()
+    with redirect_stdout(io.StringIO()):
+        skus = []
+        for i in range(args.items):
+            payload = {'name': f'Contended item {i}', 'category': 'Tops', 'cost_of_item': '8.50',
+                       'selling_price': '25.00', 'brand': 'Zara', 'size': 'M', 'condition': 'good'}
+            skus.append(client.post('/api/inventory', json=payload).get_json()['item']['sku'])
+
+    outcomes = Counter()
+    timings = []
+    lock = threading.Lock()
+    start = threading.Barrier(args.threads)
+
+    def seller(seed):
+        order = skus[seed::args.threads] if args.distinct else list(skus)
+        random.Random(seed).shuffle(order)
+        local_client = app.test_client()
+        local_outcomes, local_timings = Counter(), []
+        start.wait()
+        for sku in order:
+            started = time.perf_counter()
+            response = local_client.post(f'/api/inventory/{sku}/sell', json={'final_price': 30, 'platform': 'Instagram'})
+            local_timings.append(time.perf_counter() - started)
+            body = response.get_json() or {}
+            if body.get('success'):
+                local_outcomes['sold'] += 1
+            elif body.get('error') == 'Item is already sold':
+                local_outcomes['already sold'] += 1
+            else:
+                local_outcomes[f"error: {body.get('error')}"] += 1
+        with lock:
+            outcomes.update(local_outcomes)
+            timings.extend(local_timings)
+
+    queue_before = client.get('/api/inventory/write-queue').get_json()['write_queue']
+    threads = [threading.Thread(target=seller, args=(seed,)) for seed in range(args.threads)]
+    with redirect_stdout(io.StringIO()):
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+    with app.app_context():
+        sold_items = db.session.scalar(
+            select(func.count()).select_from(BusinessInventory).where(BusinessInventory.listing_status == 'sold')
+        )
+        income_rows = db.session.execute(
+            select(BusinessTransaction.source_id, func.count())
+            .where(BusinessTransaction.source_type == 'inventory_sale')
+            .group_by(BusinessTransaction.source_id)
+        ).all()
+
+    double_booked = sum(1 for _, count in income_rows if count > 1)
+    requests_made = len(timings)
+
+    print(f"SQLite WAL, synchronous={args.synchronous}, {args.threads} threads x {args.items} items, "
+          f"write queue {'on' if args.write_queue else 'off'}, database {path}")
+    print(f"sell     n={requests_made:<5} "
+          f"p50={percentile(timings, 0.50) * 1000:7.2f}ms  "
+          f"p95={percentile(timings, 0.95) * 1000:7.2f}ms  "
+          f"mean={statistics.mean(timings) * 1000:7.2f}ms  "
+          f"throughput={requests_made / elapsed:7.1f} req/s")
+    print('outcomes ' + ', '.join(f'{label}={count}' for label, count in sorted(outcomes.items())))
+    print(f"check    items sold={sold_items}/{args.items}  income transactions={sum(c for _, c in income_rows)}  "
+          f"items booked twice={double_booked}")
+    if args.write_queue:
+        stats = client.get('/api/inventory/write-queue').get_json()['write_queue']
+        batches = stats['batches'] - queue_before['batches']
+        jobs = stats['jobs'] - queue_before['jobs']
+        print(f"queue    sell batches={batches}  mean batch={jobs / max(batches, 1):.2f}  "
+              f"max batch={stats['max_batch_size']}  queue wait p50={stats['queue_wait_ms']['p50']}ms "
+              f"p95={stats['queue_wait_ms']['p95']}ms")
+
+    if sold_items != args.items or outcomes['sold'] != args.items or double_booked:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
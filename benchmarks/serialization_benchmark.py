@@ -0,0 +1,117 @@
+"""
+List serialization benchmark for Girasoul Business Dashboard
+
+Fills a fresh SQLite database with inventory items and ledger transactions,
+then times building the list payload two ways: loading ORM objects and
+calling ``to_dict()`` on each, and the column projections used by the list
+endpoints (``blueprints/utils/serializers.py``). Checks that both produce the
+same dicts.
+
+Usage:
+    python benchmarks/serialization_benchmark.py [--rows 100000] [--repeat 3] [--db path]
+"""
+
+import argparse
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BRANDS = ['Levi', 'Zara', 'Coach', 'Wrangler', 'Patagonia', None]
+CONDITIONS = ['new', 'excellent', 'good', 'fair']
+STATUSES = ['inventory', 'listed', 'sold']
+
+
+def seed(db, BusinessInventory, BusinessTransaction, rows):
+    rng = random.Random(17)
+    start = date(2023, 1, 1)
+    items, transactions = [], []
+    for i in range(rows):
+        cost = round(rng.uniform(2, 60), 2)
+        price = round(cost * rng.uniform(1.2, 4), 2)
+        sold = rng.random() < 0.3
+        items.append({
+            'sku': f'SKU{i:07d}', 'name': f'Item {i}', 'description': 'Vintage piece', 'category': 'Tops',
+            'cost_of_item': cost, 'selling_price': price, 'w_tax_price': price * 1.083,
+            'sold_price': price if sold else None, 'listing_status': 'sold' if sold else rng.choice(STATUSES[:2]),
+            'sold_date': start + timedelta(days=i % 700) if sold else None, 'location': 'Bin A',
+            'size': rng.choice(['S', 'M', 'L']), 'condition': rng.choice(CONDITIONS),
+            'brand': rng.choice(BRANDS), 'drop_field': f'Drop {i % 12}'
+        })
+        transactions.append({
+            'date': start + timedelta(days=i % 700), 'description': f'Transaction {i}',
+            'amount': round(rng.uniform(1, 400), 2), 'category': 'Sales',
+            'transaction_type': rng.choice(['Income', 'Expense']), 'account_name': 'Business Checking',
+            'vendor': None, 'notes': None
+        })
+    db.session.execute(BusinessInventory.__table__.insert(), items)
+    db.session.execute(BusinessTransaction.__table__.insert(), transactions)
+    db.session.commit()
+
+
+def timed(repeat, func):
+    best, result = None, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000, help='Inventory items and transactions each')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per variant (best is reported)')
+    parser.add_argument('--db', help='SQLite file to use (default: a temporary file)')
+    args = parser.parse_args()
+
+    path = args.db or os.path.join(tempfile.mkdtemp(prefix='girasoul-serialization-bench-'), 'bench.db')
+    if os.path.exists(path):
+        os.remove(path)
+    os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+
+    with redirect_stdout(io.StringIO()):
+        from app import create_app
+        app = create_app()
+
+    from models import db, BusinessInventory, BusinessTransaction
+    from blueprints.utils.serializers import inventory_projection, transaction_projection
+
+    print(f"SQLite, {args.rows} inventory items and {args.rows} transactions, best of {args.repeat}, database {path}")
+    with app.app_context():
+        seed(db, BusinessInventory, BusinessTransaction, args.rows)
+
+        cases = [
+            ('inventory', BusinessInventory, inventory_projection, [BusinessInventory.id.desc()]),
+            ('transactions', BusinessTransaction, transaction_projection,
+             [BusinessTransaction.date.desc(), BusinessTransaction.id.desc()]),
+        ]
+        mismatched = False
+        for label, model, projection, order in cases:
+            def orm():
+                db.session.expunge_all()
+                return [item.to_dict() for item in model.query.order_by(*order).all()]
+
+            def projected():
+                return projection.to_dicts(projection.apply(model.query).order_by(*order).all())
+
+            orm_time, orm_rows = timed(args.repeat, orm)
+            projected_time, projected_rows = timed(args.repeat, projected)
+            same = orm_rows == projected_rows
+            mismatched = mismatched or not same
+            print(f"{label:<13} to_dict={orm_time * 1000:8.1f}ms  projection={projected_time * 1000:8.1f}ms  "
+                  f"speedup={orm_time / projected_time:5.1f}x  identical={same}")
+
+    if mismatched:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Write-path benchmark for Girasoul Business Dashboard
+
+Creates and sells inventory items through the JSON API against a throwaway
+SQLite database in WAL mode with ``synchronous=FULL`` (an fsync per commit),
+and reports per-request latency plus the number of commits each request
+issued. Creating or selling an item should cost exactly one commit.
+
+Usage:
+    python benchmarks/write_benchmark.py [--items 200] [--synchronous FULL] [--db path]
+"""
+
+import argparse
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def report(label, timings, commits):
+    print(f"{label:<8} n={len(timings):<5} "
+          f"p50={percentile(timings, 0.50) * 1000:7.2f}ms  "
+          f"p95={percentile(timings, 0.95) * 1000:7.2f}ms  "
+          f"mean={statistics.mean(timings) * 1000:7.2f}ms  "
+          f"commits/request={commits / len(timings):.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--items', type=int, default=200)
+    parser.add_argument('--synchronous', default='FULL', choices=['OFF', 'NORMAL', 'FULL', 'EXTRA'])
+    parser.add_argument('--db', help='SQLite file to use (default: a temporary file)')
+    args = parser.parse_args()
+
+    path = args.db or os.path.join(tempfile.mkdtemp(prefix='girasoul-write-bench-'), 'bench.db')
+    if os.path.exists(path):
+        os.remove(path)
+
+    # The engine profile is read from the environment when config is imported
+    os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+    os.environ['SQLITE_JOURNAL_MODE'] = 'WAL'
+    os.environ['SQLITE_SYNCHRONOUS'] = args.synchronous
+
+    from sqlalchemy import event
+    from sqlalchemy.orm import Session
+
+    with redirect_stdout(io.StringIO()):
+        from app import create_app
+        app = create_app()
+
+    commits = {'count': 0}
+
+    @event.listens_for(Session, 'after_commit')
+    def count_commit(session):
+        commits['count'] += 1
+
+    client = app.test_client()
+    created, sold = [], []
+    create_commits = sell_commits = 0
+
+    with redirect_stdout(io.StringIO()):
+        skus = []
+        for i in range(args.items):
+            payload = {'name': f'Benchmark item {i}', 'category': 'Tops', 'cost_of_item': '8.50',
+                       'selling_price': '25.00', 'brand': 'Zara', 'size': 'M', 'condition': 'good'}
+            before = commits['count']
+            started = time.perf_counter()
+            response = client.post('/api/inventory', json=payload)
+            created.append(time.perf_counter() - started)
+            create_commits += commits['count'] - before
+            skus.append(response.get_json()['item']['sku'])
+
+        for sku in skus:
+            before = commits['count']
+            started = time.perf_counter()
+            client.post(f'/api/inventory/{sku}/sell', json={'final_price': 30, 'platform': 'Instagram'})
+            sold.append(time.perf_counter() - started)
+            sell_commits += commits['count'] - before
+
+    print(f"SQLite WAL, synchronous={args.synchronous}, database {path}")
+    report('create', created, create_commits)
+    report('sell', sold, sell_commits)
+
+
+if __name__ == '__main__':
+    main()
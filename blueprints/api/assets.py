@@ -6,11 +6,15 @@ Aligned with simplified BusinessAsset model (no current_value field)
 from flask import Blueprint, request, jsonify
 from datetime import datetime
 from models import db, BusinessAsset, BusinessTransaction
+from blueprints.services.transaction_service import TransactionService
+from blueprints.utils.database import transactional
+from blueprints.utils.events import emit
 
 # Create blueprint
 assets_api_bp = Blueprint('assets_api', __name__, url_prefix='/api/assets')
 
 @assets_api_bp.route('', methods=['POST'])
+@transactional
 def add_asset():
     """Add new business asset with automatic expense transaction using selected expense category"""
     
@@ -76,11 +80,15 @@ def add_asset():
             sub_category=data.get('expense_sub_category', 'Asset Purchase'),  # Use selected sub-category or default
             transaction_type="Expense",
             account_name=data.get('account_name', 'Business Checking'),  # Use selected account
-            notes=f"Automatic transaction for asset purchase (Asset ID: {asset.id})"
+            notes=f"Automatic transaction for asset purchase (Asset ID: {asset.id})",
+            source_type='asset_purchase',
+            source_id=asset.id
         )
         
         db.session.add(expense_transaction)
-        db.session.commit()
+        db.session.flush()  # Get the ID; @transactional commits
+        emit('asset.created', ids=[asset.id])
+        emit('transaction.created', ids=[expense_transaction.id], source_type='asset_purchase')
         
         print(f"✅ Asset added successfully: {asset.name} (ID: {asset.id})")
         print(f"✅ Expense transaction created: ${purchase_price} in category '{data['expense_category']}' (ID: {expense_transaction.id})")
@@ -98,10 +106,10 @@ def add_asset():
         print(f"❌ Error adding asset: {e}")
         import traceback
         traceback.print_exc()
-        db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @assets_api_bp.route('/<int:asset_id>', methods=['PUT'])
+@transactional
 def update_asset(asset_id):
     """Update existing asset"""
     
@@ -154,8 +162,7 @@ def update_asset(asset_id):
                     'error': 'Invalid purchase price format'
                 }), 400
         
-        db.session.commit()
-        
+        emit('asset.updated', ids=[asset.id])
         print(f"✅ Asset updated successfully: {asset.name} (ID: {asset.id})")
         
         return jsonify({
@@ -166,10 +173,10 @@ def update_asset(asset_id):
         
     except Exception as e:
         print(f"❌ Error updating asset: {e}")
-        db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @assets_api_bp.route('/<int:asset_id>', methods=['DELETE'])
+@transactional
 def delete_asset(asset_id):
     """Delete an asset"""
     
@@ -180,8 +187,9 @@ def delete_asset(asset_id):
             return jsonify({'success': False, 'error': 'Asset not found'}), 404
         
         asset_name = asset.name
+        TransactionService.detach_source_transactions(('asset_purchase', 'asset_disposal'), asset.id)
         db.session.delete(asset)
-        db.session.commit()
+        emit('asset.deleted', ids=[asset_id])
         
         print(f"✅ Asset deleted successfully: {asset_name} (ID: {asset_id})")
         
@@ -192,7 +200,6 @@ def delete_asset(asset_id):
         
     except Exception as e:
         print(f"❌ Error deleting asset: {e}")
-        db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @assets_api_bp.route('', methods=['GET'])
@@ -4,6 +4,8 @@ API endpoints for managing categories and conditions
 
 from flask import Blueprint, request, jsonify
 from models import db, BusinessCategory, BusinessCondition
+from blueprints.utils.events import emit
+from blueprints.utils.database import transactional
 
 category_condition_api = Blueprint('category_condition_api', __name__)
 
@@ -27,6 +29,7 @@ def get_inventory_categories():
         }), 500
 
 @category_condition_api.route('/categories/inventory', methods=['POST'])
+@transactional
 def add_inventory_category():
     """Add a new inventory category"""
     try:
@@ -64,7 +67,8 @@ def add_inventory_category():
         )
         
         db.session.add(category)
-        db.session.commit()
+        db.session.flush()
+        emit('category.created', ids=[category.id])
         
         # Return updated list
         categories = BusinessCategory.get_inventory_categories()
@@ -77,7 +81,6 @@ def add_inventory_category():
         })
         
     except Exception as e:
-        db.session.rollback()
         return jsonify({
             'success': False,
             'error': str(e)
@@ -103,6 +106,7 @@ def get_conditions():
         }), 500
 
 @category_condition_api.route('/conditions', methods=['POST'])
+@transactional
 def add_condition():
     """Add a new condition"""
     try:
@@ -143,7 +147,6 @@ def add_condition():
             'error': str(e)
         }), 400
     except Exception as e:
-        db.session.rollback()
         return jsonify({
             'success': False,
             'error': str(e)
@@ -0,0 +1,74 @@
+"""
+Import API Blueprint - CSV uploads for transactions, inventory and sold items
+"""
+
+import io
+from flask import Blueprint, request, jsonify, current_app
+from werkzeug.exceptions import RequestEntityTooLarge
+from blueprints.services.import_service import ImportService
+
+# Create the import API blueprint
+import_api_bp = Blueprint('import_api', __name__, url_prefix='/api/import')
+
+
+@import_api_bp.route('', methods=['POST'])
+def import_csv():
+    """Import a CSV file: ``POST /api/import?kind=transactions|inventory|sold``
+
+    Send the CSV as the raw request body (``Content-Type: text/csv``) to have
+    it parsed straight off the socket, or as a multipart ``file`` field.
+    Either way the upload is bounded by MAX_CONTENT_LENGTH and read in chunks
+    rather than loaded into memory.
+    """
+    kind = request.args.get('kind', '')
+    if kind not in ImportService.IMPORT_KINDS:
+        return jsonify({
+            'success': False,
+            'error': f'kind must be one of: {", ".join(ImportService.IMPORT_KINDS)}'
+        }), 400
+
+    chunk_size = request.args.get('chunk_size', ImportService.DEFAULT_CHUNK_SIZE, type=int)
+    chunk_size = max(1, min(chunk_size, 5000))
+
+    try:
+        if request.mimetype == 'multipart/form-data':
+            upload = request.files.get('file')
+            if not upload:
+                return jsonify({'success': False, 'error': 'No file provided'}), 400
+            binary_stream = upload.stream
+        else:
+            # Raw body: werkzeug limits this stream to MAX_CONTENT_LENGTH
+            binary_stream = request.stream
+
+        text_stream = io.TextIOWrapper(binary_stream, encoding='utf-8-sig', newline='')
+
+        print(f"📥 API: Importing {kind} CSV (chunks of {chunk_size})")
+
+        def report_progress(stats):
+            print(f"📥 API: {kind} import - {stats['rows_read']} rows read, "
+                  f"{stats['inserted']} inserted, {stats['duplicates']} duplicates, {stats['invalid']} invalid")
+
+        result = ImportService.import_csv(text_stream, kind, chunk_size=chunk_size, progress=report_progress)
+        text_stream.detach()
+
+        if result['success']:
+            print(f"✅ API: Imported {result['inserted']} {kind} rows")
+            return jsonify(result)
+        else:
+            print(f"❌ API: Import failed: {result['error']}")
+            return jsonify(result), 400
+
+    except RequestEntityTooLarge:
+        limit_mb = (current_app.config.get('MAX_CONTENT_LENGTH') or 0) / (1024 * 1024)
+        return jsonify({
+            'success': False,
+            'error': f'Upload exceeds the {limit_mb:.1f}MB limit; use `flask import-csv` for larger files'
+        }), 413
+    except UnicodeDecodeError:
+        return jsonify({'success': False, 'error': 'CSV must be UTF-8 encoded'}), 400
+    except Exception as e:
+        print(f"❌ API Error importing CSV: {e}")
+        return jsonify({
+            'success': False,
+            'error': 'Failed to import CSV'
+        }), 500
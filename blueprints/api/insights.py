@@ -5,6 +5,9 @@ Provides AI-powered analytics and recommendations via RESTful endpoints
 
 from flask import Blueprint, request, jsonify
 from blueprints.services.insights_service import InsightsService
+from blueprints.utils.data_versions import conditional_get
+from blueprints.utils.insights_cache import INSIGHTS_TABLES, get_insights_cache, insights_cache_stats
+from blueprints.utils.task_pool import task_pool_stats
 import logging
 
 logger = logging.getLogger(__name__)
@@ -17,12 +20,13 @@ insights_api_bp = Blueprint('insights_api', __name__, url_prefix='/api/insights'
 # =============================================================================
 
 @insights_api_bp.route('/business-overview', methods=['GET'])
+@conditional_get(*INSIGHTS_TABLES, daily=True)
 def get_business_overview():
     """Get comprehensive business overview with AI health score and insights"""
     try:
         print("🧠 API: Getting business overview with AI insights...")
         
-        overview_data = InsightsService.get_business_overview()
+        overview_data = InsightsService.get_section('business_overview')
         
         if overview_data['success']:
             print("✅ API: Successfully generated business overview")
@@ -39,12 +43,13 @@ def get_business_overview():
         }), 500
 
 @insights_api_bp.route('/inventory-analysis', methods=['GET'])
+@conditional_get(*INSIGHTS_TABLES, daily=True)
 def get_inventory_analysis():
     """Get comprehensive inventory analysis with AI recommendations"""
     try:
         print("📦 API: Analyzing inventory with AI insights...")
         
-        inventory_data = InsightsService.get_inventory_insights()
+        inventory_data = InsightsService.get_section('inventory_insights')
         
         if inventory_data['success']:
             print(f"✅ API: Successfully analyzed inventory - {len(inventory_data.get('slow_moving_items', []))} slow movers identified")
@@ -61,12 +66,13 @@ def get_inventory_analysis():
         }), 500
 
 @insights_api_bp.route('/sales-analytics', methods=['GET'])
+@conditional_get(*INSIGHTS_TABLES, daily=True)
 def get_sales_analytics():
     """Get comprehensive sales performance analytics"""
     try:
         print("💰 API: Analyzing sales performance...")
         
-        sales_data = InsightsService.get_sales_analytics()
+        sales_data = InsightsService.get_section('sales_analytics')
         
         if sales_data['success']:
             print(f"✅ API: Successfully analyzed sales - {len(sales_data.get('category_performance', []))} categories analyzed")
@@ -83,12 +89,13 @@ def get_sales_analytics():
         }), 500
 
 @insights_api_bp.route('/profit-optimization', methods=['GET'])
+@conditional_get(*INSIGHTS_TABLES, daily=True)
 def get_profit_optimization():
     """Get AI-powered profit optimization recommendations"""
     try:
         print("📈 API: Generating profit optimization recommendations...")
         
-        profit_data = InsightsService.get_profit_optimization()
+        profit_data = InsightsService.get_section('profit_optimization')
         
         if profit_data['success']:
             print(f"✅ API: Successfully generated profit optimization - {len(profit_data.get('pricing_recommendations', []))} pricing recommendations")
@@ -105,12 +112,13 @@ def get_profit_optimization():
         }), 500
 
 @insights_api_bp.route('/trend-analysis', methods=['GET'])
+@conditional_get(*INSIGHTS_TABLES, daily=True)
 def get_trend_analysis():
     """Get comprehensive trend analysis and market predictions"""
     try:
         print("📊 API: Analyzing business trends and generating predictions...")
         
-        trend_data = InsightsService.get_trend_analysis()
+        trend_data = InsightsService.get_section('trend_analysis')
         
         if trend_data['success']:
             print(f"✅ API: Successfully analyzed trends - seasonal and brand data generated")
@@ -131,12 +139,13 @@ def get_trend_analysis():
 # =============================================================================
 
 @insights_api_bp.route('/slow-moving-inventory', methods=['GET'])
+@conditional_get(*INSIGHTS_TABLES, daily=True)
 def get_slow_moving_inventory():
     """Get specifically slow-moving inventory items with recommendations"""
     try:
         print("🐌 API: Identifying slow-moving inventory items...")
         
-        inventory_data = InsightsService.get_inventory_insights()
+        inventory_data = InsightsService.get_section('inventory_insights')
         
         if inventory_data['success']:
             slow_movers = inventory_data.get('slow_moving_items', [])
@@ -160,12 +169,13 @@ def get_slow_moving_inventory():
         }), 500
 
 @insights_api_bp.route('/category-performance', methods=['GET'])
+@conditional_get(*INSIGHTS_TABLES, daily=True)
 def get_category_performance():
     """Get detailed category performance analysis"""
     try:
         print("📊 API: Analyzing category performance...")
         
-        sales_data = InsightsService.get_sales_analytics()
+        sales_data = InsightsService.get_section('sales_analytics')
         
         if sales_data['success']:
             categories = sales_data.get('category_performance', [])
@@ -189,22 +199,29 @@ def get_category_performance():
         }), 500
 
 @insights_api_bp.route('/pricing-recommendations', methods=['GET'])
+@conditional_get(*INSIGHTS_TABLES, daily=True)
 def get_pricing_recommendations():
-    """Get AI-powered pricing recommendations for current inventory"""
+    """Get AI-powered pricing recommendations for current inventory
+    
+    Query parameters: ``limit`` (default 10, at most 100) and
+    ``min_confidence`` (0-100; confidence is 10 per comparable sale).
+    """
     try:
         print("💰 API: Generating pricing recommendations...")
         
-        # Optional: Get limit from query parameter
         limit = request.args.get('limit', 10, type=int)
+        min_confidence = request.args.get('min_confidence', 0, type=int)
         
-        profit_data = InsightsService.get_profit_optimization()
+        result = InsightsService.get_pricing_recommendations(limit, min_confidence)
         
-        if profit_data['success']:
-            recommendations = profit_data.get('pricing_recommendations', [])[:limit]
+        if result['success']:
+            recommendations = result['recommendations']
             return jsonify({
                 'success': True,
                 'recommendations': recommendations,
                 'count': len(recommendations),
+                'limit': result['limit'],
+                'min_confidence': result['min_confidence'],
                 'potential_impact': sum([rec.get('potential_impact', 0) for rec in recommendations])
             })
         else:
@@ -221,12 +238,13 @@ def get_pricing_recommendations():
         }), 500
 
 @insights_api_bp.route('/health-score', methods=['GET'])
+@conditional_get(*INSIGHTS_TABLES, daily=True)
 def get_health_score():
     """Get current business health score and component breakdown"""
     try:
         print("❤️ API: Calculating business health score...")
         
-        overview_data = InsightsService.get_business_overview()
+        overview_data = InsightsService.get_section('business_overview')
         
         if overview_data['success']:
             health_score = overview_data.get('health_score', {})
@@ -254,18 +272,38 @@ def get_health_score():
 
 @insights_api_bp.route('/refresh-insights', methods=['POST'])
 def refresh_insights():
-    """Force refresh of all cached insights and recalculate"""
+    """Schedule a background recompute of the cached insights
+    
+    Body (optional): ``{"sections": ["business_overview", ...]}``; all
+    sections by default. Returns a job id for ``GET /refresh-insights/<job_id>``.
+    """
     try:
-        print("🔄 API: Refreshing all insights cache...")
+        print("🔄 API: Scheduling insights refresh...")
+        
+        cache = get_insights_cache()
+        if cache is None:
+            return jsonify({
+                'success': True,
+                'job_id': None,
+                'message': 'Insights cache is disabled; insights are computed on every request'
+            })
         
-        # This could trigger a background task to recalculate all insights
-        # For now, we'll just return a success message
+        data = request.get_json(silent=True) or {}
+        sections = data.get('sections')
+        if sections is not None:
+            if not isinstance(sections, list) or any(section not in InsightsService.SECTIONS for section in sections):
+                return jsonify({
+                    'success': False,
+                    'error': f'sections must be a list of: {", ".join(InsightsService.SECTIONS)}'
+                }), 400
         
+        job = cache.schedule(sections, force=True)
         return jsonify({
             'success': True,
             'message': 'Insights refresh initiated',
-            'timestamp': InsightsService.get_business_overview().get('generated_at')
-        })
+            'job_id': job.id,
+            'job': job.to_dict()
+        }), 202
         
     except Exception as e:
         logger.error(f"API Error refreshing insights: {e}")
@@ -274,14 +312,39 @@ def refresh_insights():
             'error': 'Failed to refresh insights'
         }), 500
 
+@insights_api_bp.route('/refresh-insights/<job_id>', methods=['GET'])
+def get_refresh_job(job_id):
+    """Status of a refresh job: queued, running, done or failed"""
+    cache = get_insights_cache()
+    job = cache.job(job_id) if cache is not None else None
+    if job is None:
+        return jsonify({
+            'success': False,
+            'error': 'Refresh job not found'
+        }), 404
+    return jsonify({
+        'success': True,
+        'job': job.to_dict()
+    })
+
+@insights_api_bp.route('/cache-stats', methods=['GET'])
+def get_cache_stats():
+    """Insights cache hits, stale hits, misses and per-section age, plus the section task pool"""
+    return jsonify({
+        'success': True,
+        'insights_cache': insights_cache_stats(),
+        'task_pool': task_pool_stats()
+    })
+
 @insights_api_bp.route('/insights-summary', methods=['GET'])
+@conditional_get(*INSIGHTS_TABLES, daily=True)
 def get_insights_summary():
     """Get a quick summary of all available insights"""
     try:
         print("📋 API: Generating insights summary...")
         
         # Get overview data for key metrics
-        overview = InsightsService.get_business_overview()
+        overview = InsightsService.get_section('business_overview')
         
         if overview['success']:
             health_score = overview.get('health_score', {})
@@ -3,8 +3,15 @@ Inventory API Blueprint - REST API Endpoints
 Handles all AJAX requests for inventory management
 """
 
-from flask import Blueprint, request, jsonify
+from datetime import datetime
+from flask import Blueprint, request, jsonify, current_app
 from blueprints.services.inventory_service import InventoryService
+from blueprints.utils.search import apply_inventory_search
+from blueprints.utils.pagination import keyset_paginate, cached_count, InvalidCursor
+from blueprints.utils.database import transactional, busy_response
+from blueprints.utils.write_queue import run_write, write_queue_stats
+from blueprints.utils.serializers import inventory_projection
+from blueprints.utils.data_versions import conditional_get
 
 # Create the inventory API blueprint
 inventory_api_bp = Blueprint('inventory_api', __name__, url_prefix='/api/inventory')
@@ -15,59 +22,46 @@ inventory_api_bp = Blueprint('inventory_api', __name__, url_prefix='/api/invento
 # =============================================================================
 
 @inventory_api_bp.route('', methods=['GET'])
+@conditional_get('business_inventory')
 def get_all_inventory():
-    """Get all inventory items - corrected for actual schema"""
+    """Get one page of inventory items, newest first
+    
+    Keyset pagination on id: pass back ``pagination.next_cursor`` as
+    ``?cursor=`` for the following page. ``limit`` caps the page size and
+    ``include_total=true`` adds an approximate total.
+    """
     try:
-        print("📦 API: Getting all inventory from database...")
+        print("📦 API: Getting inventory page from database...")
         
         from models import BusinessInventory
         
-        # Get all inventory items - use simple ordering that always works
+        limit = request.args.get('limit', current_app.config.get('ITEMS_PER_PAGE', 50), type=int)
+        limit = max(1, min(limit, current_app.config.get('MAX_ITEMS_PER_PAGE', 500)))
+        cursor = request.args.get('cursor')
+        
         try:
-            items = BusinessInventory.query.order_by(BusinessInventory.id.desc()).all()
-        except Exception as fallback_error:
-            print(f"❌ API: Query failed: {fallback_error}")
-            try:
-                items = BusinessInventory.query.all()
-            except Exception as final_error:
-                print(f"❌ API: Even basic query failed: {final_error}")
-                items = []
-        
-        # Convert to dict format
-        items_data = []
-        for item in items:
-            try:
-                items_data.append(item.to_dict())
-            except Exception as e:
-                print(f"❌ API: Error converting item {getattr(item, 'id', 'unknown')} to dict: {e}")
-                # Robust fallback if to_dict fails
-                try:
-                    items_data.append({
-                        'id': getattr(item, 'id', None),
-                        'sku': getattr(item, 'sku', ''),
-                        'name': getattr(item, 'name', ''),
-                        'description': getattr(item, 'description', ''),
-                        'category': getattr(item, 'category', ''),
-                        'brand': getattr(item, 'brand', ''),
-                        'condition': getattr(item, 'condition', ''),
-                        'cost_of_item': float(getattr(item, 'cost_of_item', 0) or 0),
-                        'selling_price': float(getattr(item, 'selling_price', 0) or 0),
-                        'listing_status': getattr(item, 'listing_status', 'inventory'),
-                        'date_added': getattr(item, 'date_added', None),
-                        'location': getattr(item, 'location', ''),
-                        'size': getattr(item, 'size', ''),
-                        'drop_field': getattr(item, 'drop_field', '')
-                    })
-                except Exception as inner_e:
-                    print(f"❌ API: Even robust fallback failed for item: {inner_e}")
-                    continue
+            items, pagination = keyset_paginate(
+                inventory_projection.apply(BusinessInventory.query), [BusinessInventory.id],
+                cursor=cursor, per_page=limit
+            )
+        except InvalidCursor as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        if request.args.get('include_total', '').lower() == 'true':
+            pagination['total'] = cached_count(
+                BusinessInventory.query, ttl=current_app.config.get('PAGINATION_COUNT_TTL', 30)
+            )
+        
+        # Projected rows -> the same dicts as BusinessInventory.to_dict()
+        items_data = inventory_projection.to_dicts(items)
         
         print(f"📦 API: Retrieved {len(items_data)} inventory items")
         
         return jsonify({
             'success': True,
             'items': items_data,
-            'count': len(items_data)
+            'count': len(items_data),
+            'pagination': pagination
         })
         
     except Exception as e:
@@ -131,42 +125,17 @@ def search_inventory():
             query = query.filter(BusinessInventory.drop_field == data['drop'])
             
         if data.get('search'):
-            search_pattern = f"%{data['search']}%"
-            query = query.filter(
-                (BusinessInventory.name.ilike(search_pattern)) |
-                (BusinessInventory.description.ilike(search_pattern)) |
-                (BusinessInventory.sku.ilike(search_pattern)) |
-                (BusinessInventory.brand.ilike(search_pattern)) |
-                (BusinessInventory.drop_field.ilike(search_pattern))
-            )
+            # FTS5 prefix match, ranked by relevance (see blueprints/utils/search.py)
+            query = apply_inventory_search(query, data['search'])
         
-        # Execute query and convert to dict - use simple ordering
+        # Execute the projected query - relevance first, newest first within ties
         try:
-            items = query.order_by(BusinessInventory.id.desc()).all()
+            items = inventory_projection.apply(query).order_by(BusinessInventory.id.desc()).all()
         except Exception as e:
             print(f"❌ API: Search query failed: {e}")
             items = []
         
-        # Convert to dict format
-        items_data = []
-        for item in items:
-            try:
-                items_data.append(item.to_dict())
-            except AttributeError:
-                # Fallback if to_dict doesn't exist
-                items_data.append({
-                    'id': item.id,
-                    'sku': item.sku,
-                    'name': item.name,
-                    'description': item.description,
-                    'category': item.category,
-                    'brand': getattr(item, 'brand', ''),
-                    'condition': getattr(item, 'condition', ''),
-                    'cost_of_item': float(item.cost_of_item or 0),
-                    'selling_price': float(item.selling_price or 0),
-                    'listing_status': item.listing_status,
-                    'date_added': getattr(item, 'date_added', None)
-                })
+        items_data = inventory_projection.to_dicts(items)
         
         return jsonify({
             'success': True,
@@ -182,6 +151,7 @@ def search_inventory():
         }), 500
 
 @inventory_api_bp.route('/summary', methods=['GET'])
+@conditional_get('business_inventory')
 def get_inventory_summary():
     """Get inventory summary statistics"""
     try:
@@ -203,6 +173,7 @@ def get_inventory_summary():
 
 
 @inventory_api_bp.route('/brands', methods=['GET'])
+@conditional_get('business_inventory')
 def get_brands_list():
     """Get list of unique brands for filtering"""
     try:
@@ -223,13 +194,22 @@ def get_brands_list():
         }), 500
 
 
+@inventory_api_bp.route('/write-queue', methods=['GET'])
+def get_write_queue_stats():
+    """Group-commit write queue metrics: batch sizes and queue latency"""
+    return jsonify({
+        'success': True,
+        'write_queue': write_queue_stats()
+    })
+
+
 # =============================================================================
 # INVENTORY CREATION AND MODIFICATION ENDPOINTS
 # =============================================================================
 
 @inventory_api_bp.route('', methods=['POST'])
 def create_inventory_item():
-    """Create new inventory item"""
+    """Create new inventory item (its own write transaction via run_write)"""
     try:
         data = request.get_json()
         if not data:
@@ -240,13 +220,15 @@ def create_inventory_item():
         
         print(f"📦 API: Creating new inventory item: {data.get('name', 'Unknown')}")
         
-        result = InventoryService.create_inventory_item(data)
+        result = run_write(InventoryService.create_inventory_item, data)
         
         if result['success']:
             print(f"✅ API: Successfully created inventory item with SKU: {result['item']['sku']}")
             return jsonify(result), 201
         else:
             print(f"❌ API: Failed to create inventory item: {result['error']}")
+            if result.get('busy'):
+                return busy_response(result)
             return jsonify(result), 400
             
     except Exception as e:
@@ -257,7 +239,45 @@ def create_inventory_item():
         }), 500
 
 
+@inventory_api_bp.route('/bulk', methods=['POST'])
+@transactional
+def create_inventory_items_bulk():
+    """Create a batch of inventory items (a whole drop) in one transaction
+    
+    Body: ``{"items": [...]}`` (or a bare list), each item shaped like the
+    single-item POST. All-or-nothing: any invalid row rejects the batch.
+    """
+    try:
+        data = request.get_json()
+        items = data.get('items') if isinstance(data, dict) else data
+        if not items:
+            return jsonify({
+                'success': False,
+                'error': 'No items provided'
+            }), 400
+        
+        print(f"📦 API: Bulk creating {len(items)} inventory items")
+        
+        result = InventoryService.create_inventory_items_bulk(
+            items, max_items=current_app.config.get('BULK_INTAKE_MAX_ITEMS', 500)
+        )
+        
+        if result['success']:
+            print(f"✅ API: Bulk created {result['created']} inventory items")
+            return jsonify(result), 201
+        else:
+            print(f"❌ API: Bulk inventory intake rejected: {result['error']}")
+            return jsonify(result), 400
+            
+    except Exception as e:
+        print(f"❌ API Error bulk creating inventory items: {e}")
+        return jsonify({
+            'success': False,
+            'error': 'Failed to create inventory items'
+        }), 500
+
 @inventory_api_bp.route('/<sku>', methods=['PUT'])
+@transactional
 def update_inventory_item(sku):
     """Update existing inventory item"""
     try:
@@ -289,7 +309,7 @@ def update_inventory_item(sku):
 
 @inventory_api_bp.route('/<sku>/sell', methods=['POST'])
 def sell_inventory_item(sku):
-    """Mark inventory item as sold"""
+    """Mark inventory item as sold (its own write transaction via run_write)"""
     try:
         data = request.get_json()
         if not data:
@@ -306,7 +326,14 @@ def sell_inventory_item(sku):
         platform = data.get('platform', 'Other')
         notes = data.get('notes', '')
         
-        result = InventoryService.sell_inventory_item(
+        # Plain read outside the write lock: repeat sells are turned away without queueing for it
+        check = InventoryService.check_sellable(sku)
+        if not check['success']:
+            print(f"❌ API: Failed to sell inventory item {sku}: {check['error']}")
+            return jsonify(check), 400
+        
+        result = run_write(
+            InventoryService.sell_inventory_item,
             sku=sku,
             sold_price=sold_price,
             sale_date=sale_date,
@@ -319,6 +346,8 @@ def sell_inventory_item(sku):
             return jsonify(result)
         else:
             print(f"❌ API: Failed to sell inventory item {sku}: {result['error']}")
+            if result.get('busy'):
+                return busy_response(result)
             return jsonify(result), 400
             
     except Exception as e:
@@ -330,6 +359,7 @@ def sell_inventory_item(sku):
 
 
 @inventory_api_bp.route('/<sku>', methods=['DELETE'])
+@transactional
 def delete_inventory_item(sku):
     """Delete inventory item"""
     try:
@@ -382,6 +412,37 @@ def validate_inventory_data():
             'error': 'Failed to validate data'
         }), 500
 
+@inventory_api_bp.route('/price-suggestion', methods=['GET'])
+def get_price_suggestion():
+    """Suggested selling price for a new item from comparable sales
+    
+    Query parameters: ``category`` (required), ``brand``, ``condition``,
+    ``size`` and optionally ``cost`` for the profit at the suggested price.
+    Falls back from the exact match to category + brand and category alone
+    when there are too few comparable sales.
+    """
+    try:
+        cost = request.args.get('cost', type=float)
+        result = InventoryService.suggest_price(
+            request.args.get('category', '').strip(),
+            brand=request.args.get('brand'),
+            condition=request.args.get('condition'),
+            size=request.args.get('size'),
+            cost=cost
+        )
+        
+        if result['success']:
+            return jsonify(result)
+        else:
+            return jsonify(result), 400
+        
+    except Exception as e:
+        print(f"❌ API Error suggesting price: {e}")
+        return jsonify({
+            'success': False,
+            'error': 'Failed to suggest a price'
+        }), 500
+
 @inventory_api_bp.route('/calculate-profit', methods=['POST'])
 def calculate_profit():
     """Calculate profit for given cost and selling price"""
@@ -482,6 +543,7 @@ def get_categories_and_conditions():
         }), 500
 
 @inventory_api_bp.route('/filter-options', methods=['GET'])
+@conditional_get('business_inventory')
 def get_filter_options():
     """Get all filter options (categories, conditions, brands, statuses)"""
     try:
@@ -534,9 +596,54 @@ def get_filter_options():
 # BATCH OPERATIONS ENDPOINTS
 # =============================================================================
 
+@inventory_api_bp.route('/batch', methods=['PATCH'])
+@transactional
+def batch_patch_inventory():
+    """Apply one field patch to many items with a single UPDATE
+    
+    Body: ``{"patch": {"status": "listed", "location": "...", "drop_field":
+    "...", "selling_price": 25}, "skus": [...]}`` or ``"filters": {...}``
+    (status, condition, brand, drop, category, search) instead of ``skus``.
+    """
+    try:
+        data = request.get_json()
+        if not data or not data.get('patch'):
+            return jsonify({
+                'success': False,
+                'error': 'patch is required'
+            }), 400
+        
+        target = f"{len(data['skus'])} SKUs" if data.get('skus') else f"filters {data.get('filters')}"
+        print(f"📦 API: Batch patching {target} with {data['patch']}")
+        
+        result = InventoryService.patch_inventory_items(
+            data['patch'], skus=data.get('skus'), filters=data.get('filters')
+        )
+        
+        if result['success']:
+            print(f"✅ API: {result['message']}")
+            return jsonify(result)
+        else:
+            print(f"❌ API: Batch patch rejected: {result['error']}")
+            return jsonify(result), 400
+        
+    except Exception as e:
+        print(f"❌ API Error in batch patch: {e}")
+        return jsonify({
+            'success': False,
+            'error': 'Failed to update items'
+        }), 500
+
 @inventory_api_bp.route('/batch/status', methods=['POST'])
+@transactional
 def batch_update_status():
-    """Update status for multiple items"""
+    """Update status for multiple items (kept for older clients)
+    
+    Returns the per-item ``results`` older clients read; the status change
+    is one UPDATE through PATCH /batch, which leaves sold items alone.
+    Selling needs a sale price, so ``sold`` is refused: use
+    ``POST /api/inventory/<sku>/sell`` per item.
+    """
     try:
         data = request.get_json()
         if not data or not data.get('skus') or not data.get('status'):
@@ -547,26 +654,30 @@ def batch_update_status():
         
         skus = data['skus']
         new_status = data['status']
+        if not isinstance(skus, list):
+            return jsonify({
+                'success': False,
+                'error': 'skus must be a list'
+            }), 400
         
         print(f"📦 API: Batch updating status for {len(skus)} items to '{new_status}'")
         
+        if new_status == 'sold':
+            return jsonify({
+                'success': False,
+                'error': 'Items are sold one at a time with their sale price: POST /api/inventory/<sku>/sell'
+            }), 400
+        
+        result = InventoryService.patch_inventory_items({'status': new_status}, skus=skus)
+        if not result['success']:
+            return jsonify(result), 400
+        
+        errors = {entry['sku']: entry['reason'] for entry in result['skipped']}
+        errors.update((sku, 'Item not found') for sku in result['not_found'])
         results = []
         for sku in skus:
-            item_data = InventoryService.get_inventory_by_sku(sku)
-            if item_data:
-                item_data['listing_status'] = new_status
-                result = InventoryService.update_inventory_item(sku, item_data)
-                results.append({
-                    'sku': sku,
-                    'success': result['success'],
-                    'error': result.get('error')
-                })
-            else:
-                results.append({
-                    'sku': sku,
-                    'success': False,
-                    'error': 'Item not found'
-                })
+            error = errors.get(str(sku))
+            results.append({'sku': sku, 'success': error is None, 'error': error})
         
         success_count = sum(1 for r in results if r['success'])
         
@@ -586,80 +697,150 @@ def batch_update_status():
         }), 500
 
 
+EXPORT_FILTER_ARGS = ('status', 'condition', 'brand', 'drop', 'category', 'search')
+
+EXPORT_CSV_HEADER = [
+    'SKU', 'Name', 'Brand', 'Item Type', 'Category', 'Size',
+    'Condition', 'Cost', 'Selling Price', 'Status', 'Location',
+    'Collection/Drop', 'Date Added', 'Description'
+]
+
+# Rows buffered per chunk written to the response
+EXPORT_CHUNK_ROWS = 500
+
+
+def _export_item(row):
+    """Export projection row -> dict with the same keys as BusinessInventory.to_dict()"""
+    cost = float(row.cost_of_item) if row.cost_of_item else 0.0
+    price = float(row.selling_price) if row.selling_price else 0.0
+    return {
+        'id': row.id,
+        'sku': row.sku,
+        'name': row.name,
+        'description': row.description,
+        'category': row.category,
+        'cost_of_item': cost,
+        'selling_price': price,
+        'sold_price': float(row.sold_price) if row.sold_price else None,
+        'w_tax_price': float(row.w_tax_price) if row.w_tax_price else None,
+        'listing_status': row.listing_status,
+        'date_added': None,
+        'sold_date': row.sold_date.isoformat() if row.sold_date else None,
+        'location': row.location,
+        'size': row.size,
+        'condition': row.condition,
+        'brand': row.brand,
+        'drop_field': row.drop_field,
+        'margin_percentage': ((price - cost) / price) * 100 if price and cost else 0,
+        'profit_amount': price - cost if price and cost else 0
+    }
+
+
+def _stream_csv(rows):
+    """CSV chunks: header first, then EXPORT_CHUNK_ROWS rows per chunk"""
+    import csv
+    import io
+    
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_CSV_HEADER)
+    yield buffer.getvalue()
+    
+    pending = 0
+    for row in rows:
+        if pending == 0:
+            buffer.seek(0)
+            buffer.truncate()
+        writer.writerow([
+            row.sku or '',
+            row.name or '',
+            row.brand or '',
+            '',  # Item type is not tracked on the current schema
+            row.category or '',
+            row.size or '',
+            row.condition or '',
+            float(row.cost_of_item) if row.cost_of_item is not None else '',
+            float(row.selling_price) if row.selling_price is not None else '',
+            row.listing_status or '',
+            row.location or '',
+            row.drop_field or '',
+            '',  # date_added is temporarily disabled on the model
+            row.description or ''
+        ])
+        pending += 1
+        if pending == EXPORT_CHUNK_ROWS:
+            yield buffer.getvalue()
+            pending = 0
+    
+    if pending:
+        yield buffer.getvalue()
+
+
+def _stream_ndjson(rows):
+    """One JSON object per line, EXPORT_CHUNK_ROWS lines per chunk"""
+    import json
+    
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(_export_item(row), separators=(',', ':')))
+        if len(lines) == EXPORT_CHUNK_ROWS:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+def _stream_json(rows, filters):
+    """The legacy JSON envelope, written incrementally ("count" comes last)"""
+    import json
+    
+    yield '{"success":true,"filters":' + json.dumps(filters) + ',"items":['
+    count = 0
+    chunk = []
+    for row in rows:
+        chunk.append(json.dumps(_export_item(row), separators=(',', ':')))
+        count += 1
+        if len(chunk) == EXPORT_CHUNK_ROWS:
+            yield (',' if count > len(chunk) else '') + ','.join(chunk)
+            chunk = []
+    if chunk:
+        yield (',' if count > len(chunk) else '') + ','.join(chunk)
+    yield '],"count":' + str(count) + ',"export_date":' + json.dumps(str(datetime.now())) + '}'
+
+
 @inventory_api_bp.route('/export', methods=['GET'])
 def export_inventory():
-    """Export inventory data"""
+    """Stream inventory as CSV, NDJSON or JSON
+    
+    ``?format=csv|ndjson|json`` plus the search filters (status, condition,
+    brand, drop, category, search). Rows are read with a ``yield_per``
+    column projection and written as they arrive, so memory stays constant
+    and the first bytes go out immediately.
+    """
     try:
-        print("📦 API: Exporting inventory data...")
+        from flask import Response, stream_with_context
         
-        # Get query parameters for filtering
-        status = request.args.get('status')
-        format_type = request.args.get('format', 'json')
+        format_type = request.args.get('format', 'json').lower()
+        filters = {name: request.args[name] for name in EXPORT_FILTER_ARGS if request.args.get(name)}
         
-        # Build filters
-        filters = {}
-        if status:
-            filters['status'] = status
+        print(f"📦 API: Streaming inventory export ({format_type}) with filters: {filters}")
         
-        # Get filtered items
-        if filters:
-            items = InventoryService.search_inventory(filters)
-        else:
-            items = InventoryService.get_all_inventory()
+        rows = InventoryService.iter_inventory_rows(filters)
         
-        if format_type.lower() == 'csv':
-            # Return CSV format
-            import csv
-            import io
-            
-            output = io.StringIO()
-            writer = csv.writer(output)
-            
-            # Write header
-            writer.writerow([
-                'SKU', 'Name', 'Brand', 'Item Type', 'Category', 'Size', 
-                'Condition', 'Cost', 'Selling Price', 'Status', 'Location', 
-                'Collection/Drop', 'Date Added', 'Description'
-            ])
-            
-            # Write data
-            for item in items:
-                writer.writerow([
-                    item.get('sku', ''),
-                    item.get('name', ''),
-                    item.get('brand', ''),
-                    item.get('item_type', ''),
-                    item.get('category', ''),
-                    item.get('size', ''),
-                    item.get('condition', ''),
-                    item.get('cost_of_item', ''),
-                    item.get('selling_price', ''),
-                    item.get('listing_status', ''),
-                    item.get('location', ''),
-                    item.get('collection_drop', ''),
-                    item.get('date_added', ''),
-                    item.get('description', '')
-                ])
-            
-            csv_content = output.getvalue()
-            output.close()
-            
-            from flask import Response
+        if format_type == 'csv':
             return Response(
-                csv_content,
+                stream_with_context(_stream_csv(rows)),
                 mimetype='text/csv',
                 headers={'Content-Disposition': 'attachment; filename=inventory_export.csv'}
             )
-        
+        elif format_type == 'ndjson':
+            return Response(
+                stream_with_context(_stream_ndjson(rows)),
+                mimetype='application/x-ndjson',
+                headers={'Content-Disposition': 'attachment; filename=inventory_export.ndjson'}
+            )
         else:
-            # Return JSON format
-            return jsonify({
-                'success': True,
-                'items': items,
-                'count': len(items),
-                'export_date': str(datetime.now()),
-                'filters': filters
-            })
+            return Response(stream_with_context(_stream_json(rows, filters)), mimetype='application/json')
         
     except Exception as e:
         print(f"❌ API Error exporting inventory: {e}")
@@ -0,0 +1,36 @@
+"""
+System API Blueprint - operational metrics for the write path and data changes
+"""
+
+from flask import Blueprint, jsonify
+from blueprints.utils.database import write_contention_metrics
+from blueprints.utils.write_queue import write_queue_stats
+from blueprints.utils.events import event_bus
+from blueprints.utils.data_versions import get_data_versions
+
+# Create the system API blueprint
+system_api_bp = Blueprint('system_api', __name__, url_prefix='/api/system')
+
+
+@system_api_bp.route('/write-stats', methods=['GET'])
+def get_write_stats():
+    """Per-endpoint lock-wait time and busy retries, plus group-commit queue metrics"""
+    return jsonify({
+        'success': True,
+        'write_contention': write_contention_metrics.snapshot(),
+        'write_queue': write_queue_stats()
+    })
+
+
+@system_api_bp.route('/data-versions', methods=['GET'])
+def get_data_version_stats():
+    """Per-table data versions (all processes) and this process's domain event counters"""
+    versions = get_data_versions()
+    return jsonify({
+        'success': True,
+        'data_versions': {
+            table: {'version': version, 'updated_at': updated_at}
+            for table, (version, updated_at) in versions.items()
+        } if versions is not None else None,
+        'events': event_bus.stats()
+    })
@@ -1,11 +1,17 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from datetime import datetime
 from models import db, BusinessTransaction
+from blueprints.utils.periods import apply_period
+from blueprints.utils.pagination import keyset_paginate, cached_count, InvalidCursor
+from blueprints.utils.database import transactional
+from blueprints.utils.serializers import transaction_projection
+from blueprints.utils.events import emit
 
 # Create transactions API blueprint
 transactions_api_bp = Blueprint('transactions_api', __name__)
 
 @transactions_api_bp.route('', methods=['POST'])
+@transactional
 def add_transaction():
     """Add new business transaction - Updated for new schema"""
     
@@ -55,7 +61,8 @@ def add_transaction():
         )
         
         db.session.add(transaction)
-        db.session.commit()
+        db.session.flush()  # Get the ID; @transactional commits
+        emit('transaction.created', ids=[transaction.id], source_type=None)
         
         print(f"✅ Successfully added transaction '{data['description']}' (ID: {transaction.id})")
         
@@ -70,7 +77,6 @@ def add_transaction():
         print(f"❌ Error adding transaction: {e}")
         import traceback
         traceback.print_exc()
-        db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @transactions_api_bp.route('/<int:transaction_id>', methods=['GET'])
@@ -93,6 +99,7 @@ def get_transaction(transaction_id):
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @transactions_api_bp.route('/<int:transaction_id>', methods=['PUT'])
+@transactional
 def update_transaction(transaction_id):
     """Update existing transaction - Updated for new schema"""
     
@@ -135,8 +142,8 @@ def update_transaction(transaction_id):
                 return jsonify({'success': False, 'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
         
         # REMOVED: transaction.updated_at = datetime.utcnow() (field no longer exists)
-        db.session.commit()
         
+        emit('transaction.updated', ids=[transaction.id])
         return jsonify({
             'success': True,
             'message': 'Transaction updated successfully!',
@@ -145,10 +152,10 @@ def update_transaction(transaction_id):
         
     except Exception as e:
         print(f"❌ Error updating transaction: {e}")
-        db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @transactions_api_bp.route('/<int:transaction_id>', methods=['DELETE'])
+@transactional
 def delete_transaction(transaction_id):
     """Delete transaction"""
     
@@ -160,7 +167,7 @@ def delete_transaction(transaction_id):
         
         description = transaction.description
         db.session.delete(transaction)
-        db.session.commit()
+        emit('transaction.deleted', ids=[transaction_id])
         
         return jsonify({
             'success': True,
@@ -169,16 +176,20 @@ def delete_transaction(transaction_id):
         
     except Exception as e:
         print(f"❌ Error deleting transaction: {e}")
-        db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @transactions_api_bp.route('', methods=['GET'])
 def get_transactions():
-    """Get filtered list of transactions"""
+    """Get filtered list of transactions, newest first
+    
+    Keyset pagination on (date, id): pass back ``pagination.next_cursor`` or
+    ``pagination.prev_cursor`` as ``?cursor=``. ``include_total=true`` adds an
+    approximate (cached) total.
+    """
     
     try:
         # Get query parameters
-        page = request.args.get('page', 1, type=int)
+        cursor = request.args.get('cursor')
         per_page = request.args.get('per_page', 20, type=int)
         transaction_type = request.args.get('type')
         category = request.args.get('category')
@@ -194,37 +205,27 @@ def get_transactions():
         if category:
             query = query.filter(BusinessTransaction.category == category)
         
-        if year:
-            from sqlalchemy import extract
-            query = query.filter(extract('year', BusinessTransaction.date) == year)
-        
-        if month:
-            from sqlalchemy import extract
-            query = query.filter(extract('month', BusinessTransaction.date) == month)
-        
-        # Order by date (newest first)
-        query = query.order_by(BusinessTransaction.date.desc(), BusinessTransaction.id.desc())
+        # Year/month become an index-friendly date range (month alone matches every year)
+        query = apply_period(query, BusinessTransaction.date, year, month)
         
-        # Paginate
-        pagination = query.paginate(
-            page=page, 
-            per_page=min(per_page, 100),  # Limit to max 100 per page
-            error_out=False
-        )
-        
-        transactions = [transaction.to_dict() for transaction in pagination.items]
+        # Seek past the cursor on (date, id) - newest first
+        try:
+            transactions, pagination = keyset_paginate(
+                transaction_projection.apply(query),
+                [BusinessTransaction.date, BusinessTransaction.id],
+                cursor=cursor,
+                per_page=max(1, min(per_page, 100))  # Limit to max 100 per page
+            )
+        except InvalidCursor as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        if request.args.get('include_total', '').lower() == 'true':
+            pagination['total'] = cached_count(query, ttl=current_app.config.get('PAGINATION_COUNT_TTL', 30))
         
         return jsonify({
             'success': True,
-            'transactions': transactions,
-            'pagination': {
-                'page': pagination.page,
-                'pages': pagination.pages,
-                'per_page': pagination.per_page,
-                'total': pagination.total,
-                'has_next': pagination.has_next,
-                'has_prev': pagination.has_prev
-            }
+            'transactions': transaction_projection.to_dicts(transactions),
+            'pagination': pagination
         })
         
     except Exception as e:
@@ -6,11 +6,14 @@ from datetime import datetime, date
 from sqlalchemy import func
 from models import db, BusinessAsset
 from blueprints.services.transaction_service import TransactionService
+from blueprints.utils.database import transaction_scope, write_transaction
+from blueprints.utils.events import emit
 
 class AssetService:
     """Service class for asset business logic"""
     
     @staticmethod
+    @write_transaction()
     def create_asset(data):
         """Create a new business asset with automatic expense transaction"""
         try:
@@ -36,45 +39,45 @@ class AssetService:
                 salvage_value=data.get('salvage_value', 0)
             )
             
-            db.session.add(asset)
-            db.session.flush()  # Get the ID
-            
-            # Create automatic expense transaction
-            transaction_data = {
-                'date': data['purchase_date'],
-                'description': f"Asset Purchase: {data['name']}",
-                'amount': float(data['purchase_price']),
-                'category': 'Equipment & Supplies',
-                'transaction_type': 'Expense',
-                'account_name': 'Business Account',
-                'vendor': data.get('vendor', ''),
-                'notes': f"Purchase of business asset: {data['name']}"
-            }
-            
-            transaction_result = TransactionService.create_automatic_transaction(
-                'asset_purchase',
-                asset.id,
-                transaction_data
-            )
-            
-            if not transaction_result['success']:
-                db.session.rollback()
-                return {'success': False, 'error': f"Failed to create expense transaction: {transaction_result['error']}"}
-            
-            db.session.commit()
-            
-            return {
-                'success': True,
-                'asset': asset,
-                'transaction': transaction_result['transaction'],
-                'message': f'Asset "{asset.name}" created successfully!'
-            }
+            with transaction_scope() as unit:
+                db.session.add(asset)
+                db.session.flush()  # Get the ID
+                
+                # Create automatic expense transaction
+                transaction_data = {
+                    'date': data['purchase_date'],
+                    'description': f"Asset Purchase: {data['name']}",
+                    'amount': float(data['purchase_price']),
+                    'category': 'Equipment & Supplies',
+                    'transaction_type': 'Expense',
+                    'account_name': 'Business Account',
+                    'vendor': data.get('vendor', ''),
+                    'notes': f"Purchase of business asset: {data['name']}"
+                }
+                
+                transaction_result = TransactionService.create_automatic_transaction(
+                    'asset_purchase',
+                    asset.id,
+                    transaction_data
+                )
+                
+                if not transaction_result['success']:
+                    unit.rollback()
+                    return {'success': False, 'error': f"Failed to create expense transaction: {transaction_result['error']}"}
+                
+                emit('asset.created', ids=[asset.id])
+                return {
+                    'success': True,
+                    'asset': asset,
+                    'transaction': transaction_result['transaction'],
+                    'message': f'Asset "{asset.name}" created successfully!'
+                }
             
         except Exception as e:
-            db.session.rollback()
             return {'success': False, 'error': str(e)}
     
     @staticmethod
+    @write_transaction()
     def dispose_asset(asset_id, disposal_date=None, disposal_value=0):
         """Dispose of an asset and create disposal transaction if value > 0"""
         try:
@@ -95,47 +98,46 @@ class AssetService:
             except (ValueError, TypeError):
                 return {'success': False, 'error': 'Invalid disposal value format'}
             
-            # Update asset
-            asset.is_active = False
-            asset.disposal_date = disposal_date
-            asset.disposal_value = disposal_value
-            asset.updated_at = datetime.utcnow()
-            
-            transaction_result = None
-            
-            # Create disposal transaction if there's disposal value
-            if disposal_value > 0:
-                transaction_data = {
-                    'date': disposal_date.isoformat(),
-                    'description': f"Asset Disposal: {asset.name}",
-                    'amount': disposal_value,
-                    'category': 'Other Income',
-                    'transaction_type': 'Income',
-                    'account_name': 'Business Account',
-                    'notes': f"Disposal of {asset.name}"
-                }
+            with transaction_scope() as unit:
+                # Update asset
+                asset.is_active = False
+                asset.disposal_date = disposal_date
+                asset.disposal_value = disposal_value
+                asset.updated_at = datetime.utcnow()
                 
-                transaction_result = TransactionService.create_automatic_transaction(
-                    'asset_disposal',
-                    asset.id,
-                    transaction_data
-                )
+                transaction_result = None
                 
-                if not transaction_result['success']:
-                    db.session.rollback()
-                    return {'success': False, 'error': f"Failed to create disposal transaction: {transaction_result['error']}"}
-            
-            db.session.commit()
-            
-            return {
-                'success': True,
-                'asset': asset,
-                'transaction': transaction_result['transaction'] if transaction_result else None,
-                'message': f'Asset "{asset.name}" disposed successfully!'
-            }
+                # Create disposal transaction if there's disposal value
+                if disposal_value > 0:
+                    transaction_data = {
+                        'date': disposal_date.isoformat(),
+                        'description': f"Asset Disposal: {asset.name}",
+                        'amount': disposal_value,
+                        'category': 'Other Income',
+                        'transaction_type': 'Income',
+                        'account_name': 'Business Account',
+                        'notes': f"Disposal of {asset.name}"
+                    }
+                    
+                    transaction_result = TransactionService.create_automatic_transaction(
+                        'asset_disposal',
+                        asset.id,
+                        transaction_data
+                    )
+                    
+                    if not transaction_result['success']:
+                        unit.rollback()
+                        return {'success': False, 'error': f"Failed to create disposal transaction: {transaction_result['error']}"}
+                
+                emit('asset.disposed', ids=[asset.id], disposal_value=disposal_value)
+                return {
+                    'success': True,
+                    'asset': asset,
+                    'transaction': transaction_result['transaction'] if transaction_result else None,
+                    'message': f'Asset "{asset.name}" disposed successfully!'
+                }
             
         except Exception as e:
-            db.session.rollback()
             return {'success': False, 'error': str(e)}
     
     @staticmethod
@@ -347,33 +349,34 @@ class AssetService:
             }
     
     @staticmethod
+    @write_transaction()
     def update_all_asset_depreciation():
         """Update depreciation for all active assets"""
         try:
             active_assets = BusinessAsset.query.filter_by(is_active=True).all()
             updated_count = 0
             
-            for asset in active_assets:
-                depreciation_info = AssetService.calculate_asset_depreciation(asset)
-                
-                # Update asset with calculated values
-                asset.annual_depreciation = depreciation_info['annual_depreciation']
-                asset.accumulated_depreciation = depreciation_info['accumulated_depreciation']
-                asset.current_value = depreciation_info['current_value']
-                asset.updated_at = datetime.utcnow()
+            with transaction_scope():
+                for asset in active_assets:
+                    depreciation_info = AssetService.calculate_asset_depreciation(asset)
+                    
+                    # Update asset with calculated values
+                    asset.annual_depreciation = depreciation_info['annual_depreciation']
+                    asset.accumulated_depreciation = depreciation_info['accumulated_depreciation']
+                    asset.current_value = depreciation_info['current_value']
+                    asset.updated_at = datetime.utcnow()
+                    
+                    updated_count += 1
                 
-                updated_count += 1
-            
-            db.session.commit()
-            
-            return {
-                'success': True,
-                'updated_count': updated_count,
-                'message': f'Updated depreciation for {updated_count} assets'
-            }
+                if active_assets:
+                    emit('asset.depreciated', ids=[asset.id for asset in active_assets])
+                return {
+                    'success': True,
+                    'updated_count': updated_count,
+                    'message': f'Updated depreciation for {updated_count} assets'
+                }
             
         except Exception as e:
-            db.session.rollback()
             return {
                 'success': False,
                 'error': str(e),
@@ -0,0 +1,439 @@
+"""
+Streaming CSV import for transactions, inventory and sold items
+
+Replaces the one-off data/migration notebook with a pipeline that can run in
+production and be repeated safely:
+
+- the CSV is read lazily, ``chunk_size`` rows at a time, so memory does not
+  grow with the file
+- each chunk is checked with the validators.py rules (``validate_batch``)
+- valid rows are written with executemany, one transaction per chunk, so a
+  failure only rolls back the chunk in flight
+- every transaction written by an import carries a content hash with a
+  unique index, so re-importing the same file skips rows already loaded
+"""
+
+import csv
+import hashlib
+import itertools
+import logging
+import re
+from datetime import datetime, date
+from sqlalchemy import insert
+from models import db, BusinessTransaction, BusinessInventory, BusinessSold, apply_rollup_for_transactions
+from blueprints.services.inventory_service import InventoryService
+from blueprints.utils.database import run_write_transaction
+from blueprints.utils.events import emit
+from blueprints.utils.validators import (
+    validate_batch, validate_transaction_data, validate_inventory_data, validate_sold_data,
+    validate_date_string, validate_currency_amount, sanitize_input
+)
+
+logger = logging.getLogger(__name__)
+
+
+class ImportService:
+    """Service class for CSV data imports"""
+
+    IMPORT_KINDS = ('transactions', 'inventory', 'sold')
+    DEFAULT_CHUNK_SIZE = 500
+    MAX_REPORTED_ERRORS = 100
+
+    # Header aliases (after lower_snake_case normalization), including the
+    # spreadsheet column names the migration notebook used
+    COLUMN_ALIASES = {
+        'transactions': {
+            'type': 'transaction_type',
+            'account': 'account_name',
+            'subcategory': 'sub_category',
+            'invoice': 'invoice_number',
+        },
+        'inventory': {
+            'cost': 'cost_of_item',
+            'price': 'selling_price',
+            'w_tax': 'w_tax_price',
+            'drop': 'drop_field',
+            'collection_drop': 'drop_field',
+            'status': 'listing_status',
+            'date': 'date_added',
+        },
+        'sold': {
+            'cost': 'cost_of_item',
+            'price': 'selling_price',
+            'sold': 'sold_price',
+            'w_tax': 'w_tax_price',
+            'drop': 'drop_field',
+            'type': 'item_type',
+            'status': 'platform',
+        },
+    }
+
+    CURRENCY_FIELDS = ('amount', 'cost_of_item', 'selling_price', 'sold_price', 'w_tax_price')
+    DATE_FIELDS = ('date', 'date_added', 'sold_date')
+    DATE_FORMATS = ('%Y-%m-%d', '%m/%d/%Y', '%m/%d/%y', '%Y/%m/%d')
+
+    # Optional columns the writers parse but the record validators do not check
+    OPTIONAL_FIELDS = {
+        'transactions': (),
+        'inventory': (('date_added', 'Date added'), ('w_tax_price', 'Price with tax')),
+        'sold': (('w_tax_price', 'Price with tax'),),
+    }
+
+    PLATFORM_ALIASES = {'IG': 'Instagram', 'FB': 'Facebook', 'F&F': 'Friends & Family'}
+
+    @staticmethod
+    def import_csv(stream, kind, chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+        """Import a CSV text stream of ``kind`` records
+
+        ``progress`` is called with the running stats after every chunk.
+        Returns the final stats with up to MAX_REPORTED_ERRORS row errors.
+        """
+        if kind not in ImportService.IMPORT_KINDS:
+            return {'success': False, 'error': f'kind must be one of: {", ".join(ImportService.IMPORT_KINDS)}'}
+
+        validator, writer = {
+            'transactions': (validate_transaction_data, ImportService._write_transactions),
+            'inventory': (validate_inventory_data, ImportService._write_inventory),
+            'sold': (validate_sold_data, ImportService._write_sold),
+        }[kind]
+
+        reader = csv.DictReader(stream)
+        if not reader.fieldnames:
+            return {'success': False, 'error': 'CSV file has no header row'}
+
+        aliases = ImportService.COLUMN_ALIASES[kind]
+        header_map = {}
+        for header in reader.fieldnames:
+            normalized = re.sub(r'[^a-z0-9]+', '_', (header or '').strip().lower()).strip('_')
+            header_map[header] = aliases.get(normalized, normalized)
+
+        stats = {
+            'success': True,
+            'kind': kind,
+            'rows_read': 0,
+            'inserted': 0,
+            'duplicates': 0,
+            'invalid': 0,
+            'transactions_created': 0,
+            'chunks': 0,
+            'errors': []
+        }
+
+        row_number = 2  # First data line after the header
+        while True:
+            chunk = list(itertools.islice(reader, chunk_size))
+            if not chunk:
+                break
+
+            records = [ImportService._normalize_row(raw, header_map, kind) for raw in chunk]
+            valid_rows, errors = validate_batch(
+                records, ImportService._row_validator(kind, validator), first_row_number=row_number
+            )
+            first_row, row_number = row_number, row_number + len(chunk)
+
+            try:
+                written = run_write_transaction(f'ImportService.import_csv.{kind}', lambda unit: writer(valid_rows))
+            except Exception as e:
+                logger.error(f"Import chunk starting at row {first_row} failed: {e}")
+                stats['success'] = False
+                stats['error'] = f'Rows {first_row}-{row_number - 1} could not be written: {e}'
+                break
+
+            stats['rows_read'] += len(chunk)
+            stats['invalid'] += len(errors)
+            stats['inserted'] += written['inserted']
+            stats['duplicates'] += written['duplicates']
+            stats['transactions_created'] += written['transactions']
+            stats['chunks'] += 1
+            room = ImportService.MAX_REPORTED_ERRORS - len(stats['errors'])
+            if room > 0:
+                stats['errors'].extend(errors[:room])
+
+            if progress:
+                progress(stats)
+
+        return stats
+
+    # ------------------------------------------------------------------
+    # Row normalization
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _normalize_row(raw, header_map, kind):
+        """CSV strings -> the dict shape the validators and writers expect"""
+        row = {}
+        for header, value in raw.items():
+            if header is None:
+                continue  # Extra cells beyond the header
+            row[header_map[header]] = value.strip() if isinstance(value, str) else value
+
+        for field in ImportService.CURRENCY_FIELDS:
+            if row.get(field):
+                row[field] = row[field].replace('$', '').replace(',', '')
+
+        for field in ImportService.DATE_FIELDS:
+            if row.get(field):
+                row[field] = ImportService._normalize_date(row[field])
+
+        if kind == 'transactions':
+            if row.get('transaction_type'):
+                row['transaction_type'] = row['transaction_type'].capitalize()
+        else:
+            # Spreadsheet exports describe items as "<Brand> <Item Type>"
+            if not row.get('name') and row.get('brand') and row.get('item_type'):
+                row['name'] = f"{row['brand']} {row['item_type']}"
+            if not row.get('category') and row.get('item_type'):
+                row['category'] = row['item_type']
+
+        if kind == 'sold' and row.get('platform'):
+            row['platform'] = ImportService.PLATFORM_ALIASES.get(row['platform'], row['platform'])
+
+        return row
+
+    @staticmethod
+    def _row_validator(kind, validator):
+        """``validator`` plus the optional columns of ``kind``, so the writers never see unparseable values"""
+        def validate(row):
+            validation = validator(row)
+            if not validation['valid']:
+                return validation
+            for field, label in ImportService.OPTIONAL_FIELDS[kind]:
+                if not row.get(field):
+                    continue
+                if field in ImportService.DATE_FIELDS:
+                    validation = validate_date_string(row[field], label)
+                else:
+                    validation = validate_currency_amount(row[field], label, allow_zero=True)
+                if not validation['valid']:
+                    return validation
+            return {'valid': True}
+        return validate
+
+    @staticmethod
+    def _normalize_date(value):
+        """Accept common spreadsheet date formats, emit YYYY-MM-DD (or the input if unparseable)"""
+        for date_format in ImportService.DATE_FORMATS:
+            try:
+                return datetime.strptime(value, date_format).strftime('%Y-%m-%d')
+            except ValueError:
+                continue
+        return value
+
+    @staticmethod
+    def transaction_hash(row):
+        """Content hash identifying a transaction row across imports"""
+        parts = [
+            row['date'].isoformat() if isinstance(row['date'], date) else str(row['date']),
+            row['transaction_type'],
+            f"{float(row['amount']):.2f}",
+            row['category'],
+            row.get('sub_category') or '',
+            row['description'],
+            row['account_name'],
+            row.get('vendor') or '',
+            row.get('invoice_number') or '',
+            row.get('notes') or ''
+        ]
+        return hashlib.sha256('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _existing_hashes(hashes):
+        """Which of ``hashes`` are already in the ledger (one indexed IN query)"""
+        if not hashes:
+            return set()
+        return {value for (value,) in db.session.query(BusinessTransaction.content_hash).filter(
+            BusinessTransaction.content_hash.in_(list(hashes))
+        ).all()}
+
+    @staticmethod
+    def _transaction_record(transaction_date, transaction_type, amount, category, description,
+                            sub_category='', account_name='Business Checking', notes='', vendor=None,
+                            invoice_number=None):
+        record = {
+            'date': transaction_date,
+            'transaction_type': transaction_type,
+            'amount': round(float(amount), 2),
+            'category': category,
+            'sub_category': sub_category,
+            'description': description,
+            'account_name': account_name,
+            'vendor': vendor,
+            'invoice_number': invoice_number,
+            'notes': notes
+        }
+        record['content_hash'] = ImportService.transaction_hash(record)
+        return record
+
+    @staticmethod
+    def _insert_transactions(records):
+        """executemany insert plus the matching rollup deltas"""
+        if records:
+            db.session.execute(insert(BusinessTransaction), records)
+            apply_rollup_for_transactions(db.session.connection(), records)
+        return len(records)
+
+    # ------------------------------------------------------------------
+    # Writers - one chunk each, inside the caller's transaction
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _write_transactions(rows):
+        records = []
+        seen = set()
+        for row in rows:
+            record = ImportService._transaction_record(
+                datetime.strptime(row['date'], '%Y-%m-%d').date(),
+                row['transaction_type'],
+                row['amount'],
+                sanitize_input(row['category'], 50),
+                sanitize_input(row['description'], 200),
+                sub_category=sanitize_input(row.get('sub_category') or '', 50),
+                account_name=sanitize_input(row['account_name'], 100),
+                notes=sanitize_input(row.get('notes') or '', 1000),
+                vendor=sanitize_input(row.get('vendor'), 100) or None,
+                invoice_number=sanitize_input(row.get('invoice_number'), 50) or None
+            )
+            if record['content_hash'] in seen:
+                continue
+            seen.add(record['content_hash'])
+            records.append(record)
+
+        existing = ImportService._existing_hashes(seen)
+        new_records = [record for record in records if record['content_hash'] not in existing]
+        inserted = ImportService._insert_transactions(new_records)
+        if inserted:
+            emit('transaction.imported', count=inserted, kind='transactions')
+
+        return {'inserted': inserted, 'duplicates': len(rows) - inserted, 'transactions': inserted}
+
+    @staticmethod
+    def _write_inventory(rows):
+        # Skip SKUs already in the catalog (or repeated within the chunk)
+        provided = [row['sku'] for row in rows if row.get('sku')]
+        taken = {sku for (sku,) in db.session.query(BusinessInventory.sku).filter(
+            BusinessInventory.sku.in_(provided)
+        ).all()} if provided else set()
+
+        new_rows = []
+        for row in rows:
+            if row.get('sku'):
+                if row['sku'] in taken:
+                    continue
+                taken.add(row['sku'])
+            new_rows.append(row)
+
+        generated = iter(InventoryService.generate_skus(
+            sum(1 for row in new_rows if not row.get('sku')), exclude=taken
+        ))
+
+        items = []
+        transactions = []
+        purchases = []
+        today = date.today()
+        for row in new_rows:
+            selling_price = float(row['selling_price'])
+            item = {
+                'sku': row.get('sku') or next(generated),
+                'name': sanitize_input(row['name'], 100),
+                'description': sanitize_input(row.get('description') or '', 500),
+                'category': sanitize_input(row['category'], 50),
+                'cost_of_item': float(row['cost_of_item']),
+                'selling_price': selling_price,
+                'w_tax_price': float(row['w_tax_price']) if row.get('w_tax_price') else selling_price * 1.083,
+                'listing_status': row.get('listing_status') or 'inventory',
+                'location': sanitize_input(row.get('location') or '', 100),
+                'size': sanitize_input(row.get('size') or '', 20),
+                'condition': sanitize_input(row.get('condition') or '', 20),
+                'brand': sanitize_input(row.get('brand') or '', 100),
+                'drop_field': sanitize_input(row.get('drop_field') or '', 255)
+            }
+            items.append(item)
+
+            if item['cost_of_item'] > 0:
+                purchase_date = datetime.strptime(row['date_added'], '%Y-%m-%d').date() if row.get('date_added') else today
+                record = ImportService._transaction_record(
+                    purchase_date, 'Expense', item['cost_of_item'], 'Inventory Purchase',
+                    f"Inventory Purchase - {item['name']}", notes=f"SKU: {item['sku']}"
+                )
+                transactions.append(record)
+                purchases.append((record, item['sku']))
+
+        if items:
+            inserted = db.session.execute(
+                insert(BusinessInventory).returning(BusinessInventory.id, BusinessInventory.sku),
+                items
+            ).all()
+            item_ids = {sku: item_id for item_id, sku in inserted}
+            for record, sku in purchases:
+                record['source_type'] = 'inventory_purchase'
+                record['source_id'] = item_ids[sku]
+            emit('inventory.imported', ids=list(item_ids.values()), skus=list(item_ids))
+        created = ImportService._insert_transactions(transactions)
+        if created:
+            emit('transaction.imported', count=created, kind='inventory')
+
+        return {'inserted': len(items), 'duplicates': len(rows) - len(items), 'transactions': created}
+
+    @staticmethod
+    def _write_sold(rows):
+        sales = []
+        for row in rows:
+            sold_date = datetime.strptime(row['sold_date'], '%Y-%m-%d').date()
+            name = sanitize_input(row['name'], 100)
+            platform = sanitize_input(row['platform'], 50)
+            cost = float(row['cost_of_item'])
+            sold_price = float(row['sold_price'])
+
+            # COGS expense + sale income, as the migration notebook booked them
+            transactions = []
+            if cost > 0:
+                transactions.append(ImportService._transaction_record(
+                    sold_date, 'Expense', cost, 'Cost of Goods Sold', f"Cost of Goods Sold - {name}",
+                    sub_category='Sold Inventory', notes=f"SKU: {row['sku']}, Platform: {platform}, COGS for sold item"
+                ))
+            if sold_price > 0:
+                transactions.append(ImportService._transaction_record(
+                    sold_date, 'Income', sold_price, 'Sales Revenue', f"Sale - {name}",
+                    sub_category='Product Sales', notes=f"SKU: {row['sku']}, Platform: {platform}"
+                ))
+
+            sales.append(({
+                'sku': sanitize_input(row['sku'], 50),
+                'name': name,
+                'description': sanitize_input(row.get('description') or name, 500),
+                'category': sanitize_input(row['category'], 50),
+                'cost_of_item': cost,
+                'selling_price': float(row['selling_price']) if row.get('selling_price') else None,
+                'sold_price': sold_price,
+                'w_tax_price': float(row['w_tax_price']) if row.get('w_tax_price') else None,
+                'sold_date': sold_date,
+                'platform': platform,
+                'location': sanitize_input(row.get('location') or '', 100),
+                'size': sanitize_input(row.get('size') or '', 20),
+                'condition': sanitize_input(row.get('condition') or '', 20),
+                'brand': sanitize_input(row.get('brand') or '', 100),
+                'drop_field': sanitize_input(row.get('drop_field') or '', 255)
+            }, transactions))
+
+        # A sale whose ledger entries are already present was imported before
+        existing = ImportService._existing_hashes(
+            {record['content_hash'] for _, transactions in sales for record in transactions}
+        )
+        seen = set()
+        sold_rows = []
+        transactions = []
+        for sold_row, sale_transactions in sales:
+            hashes = {record['content_hash'] for record in sale_transactions}
+            if hashes & existing or hashes & seen:
+                continue
+            seen |= hashes
+            sold_rows.append(sold_row)
+            transactions.extend(sale_transactions)
+
+        if sold_rows:
+            db.session.execute(insert(BusinessSold), sold_rows)
+        created = ImportService._insert_transactions(transactions)
+        if created:
+            emit('transaction.imported', count=created, kind='sold')
+
+        return {'inserted': len(sold_rows), 'duplicates': len(rows) - len(sold_rows), 'transactions': created}
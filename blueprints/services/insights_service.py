@@ -3,8 +3,10 @@ Business Insights Service - AI-Powered Analytics Engine
 Orchestrates AI calculations and provides comprehensive business intelligence
 """
 
+import copy
 import logging
 from datetime import datetime, date, timedelta
+from functools import partial
 from blueprints.utils.ai_calculations import (
     BusinessIntelligence, 
     InventoryIntelligence, 
@@ -12,14 +14,115 @@ from blueprints.utils.ai_calculations import (
     ProfitOptimization, 
     TrendAnalysis
 )
-from models import db, BusinessInventory, BusinessTransaction
-from sqlalchemy import func, extract, and_
+from models import db, BusinessTransaction
+from sqlalchemy import func
+from blueprints.utils.periods import period_filters, month_range
+from blueprints.utils.analytics_core import get_inventory_frame, cents
+from blueprints.utils.insights_cache import get_insights_cache
+from blueprints.utils.task_pool import run_tasks, TaskTimeout
 
 logger = logging.getLogger(__name__)
 
 class InsightsService:
     """Central service for all AI-powered business insights"""
     
+    # Cacheable sections, each computed by get_<section>()
+    SECTIONS = ('business_overview', 'inventory_insights', 'sales_analytics', 'profit_optimization', 'trend_analysis')
+    
+    # What a section holds when it cannot be computed, besides success/error
+    FALLBACKS = {
+        'business_overview': {
+            'health_score': {'overall_score': 0, 'status': 'Error'},
+            'key_metrics': {},
+            'quick_insights': []
+        },
+        'inventory_insights': {
+            'slow_moving_items': [],
+            'inventory_distribution': {},
+            'recommendations': []
+        },
+        'sales_analytics': {
+            'category_performance': [],
+            'price_range_analysis': [],
+            'sales_trends': {},
+            'top_performers': {}
+        },
+        'profit_optimization': {
+            'pricing_recommendations': [],
+            'margin_analysis': {},
+            'cost_optimization': []
+        },
+        'trend_analysis': {
+            'seasonal_trends': [],
+            'brand_trends': [],
+            'market_predictions': []
+        }
+    }
+    
+    MAX_PRICING_RECOMMENDATIONS = 100
+    
+    @staticmethod
+    def fallback_section(section, error=None):
+        """A section's payload when it cannot be computed; ``error`` defaults to 'Failed to generate <section>'"""
+        payload = {'success': False, 'error': error or f"Failed to generate {section.replace('_', ' ')}"}
+        payload.update(copy.deepcopy(InsightsService.FALLBACKS[section]))
+        return payload
+    
+    @staticmethod
+    def compute_section(section):
+        """Compute one section from the database (bypasses the cache)"""
+        if section not in InsightsService.SECTIONS:
+            raise ValueError(f'Unknown insights section: {section}')
+        return getattr(InsightsService, f'get_{section}')()
+    
+    @staticmethod
+    def get_section(section):
+        """One section's payload from the insights cache, or computed now when caching is off"""
+        cache = get_insights_cache()
+        if cache is None:
+            return InsightsService.compute_section(section)
+        return cache.get(section)
+    
+    @staticmethod
+    def get_sections(sections=SECTIONS):
+        """``{section: payload}`` for several sections, computed concurrently on the task pool
+        
+        A section that fails or times out gets its fallback payload and the
+        others are unaffected.
+        """
+        def fallback(section, error):
+            if isinstance(error, TaskTimeout):
+                return InsightsService.fallback_section(section, f"Timed out generating {section.replace('_', ' ')}")
+            return InsightsService.fallback_section(section)
+        
+        return run_tasks({section: partial(InsightsService.get_section, section) for section in sections}, fallback)
+    
+    @staticmethod
+    def get_pricing_recommendations(limit=10, min_confidence=0):
+        """Top ``limit`` pricing recommendations with confidence >= ``min_confidence``
+        
+        Served from the profit optimization section when it already holds
+        them (default confidence, ``limit`` within its top 15); computed
+        with those parameters otherwise.
+        """
+        limit = max(1, min(limit, InsightsService.MAX_PRICING_RECOMMENDATIONS))
+        min_confidence = max(0, min(min_confidence, 100))
+        
+        if min_confidence == 0 and limit <= ProfitOptimization.DEFAULT_RECOMMENDATIONS:
+            profit_data = InsightsService.get_section('profit_optimization')
+            if not profit_data['success']:
+                return {'success': False, 'error': profit_data.get('error')}
+            recommendations = profit_data.get('pricing_recommendations', [])[:limit]
+        else:
+            recommendations = ProfitOptimization.get_pricing_recommendations(limit, min_confidence)
+        
+        return {
+            'success': True,
+            'recommendations': recommendations,
+            'limit': limit,
+            'min_confidence': min_confidence
+        }
+    
     @staticmethod
     def get_business_overview():
         """Get comprehensive business overview with AI insights"""
@@ -45,13 +148,7 @@ class InsightsService:
             
         except Exception as e:
             logger.error(f"Error generating business overview: {e}")
-            return {
-                'success': False,
-                'error': 'Failed to generate business overview',
-                'health_score': {'overall_score': 0, 'status': 'Error'},
-                'key_metrics': {},
-                'quick_insights': []
-            }
+            return InsightsService.fallback_section('business_overview')
     
     @staticmethod
     def get_inventory_insights():
@@ -82,13 +179,7 @@ class InsightsService:
             
         except Exception as e:
             logger.error(f"Error generating inventory insights: {e}")
-            return {
-                'success': False,
-                'error': 'Failed to generate inventory insights',
-                'slow_moving_items': [],
-                'inventory_distribution': {},
-                'recommendations': []
-            }
+            return InsightsService.fallback_section('inventory_insights')
     
     @staticmethod
     def get_sales_analytics():
@@ -119,14 +210,7 @@ class InsightsService:
             
         except Exception as e:
             logger.error(f"Error generating sales analytics: {e}")
-            return {
-                'success': False,
-                'error': 'Failed to generate sales analytics',
-                'category_performance': [],
-                'price_range_analysis': [],
-                'sales_trends': {},
-                'top_performers': {}
-            }
+            return InsightsService.fallback_section('sales_analytics')
     
     @staticmethod
     def get_profit_optimization():
@@ -153,13 +237,7 @@ class InsightsService:
             
         except Exception as e:
             logger.error(f"Error generating profit optimization: {e}")
-            return {
-                'success': False,
-                'error': 'Failed to generate profit optimization',
-                'pricing_recommendations': [],
-                'margin_analysis': {},
-                'cost_optimization': []
-            }
+            return InsightsService.fallback_section('profit_optimization')
     
     @staticmethod
     def get_trend_analysis():
@@ -186,13 +264,7 @@ class InsightsService:
             
         except Exception as e:
             logger.error(f"Error generating trend analysis: {e}")
-            return {
-                'success': False,
-                'error': 'Failed to generate trend analysis',
-                'seasonal_trends': [],
-                'brand_trends': [],
-                'market_predictions': []
-            }
+            return InsightsService.fallback_section('trend_analysis')
     
     # Helper methods for detailed analysis
     
@@ -202,43 +274,31 @@ class InsightsService:
         try:
             current_month = datetime.now().month
             current_year = datetime.now().year
+            frame = get_inventory_frame()
             
             # Total inventory value
-            inventory_value = db.session.query(func.sum(BusinessInventory.cost_of_item)).filter(
-                BusinessInventory.listing_status != 'sold'
-            ).scalar() or 0
+            inventory_value = cents(frame.sum('cost', frame.is_not('status', 'sold'))) or 0
             
             # Monthly revenue
             monthly_revenue = db.session.query(func.sum(BusinessTransaction.amount)).filter(
-                and_(
-                    BusinessTransaction.transaction_type == 'Income',
-                    extract('year', BusinessTransaction.date) == current_year,
-                    extract('month', BusinessTransaction.date) == current_month
-                )
+                BusinessTransaction.transaction_type == 'Income',
+                *period_filters(BusinessTransaction.date, current_year, current_month)
             ).scalar() or 0
             
             # Monthly expenses
             monthly_expenses = db.session.query(func.sum(BusinessTransaction.amount)).filter(
-                and_(
-                    BusinessTransaction.transaction_type == 'Expense',
-                    extract('year', BusinessTransaction.date) == current_year,
-                    extract('month', BusinessTransaction.date) == current_month
-                )
+                BusinessTransaction.transaction_type == 'Expense',
+                *period_filters(BusinessTransaction.date, current_year, current_month)
             ).scalar() or 0
             
             # Active listings
-            active_listings = BusinessInventory.query.filter(
-                BusinessInventory.listing_status.in_(['inventory', 'listed'])
-            ).count()
+            active_listings = frame.count(frame.is_('status', 'inventory', 'listed'))
             
             # Items sold this month
-            items_sold_month = BusinessInventory.query.filter(
-                and_(
-                    BusinessInventory.listing_status == 'sold',
-                    extract('year', BusinessInventory.sold_date) == current_year,
-                    extract('month', BusinessInventory.sold_date) == current_month
-                )
-            ).count()
+            items_sold_month = frame.count(frame.all_of(
+                frame.is_('status', 'sold'),
+                frame.sold_between(*month_range(current_year, current_month))
+            ))
             
             return {
                 'inventory_value': round(float(inventory_value), 2),
@@ -259,9 +319,10 @@ class InsightsService:
         """Generate quick actionable insights"""
         try:
             insights = []
+            frame = get_inventory_frame()
             
             # Check inventory levels
-            total_items = BusinessInventory.query.filter(BusinessInventory.listing_status != 'sold').count()
+            total_items = frame.count(frame.is_not('status', 'sold'))
             if total_items > 100:
                 insights.append({
                     'type': 'warning',
@@ -272,12 +333,8 @@ class InsightsService:
             
             # Check recent sales velocity
             thirty_days_ago = date.today() - timedelta(days=30)
-            recent_sales = BusinessInventory.query.filter(
-                and_(
-                    BusinessInventory.listing_status == 'sold',
-                    BusinessInventory.sold_date >= thirty_days_ago
-                )
-            ).count()
+            sold_recently = frame.all_of(frame.is_('status', 'sold'), frame.sold_since(thirty_days_ago))
+            recent_sales = frame.count(sold_recently)
             
             if recent_sales < 5:
                 insights.append({
@@ -295,20 +352,12 @@ class InsightsService:
                 })
             
             # Check profit margins
-            recent_sold = db.session.query(BusinessInventory).filter(
-                and_(
-                    BusinessInventory.listing_status == 'sold',
-                    BusinessInventory.sold_date >= thirty_days_ago,
-                    BusinessInventory.cost_of_item.isnot(None),
-                    BusinessInventory.sold_price.isnot(None)
-                )
-            ).all()
-            
-            if recent_sold:
-                avg_margin = sum([
-                    ((item.sold_price - item.cost_of_item) / item.cost_of_item * 100)
-                    for item in recent_sold if item.cost_of_item > 0
-                ]) / len(recent_sold)
+            recent_sold = frame.all_of(sold_recently, frame.has('cost'), frame.has('sold'))
+            recent_sold_count = frame.count(recent_sold)
+            
+            if recent_sold_count:
+                # Items without a cost count towards the average as zero margin
+                avg_margin = (frame.sum(frame.margin_percent(), recent_sold) or 0) / recent_sold_count
                 
                 if avg_margin < 25:
                     insights.append({
@@ -328,34 +377,26 @@ class InsightsService:
     def _analyze_inventory_distribution():
         """Analyze current inventory distribution"""
         try:
+            frame = get_inventory_frame()
+            in_stock = frame.is_not('status', 'sold')
+            
             # By category
-            category_dist = db.session.query(
-                BusinessInventory.category,
-                func.count(BusinessInventory.id).label('count'),
-                func.sum(BusinessInventory.cost_of_item).label('value')
-            ).filter(
-                BusinessInventory.listing_status != 'sold'
-            ).group_by(BusinessInventory.category).all()
+            category_dist = frame.group_by('category', in_stock, 'cost')
             
             # By condition
-            condition_dist = db.session.query(
-                BusinessInventory.condition,
-                func.count(BusinessInventory.id).label('count')
-            ).filter(
-                BusinessInventory.listing_status != 'sold'
-            ).group_by(BusinessInventory.condition).all()
+            condition_dist = frame.group_by('condition', in_stock)
             
             return {
                 'by_category': [
                     {
-                        'category': cat.category,
+                        'category': cat.key,
                         'count': cat.count,
-                        'value': round(float(cat.value or 0), 2)
+                        'value': round(float(cents(cat.total) or 0), 2)
                     } for cat in category_dist
                 ],
                 'by_condition': [
                     {
-                        'condition': cond.condition,
+                        'condition': cond.key,
                         'count': cond.count
                     } for cond in condition_dist
                 ]
@@ -369,9 +410,10 @@ class InsightsService:
     def _analyze_stock_performance():
         """Analyze stock performance metrics"""
         try:
-            total_inventory = BusinessInventory.query.filter(BusinessInventory.listing_status != 'sold').count()
-            listed_items = BusinessInventory.query.filter(BusinessInventory.listing_status == 'listed').count()
-            inventory_items = BusinessInventory.query.filter(BusinessInventory.listing_status == 'inventory').count()
+            frame = get_inventory_frame()
+            total_inventory = frame.count(frame.is_not('status', 'sold'))
+            listed_items = frame.count(frame.is_('status', 'listed'))
+            inventory_items = frame.count(frame.is_('status', 'inventory'))
             
             return {
                 'total_items': total_inventory,
@@ -425,28 +467,21 @@ class InsightsService:
         try:
             # Last 6 months sales
             six_months_ago = date.today() - timedelta(days=180)
-            monthly_sales = db.session.query(
-                extract('month', BusinessInventory.sold_date).label('month'),
-                extract('year', BusinessInventory.sold_date).label('year'),
-                func.count(BusinessInventory.id).label('count'),
-                func.sum(BusinessInventory.sold_price).label('revenue')
-            ).filter(
-                and_(
-                    BusinessInventory.listing_status == 'sold',
-                    BusinessInventory.sold_date >= six_months_ago
-                )
-            ).group_by(
-                extract('year', BusinessInventory.sold_date),
-                extract('month', BusinessInventory.sold_date)
-            ).all()
+            frame = get_inventory_frame()
+            monthly_sales = frame.group_by(
+                ('sold_year', 'sold_month'),
+                frame.all_of(frame.is_('status', 'sold'), frame.sold_since(six_months_ago)),
+                'sold'
+            )
             
             trends = []
             for sale in monthly_sales:
+                year, month = sale.key
                 trends.append({
-                    'month': int(sale.month),
-                    'year': int(sale.year),
+                    'month': month,
+                    'year': year,
                     'items_sold': sale.count,
-                    'revenue': round(float(sale.revenue or 0), 2)
+                    'revenue': round(float(cents(sale.total) or 0), 2)
                 })
             
             return {
@@ -478,24 +513,18 @@ class InsightsService:
     def _identify_top_performers():
         """Identify top performing items and categories"""
         try:
-            # Top brands by revenue
-            top_brands = db.session.query(
-                BusinessInventory.brand,
-                func.sum(BusinessInventory.sold_price).label('revenue'),
-                func.count(BusinessInventory.id).label('items_sold')
-            ).filter(
-                BusinessInventory.listing_status == 'sold'
-            ).group_by(BusinessInventory.brand).order_by(
-                func.sum(BusinessInventory.sold_price).desc()
-            ).limit(5).all()
+            # Top brands by revenue (brands without sales revenue last, as SQL sorts NULL)
+            frame = get_inventory_frame()
+            brands = frame.group_by('brand', frame.is_('status', 'sold'), 'sold')
+            top_brands = sorted(brands, key=lambda brand: (brand.total is None, -(brand.total or 0)))[:5]
             
             return {
                 'top_brands': [
                     {
-                        'brand': brand.brand,
-                        'revenue': round(float(brand.revenue or 0), 2),
-                        'items_sold': brand.items_sold
-                    } for brand in top_brands if brand.brand
+                        'brand': brand.key,
+                        'revenue': round(float(cents(brand.total) or 0), 2),
+                        'items_sold': brand.count
+                    } for brand in top_brands if brand.key
                 ]
             }
             
@@ -525,21 +554,18 @@ class InsightsService:
         """Analyze profit margins across different segments"""
         try:
             # By category
-            category_margins = db.session.query(
-                BusinessInventory.category,
-                func.avg((BusinessInventory.sold_price - BusinessInventory.cost_of_item) / BusinessInventory.cost_of_item * 100).label('avg_margin')
-            ).filter(
-                and_(
-                    BusinessInventory.listing_status == 'sold',
-                    BusinessInventory.cost_of_item > 0
-                )
-            ).group_by(BusinessInventory.category).all()
+            frame = get_inventory_frame()
+            category_margins = frame.group_by(
+                'category',
+                frame.all_of(frame.is_('status', 'sold'), frame.compare('cost', '>', 0)),
+                frame.margin_percent(cost='cost', price='sold')
+            )
             
             return {
                 'by_category': [
                     {
-                        'category': cat.category,
-                        'avg_margin': round(float(cat.avg_margin or 0), 1)
+                        'category': cat.key,
+                        'avg_margin': round(float(cat.avg or 0), 1)
                     } for cat in category_margins
                 ]
             }
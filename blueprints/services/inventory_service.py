@@ -4,10 +4,15 @@ Business logic for inventory management - COMPLETE IMPLEMENTATION
 
 import logging
 from datetime import datetime, date
-from sqlalchemy import func
-from models import db, BusinessInventory, BusinessTransaction
+from sqlalchemy import func, insert, update, select, literal, or_, Numeric
+from models import db, BusinessInventory, BusinessTransaction, apply_rollup_for_transactions
 from blueprints.services.transaction_service import TransactionService
-from blueprints.utils.validators import validate_inventory_data, sanitize_input
+from blueprints.utils.validators import validate_inventory_data, validate_currency_amount, sanitize_input
+from blueprints.utils.search import apply_inventory_search, inventory_search_condition
+from blueprints.utils.database import transaction_scope, write_transaction
+from blueprints.utils.serializers import inventory_projection
+from blueprints.utils.events import emit
+from blueprints.utils.comparables import get_comparables_index
 import random
 import string
 from sqlalchemy.exc import IntegrityError
@@ -18,6 +23,7 @@ class InventoryService:
     """Service class for inventory business logic"""
 
     @staticmethod
+    @write_transaction()
     def create_inventory_item(data):
         """Create a new inventory item with automatic expense transaction"""
         try:
@@ -54,55 +60,220 @@ class InventoryService:
             if inventory_item.selling_price:
                 inventory_item.w_tax_price = float(inventory_item.selling_price) * 1.083
             
-            db.session.add(inventory_item)
-            db.session.flush()  # Get the ID
-            
-            # Create automatic expense transaction
-            transaction_data = {
-                'transaction_type': 'Expense',
-                'description': f'Inventory Purchase - {inventory_item.name}',
-                'amount': float(inventory_item.cost_of_item),
-                'category': 'Inventory Purchase',
-                'account_name': 'Business Checking',
-                'date': datetime.now().strftime('%Y-%m-%d')
-            }
+            with transaction_scope() as unit:
+                db.session.add(inventory_item)
+                db.session.flush()  # Get the ID
+                
+                # Create automatic expense transaction
+                transaction_data = {
+                    'transaction_type': 'Expense',
+                    'description': f'Inventory Purchase - {inventory_item.name}',
+                    'amount': float(inventory_item.cost_of_item),
+                    'category': 'Inventory Purchase',
+                    'account_name': 'Business Checking',
+                    'date': datetime.now().strftime('%Y-%m-%d')
+                }
+                
+                transaction_result = TransactionService.create_automatic_transaction(
+                    'inventory_purchase', inventory_item.id, transaction_data
+                )
+                if not transaction_result['success']:
+                    unit.rollback()
+                    return {'success': False, 'error': f'Failed to create expense transaction: {transaction_result["error"]}'}
+                
+                emit('inventory.created', ids=[inventory_item.id], skus=[inventory_item.sku])
+                return {
+                    'success': True,
+                    'message': 'Inventory item created successfully',
+                    'item': inventory_item.to_dict(),
+                    'transaction_id': transaction_result['transaction']['id']
+                }
             
-            transaction_result = TransactionService.create_transaction(transaction_data)
-            if not transaction_result['success']:
-                db.session.rollback()
-                return {'success': False, 'error': f'Failed to create expense transaction: {transaction_result["error"]}'}
+        except IntegrityError as e:
+            if 'UNIQUE constraint failed: business_inventory.sku' in str(e):
+                return {'success': False, 'error': 'SKU already exists'}
+            return {'success': False, 'error': 'Database integrity error'}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    @staticmethod
+    @write_transaction()
+    def create_inventory_items_bulk(items_data, max_items=500):
+        """Create a whole drop of inventory items in one unit of work
+        
+        Every row is validated before anything is written; if any row fails,
+        nothing is inserted and the per-row errors are returned. Otherwise SKUs
+        are allocated in one pass, items and their purchase expense
+        transactions are inserted with executemany, and everything commits
+        once. ``results`` holds one entry per input row, in input order.
+        """
+        try:
+            if not isinstance(items_data, list) or not items_data:
+                return {'success': False, 'error': 'items must be a non-empty list'}
+            if len(items_data) > max_items:
+                return {'success': False, 'error': f'A batch can contain at most {max_items} items'}
+            
+            # Validate the whole batch up front
+            results = []
+            provided_skus = {}
+            for index, data in enumerate(items_data):
+                if not isinstance(data, dict):
+                    results.append({'index': index, 'success': False, 'error': 'Item must be an object'})
+                    continue
+                validation_result = validate_inventory_data(data)
+                if not validation_result['valid']:
+                    results.append({'index': index, 'success': False, 'error': validation_result['error']})
+                    continue
+                if data.get('sku'):
+                    if data['sku'] in provided_skus:
+                        results.append({'index': index, 'success': False, 'error': 'Duplicate SKU in batch'})
+                        continue
+                    provided_skus[data['sku']] = index
+                results.append({'index': index, 'success': True})
+            
+            # One query for all caller-provided SKUs that already exist
+            if provided_skus:
+                taken = db.session.query(BusinessInventory.sku).filter(
+                    BusinessInventory.sku.in_(list(provided_skus))
+                ).all()
+                for (sku,) in taken:
+                    results[provided_skus[sku]] = {'index': provided_skus[sku], 'success': False, 'error': 'SKU already exists'}
+            
+            failed = [result for result in results if not result['success']]
+            if failed:
+                return {
+                    'success': False,
+                    'error': f'{len(failed)} of {len(items_data)} items failed validation; nothing was created',
+                    'results': results
+                }
             
-            db.session.commit()
+            # Allocate SKUs for rows without one
+            generated_skus = iter(InventoryService.generate_skus(
+                sum(1 for data in items_data if not data.get('sku')),
+                exclude=set(provided_skus)
+            ))
+            
+            item_rows = []
+            for data in items_data:
+                selling_price = float(data['selling_price'])
+                item_rows.append({
+                    'sku': data.get('sku') or next(generated_skus),
+                    'name': sanitize_input(data['name'], 100),
+                    'description': sanitize_input(data.get('description', ''), 500),
+                    'category': sanitize_input(data['category'], 50),
+                    'cost_of_item': float(data['cost_of_item']),
+                    'selling_price': selling_price,
+                    'w_tax_price': selling_price * 1.083 if selling_price else None,  # 8.3% tax, as for single items
+                    'listing_status': data.get('listing_status', 'inventory'),
+                    'location': sanitize_input(data.get('location', ''), 100),
+                    'size': sanitize_input(data.get('size', ''), 20),
+                    'condition': sanitize_input(data.get('condition', ''), 20),
+                    'brand': sanitize_input(data.get('brand', ''), 100),
+                    'drop_field': sanitize_input(data.get('drop_field', ''), 255)
+                })
             
-            return {
-                'success': True,
-                'message': 'Inventory item created successfully',
-                'item': inventory_item.to_dict(),
-                'transaction_id': transaction_result['transaction']['id']
-            }
+            with transaction_scope():
+                inserted_items = db.session.execute(
+                    insert(BusinessInventory).returning(
+                        BusinessInventory.id, BusinessInventory.sku, sort_by_parameter_order=True
+                    ),
+                    item_rows
+                ).all()
+                
+                # Matching purchase expenses, one per item
+                today = date.today()
+                transaction_rows = [{
+                    'transaction_type': 'Expense',
+                    'description': f'Inventory Purchase - {row["name"]}',
+                    'amount': row['cost_of_item'],
+                    'category': 'Inventory Purchase',
+                    'sub_category': '',
+                    'account_name': 'Business Checking',
+                    'notes': '',
+                    'date': today,
+                    'source_type': 'inventory_purchase',
+                    'source_id': item.id
+                } for row, item in zip(item_rows, inserted_items)]
+                
+                inserted_transactions = db.session.execute(
+                    insert(BusinessTransaction).returning(BusinessTransaction.id, sort_by_parameter_order=True),
+                    transaction_rows
+                ).all()
+                
+                # Bulk inserts skip the per-object rollup events
+                apply_rollup_for_transactions(db.session.connection(), transaction_rows)
+                
+                emit('inventory.created', ids=[item.id for item in inserted_items],
+                     skus=[item.sku for item in inserted_items])
+                emit('transaction.created', ids=[transaction.id for transaction in inserted_transactions],
+                     source_type='inventory_purchase')
+                
+                results = [{
+                    'index': index,
+                    'success': True,
+                    'id': item.id,
+                    'sku': item.sku,
+                    'name': row['name'],
+                    'transaction_id': transaction.id
+                } for index, (row, item, transaction) in enumerate(zip(item_rows, inserted_items, inserted_transactions))]
+                
+                return {
+                    'success': True,
+                    'message': f'Created {len(results)} inventory items',
+                    'created': len(results),
+                    'results': results
+                }
             
         except IntegrityError as e:
-            db.session.rollback()
             if 'UNIQUE constraint failed: business_inventory.sku' in str(e):
                 return {'success': False, 'error': 'SKU already exists'}
             return {'success': False, 'error': 'Database integrity error'}
         except Exception as e:
-            db.session.rollback()
+            print(f"❌ Error creating inventory items in bulk: {e}")
             return {'success': False, 'error': str(e)}
 
     @staticmethod
     def get_all_inventory():
         """Get all active inventory items"""
         try:
-            items = BusinessInventory.query.filter_by().order_by(BusinessInventory.id.desc()).all()
-            return [item.to_dict() for item in items]
+            query = inventory_projection.apply(BusinessInventory.query)
+            return inventory_projection.to_dicts(query.order_by(BusinessInventory.id.desc()).all())
         except Exception as e:
             print(f"❌ Error getting all inventory: {e}")
             return []
 
     @staticmethod
+    def find_purchase_transaction(item, cost=None):
+        """Purchase expense transaction booked for ``item``
+        
+        Uses the indexed source link. Items created before transactions were
+        linked fall back to matching the description (and ``cost``, when
+        given); a row found that way is linked to the item so later edits take
+        the indexed path.
+        """
+        transaction = TransactionService.find_source_transaction('inventory_purchase', item.id)
+        if transaction:
+            return transaction
+        
+        legacy_query = BusinessTransaction.query.filter(
+            BusinessTransaction.source_type.is_(None),
+            BusinessTransaction.description.like(f'%{item.name}%'),
+            BusinessTransaction.description.like('%Inventory Purchase%'),
+            BusinessTransaction.transaction_type == 'Expense'
+        )
+        if cost is not None:
+            legacy_query = legacy_query.filter(BusinessTransaction.amount == cost)
+        transaction = legacy_query.first()
+        
+        if transaction:
+            transaction.source_type = 'inventory_purchase'
+            transaction.source_id = item.id
+        return transaction
+
+    @staticmethod
+    @write_transaction()
     def update_inventory_item(sku, data):
-        """Update existing inventory item and handle financial transaction updates"""
+        """Update existing inventory item WITHOUT creating new transaction"""
         try:
             item = BusinessInventory.query.filter_by(sku=sku).first()
             if not item:
@@ -117,212 +288,299 @@ class InventoryService:
             if not validation_result['valid']:
                 return {'success': False, 'error': validation_result['error']}
             
-            # Store original cost for transaction update
-            original_cost = float(item.cost_of_item)
-            new_cost = float(data['cost_of_item'])
-            
-            # Update fields
-            item.name = data['name']
-            item.description = data.get('description', '')
-            item.category = data['category']
-            item.cost_of_item = new_cost
-            item.selling_price = float(data['selling_price'])
-            item.listing_status = data.get('listing_status', 'inventory')
-            item.location = data.get('location', '')
-            item.size = data.get('size', '')
-            item.condition = data.get('condition', '')
-            item.brand = data.get('brand', '')
-            item.drop_field = data.get('drop_field', '')
-            
-            # Recalculate w_tax_price
-            if item.selling_price:
-                item.w_tax_price = float(item.selling_price) * 1.083
-            
-            # Handle transaction update if cost changed
-            if original_cost != new_cost:
-                # Find the original expense transaction for this item
-                original_transaction = BusinessTransaction.query.filter(
-                    BusinessTransaction.description.like(f'%{item.name}%'),
-                    BusinessTransaction.transaction_type == 'Expense',
-                    BusinessTransaction.category == 'Inventory Purchase'
-                ).first()
+            with transaction_scope():
+                # Store old cost for transaction update logic
+                old_cost = float(item.cost_of_item)
+                new_cost = float(data['cost_of_item'])
+                cost_changed = old_cost != new_cost
                 
-                if original_transaction:
-                    # Update existing transaction amount instead of creating new one
-                    original_transaction.amount = new_cost
-                    original_transaction.description = f'Inventory Purchase - {item.name} (Updated)'
-                else:
-                    # If no original transaction found, create adjustment transaction
-                    cost_difference = new_cost - original_cost
-                    if cost_difference != 0:
-                        transaction_type = 'Expense' if cost_difference > 0 else 'Income'
-                        transaction_data = {
-                            'transaction_type': transaction_type,
-                            'description': f'Inventory Cost Adjustment - {item.name}',
-                            'amount': abs(cost_difference),
-                            'category': 'Inventory Adjustment',
-                            'account_name': 'Business Checking',
-                            'date': datetime.now().strftime('%Y-%m-%d')
-                        }
-                        
-                        transaction_result = TransactionService.create_transaction(transaction_data)
-                        if not transaction_result['success']:
-                            db.session.rollback()
-                            return {'success': False, 'error': f'Failed to create adjustment transaction: {transaction_result["error"]}'}
-            
-            db.session.commit()
-            
-            return {
-                'success': True,
-                'message': 'Inventory item updated successfully',
-                'item': item.to_dict()
-            }
+                # Update item fields
+                item.name = data['name']
+                item.description = data.get('description', '')
+                item.category = data['category']
+                item.cost_of_item = new_cost
+                item.selling_price = float(data['selling_price'])
+                item.listing_status = data.get('listing_status', 'inventory')
+                item.location = data.get('location', '')
+                item.size = data.get('size', '')
+                item.condition = data.get('condition', '')
+                item.brand = data.get('brand', '')
+                item.drop_field = data.get('drop_field', '')
+                
+                # Recalculate w_tax_price
+                if item.selling_price:
+                    item.w_tax_price = float(item.selling_price) * 1.083
+                
+                # If cost changed, update the linked expense transaction
+                if cost_changed:
+                    # Find the original expense transaction for this item
+                    original_transaction = InventoryService.find_purchase_transaction(item, old_cost)
+                    
+                    if original_transaction:
+                        # Update the transaction amount to match new cost
+                        original_transaction.amount = new_cost
+                        original_transaction.description = f'Inventory Purchase - {item.name}'
+                        print(f"📦 Updated linked transaction {original_transaction.id} amount from ${old_cost} to ${new_cost}")
+                        emit('transaction.updated', ids=[original_transaction.id])
+                    else:
+                        print(f"⚠️ Could not find original expense transaction for item {item.name} (${old_cost})")
+                
+                emit('inventory.updated', ids=[item.id], skus=[item.sku])
+                return {
+                    'success': True,
+                    'message': 'Inventory item updated successfully',
+                    'item': item.to_dict(),
+                    'cost_updated': cost_changed
+                }
             
         except Exception as e:
-            db.session.rollback()
             return {'success': False, 'error': str(e)}
 
+    # Fields PATCH /api/inventory/batch may change, keyed by request name
+    BATCH_PATCH_FIELDS = {
+        'status': 'listing_status',
+        'listing_status': 'listing_status',
+        'location': 'location',
+        'drop_field': 'drop_field',
+        'selling_price': 'selling_price'
+    }
+    
+    # Selling goes through sell_inventory_item (sold price, date, income transaction)
+    BATCH_PATCH_STATUSES = ('inventory', 'listed', 'kept')
+    
     @staticmethod
-    def update_inventory_item(sku, data):
-        """Update existing inventory item WITHOUT creating new transaction"""
+    @write_transaction()
+    def patch_inventory_items(patch, skus=None, filters=None):
+        """Apply a whitelisted field patch to many items with one UPDATE
+        
+        Targets either an explicit ``skus`` list or ``filters`` (status,
+        condition, brand, drop, category, search - same names as the search
+        endpoint). A new ``selling_price`` also recomputes ``w_tax_price`` in
+        SQL and skips items whose cost is not below the new price. A new
+        status skips sold items, which only change through a sale. Skipped
+        SKUs are listed with their reason.
+        """
         try:
-            item = BusinessInventory.query.filter_by(sku=sku).first()
-            if not item:
-                return {'success': False, 'error': 'Item not found'}
-            
-            # Check if item can be edited (business rule: only recent items)
-            if not InventoryService.can_edit_item(item):
-                return {'success': False, 'error': 'Item is locked and cannot be edited (older than 1 month)'}
-            
-            # Validate updated data
-            validation_result = validate_inventory_data(data)
-            if not validation_result['valid']:
-                return {'success': False, 'error': validation_result['error']}
-            
-            # Store old cost for transaction update logic
-            old_cost = float(item.cost_of_item)
-            new_cost = float(data['cost_of_item'])
-            cost_changed = old_cost != new_cost
-            
-            # Update item fields
-            item.name = data['name']
-            item.description = data.get('description', '')
-            item.category = data['category']
-            item.cost_of_item = new_cost
-            item.selling_price = float(data['selling_price'])
-            item.listing_status = data.get('listing_status', 'inventory')
-            item.location = data.get('location', '')
-            item.size = data.get('size', '')
-            item.condition = data.get('condition', '')
-            item.brand = data.get('brand', '')
-            item.drop_field = data.get('drop_field', '')
-            
-            # Recalculate w_tax_price
-            if item.selling_price:
-                item.w_tax_price = float(item.selling_price) * 1.083
-            
-            # If cost changed, update the linked expense transaction
-            if cost_changed:
-                # Find the original expense transaction for this item
-                # Look for transaction with description containing the item name and "Inventory Purchase"
-                original_transaction = BusinessTransaction.query.filter(
-                    BusinessTransaction.description.like(f'%{item.name}%'),
-                    BusinessTransaction.description.like('%Inventory Purchase%'),
-                    BusinessTransaction.transaction_type == 'Expense',
-                    BusinessTransaction.amount == old_cost
-                ).first()
-                
-                if original_transaction:
-                    # Update the transaction amount to match new cost
-                    original_transaction.amount = new_cost
-                    original_transaction.description = f'Inventory Purchase - {item.name}'
-                    print(f"📦 Updated linked transaction {original_transaction.id} amount from ${old_cost} to ${new_cost}")
+            if not isinstance(patch, dict) or not patch:
+                return {'success': False, 'error': 'patch must be a non-empty object'}
+            
+            unknown = [field for field in patch if field not in InventoryService.BATCH_PATCH_FIELDS]
+            if unknown:
+                return {'success': False, 'error': f'Fields cannot be batch updated: {", ".join(unknown)}'}
+            
+            values = {}
+            for field, value in patch.items():
+                column = InventoryService.BATCH_PATCH_FIELDS[field]
+                if column == 'listing_status':
+                    if value not in InventoryService.BATCH_PATCH_STATUSES:
+                        return {'success': False, 'error': f'Status must be one of: {", ".join(InventoryService.BATCH_PATCH_STATUSES)}'}
+                    values[column] = value
+                elif column == 'selling_price':
+                    validation = validate_currency_amount(value, 'Selling price')
+                    if not validation['valid']:
+                        return {'success': False, 'error': validation['error']}
+                    values[column] = validation['value']
+                elif column == 'location':
+                    values[column] = sanitize_input(value or '', 100)
                 else:
-                    print(f"⚠️ Could not find original expense transaction for item {item.name} (${old_cost})")
-            
-            db.session.commit()
+                    values[column] = sanitize_input(value or '', 255)
+            
+            # Target rows: explicit SKUs or a filter expression, never the whole table by accident
+            conditions = []
+            if skus:
+                if not isinstance(skus, list):
+                    return {'success': False, 'error': 'skus must be a list'}
+                skus = list(dict.fromkeys(str(sku) for sku in skus))
+                conditions.append(BusinessInventory.sku.in_(skus))
+            elif filters:
+                conditions = InventoryService._inventory_filter_conditions(filters)
+                if not conditions:
+                    return {'success': False, 'error': 'filters did not contain any supported filter'}
+            else:
+                return {'success': False, 'error': 'Either skus or filters is required'}
+            
+            # Matched rows before the guards, and SKUs that do not exist
+            matched = db.session.query(
+                BusinessInventory.sku, BusinessInventory.listing_status
+            ).filter(*conditions).all()
+            matched_skus = [row.sku for row in matched]
+            not_found = sorted(set(skus) - set(matched_skus)) if skus else []
+            
+            update_conditions = list(conditions)
+            if 'listing_status' in values:
+                # Sold items keep their sold price, date and income transaction
+                update_conditions.append(
+                    or_(BusinessInventory.listing_status.is_(None), BusinessInventory.listing_status != 'sold')
+                )
+            if 'selling_price' in values:
+                price = values['selling_price']
+                update_conditions.append(BusinessInventory.cost_of_item < price)
+                values['w_tax_price'] = literal(price, Numeric(10, 2)) * 1.083
+            
+            with transaction_scope():
+                updated_rows = db.session.execute(
+                    update(BusinessInventory)
+                    .where(*update_conditions)
+                    .values(values)
+                    .returning(BusinessInventory.id, BusinessInventory.sku)
+                    .execution_options(synchronize_session=False)
+                ).all()
+                if updated_rows:
+                    emit('inventory.updated', ids=[row.id for row in updated_rows], fields=sorted(values))
+            
+            updated_skus = {row.sku for row in updated_rows}
+            skipped = [
+                {
+                    'sku': row.sku,
+                    'reason': 'Item is already sold' if 'listing_status' in values and row.listing_status == 'sold'
+                    else 'Selling price must be higher than cost per unit'
+                }
+                for row in matched if row.sku not in updated_skus
+            ]
+            updated = len(updated_rows)
             
             return {
                 'success': True,
-                'message': 'Inventory item updated successfully',
-                'item': item.to_dict(),
-                'cost_updated': cost_changed
+                'message': f'Updated {updated} of {len(matched_skus)} matching items',
+                'matched_count': len(matched_skus),
+                'updated_count': updated,
+                'skipped_count': len(skipped),
+                'skipped_reason': '; '.join(dict.fromkeys(entry['reason'] for entry in skipped)) or None,
+                'skipped': skipped,
+                'not_found': not_found
             }
             
         except Exception as e:
-            db.session.rollback()
+            print(f"❌ Error batch updating inventory: {e}")
             return {'success': False, 'error': str(e)}
+    
+    @staticmethod
+    def _inventory_filter_conditions(filters):
+        """WHERE clauses for a batch/export filter expression"""
+        conditions = []
+        if filters.get('status'):
+            conditions.append(BusinessInventory.listing_status == filters['status'])
+        if filters.get('condition'):
+            conditions.append(BusinessInventory.condition == filters['condition'])
+        if filters.get('brand'):
+            conditions.append(BusinessInventory.brand == filters['brand'])
+        if filters.get('drop'):
+            conditions.append(BusinessInventory.drop_field == filters['drop'])
+        if filters.get('category'):
+            conditions.append(BusinessInventory.category == filters['category'])
+        if filters.get('search'):
+            search_condition = inventory_search_condition(filters['search'])
+            if search_condition is not None:
+                conditions.append(search_condition)
+        return conditions
 
     @staticmethod
+    def check_sellable(sku):
+        """Reject a missing or already sold item with a plain read
+        
+        Sell views call this before :meth:`sell_inventory_item`, which waits
+        for the write lock, so most repeat sells never queue for it. The
+        compare-and-set UPDATE in the sell is still what decides.
+        """
+        status = db.session.execute(
+            select(BusinessInventory.listing_status).where(BusinessInventory.sku == sku)
+        ).first()
+        if status is None:
+            return {'success': False, 'error': 'Item not found'}
+        if status.listing_status == 'sold':
+            return {'success': False, 'error': 'Item is already sold'}
+        return {'success': True}
+
+    @staticmethod
+    @write_transaction()
     def sell_inventory_item(sku, sold_price, sale_date=None, platform='Other', notes=''):
-        """Mark inventory item as sold and create income transaction (if amount > 0)"""
+        """Mark inventory item as sold and create income transaction (if amount > 0)
+        
+        The status change is a compare-and-set - ``UPDATE ... WHERE sku = ?
+        AND listing_status != 'sold'`` - run in a ``BEGIN IMMEDIATE``
+        transaction together with the income transaction, so two concurrent
+        sells of the same item cannot both succeed or book revenue twice.
+        """
         try:
-            item = BusinessInventory.query.filter_by(sku=sku).first()
-            if not item:
-                return {'success': False, 'error': 'Item not found'}
-            
-            if item.listing_status == 'sold':
-                return {'success': False, 'error': 'Item is already sold'}
-            
-            # Update item status
-            item.listing_status = 'sold'
-            item.sold_price = float(sold_price)
-            item.sold_date = datetime.strptime(sale_date, '%Y-%m-%d').date() if sale_date else date.today()
-            
-            # NEW: Only create income transaction if sold_price > 0
-            if float(sold_price) > 0:
-                # Create income transaction
-                transaction_data = {
-                    'transaction_type': 'Income',
-                    'description': f'Sale - {item.name} (SKU: {item.sku})',
-                    'amount': float(sold_price),
-                    'category': 'Sales Revenue',
-                    'sub_category': item.category if hasattr(item, 'category') else 'Other',
-                    'account_name': 'Business Checking',
-                    'date': item.sold_date.strftime('%Y-%m-%d'),
-                    'notes': notes if notes else f'Platform: {platform}'
-                }
-                
-                transaction_result = TransactionService.create_transaction(transaction_data)
-                if not transaction_result['success']:
-                    db.session.rollback()
-                    return {'success': False, 'error': f'Failed to create income transaction: {transaction_result["error"]}'}
+            price = float(sold_price)
+            sold_date = datetime.strptime(sale_date, '%Y-%m-%d').date() if sale_date else date.today()
+            
+            with transaction_scope(immediate=True) as unit:
+                item = db.session.execute(
+                    update(BusinessInventory)
+                    .where(
+                        BusinessInventory.sku == sku,
+                        or_(BusinessInventory.listing_status.is_(None), BusinessInventory.listing_status != 'sold')
+                    )
+                    .values(listing_status='sold', sold_price=price, sold_date=sold_date)
+                    .returning(BusinessInventory)
+                ).scalars().first()
                 
-                db.session.commit()
+                if item is None:
+                    # Already sold (perhaps by a concurrent request since check_sellable) or missing
+                    unit.rollback()
+                    exists = db.session.execute(
+                        select(BusinessInventory.id).where(BusinessInventory.sku == sku)
+                    ).first()
+                    return {'success': False, 'error': 'Item is already sold' if exists else 'Item not found'}
                 
-                return {
-                    'success': True,
-                    'message': f'Item sold successfully for ${sold_price}',
-                    'item': item.to_dict(),
-                    'transaction_created': True,
-                    'transaction_id': transaction_result['transaction']['id']
-                }
-            else:
-                # For $0 sales, just mark as sold without creating transaction
-                db.session.commit()
+                emit('inventory.sold', ids=[item.id], skus=[item.sku], sold_price=price, category=item.category,
+                     brand=item.brand, condition=item.condition, size=item.size)
                 
-                return {
-                    'success': True,
-                    'message': 'Item marked as sold (no revenue transaction created for $0 sale)',
-                    'item': item.to_dict(),
-                    'transaction_created': False,
-                    'zero_sale': True
-                }
+                # NEW: Only create income transaction if sold_price > 0
+                if price > 0:
+                    # Create income transaction
+                    transaction_data = {
+                        'transaction_type': 'Income',
+                        'description': f'Sale - {item.name} (SKU: {item.sku})',
+                        'amount': price,
+                        'category': 'Sales Revenue',
+                        'sub_category': item.category if hasattr(item, 'category') else 'Other',
+                        'account_name': 'Business Checking',
+                        'date': item.sold_date.strftime('%Y-%m-%d'),
+                        'notes': notes if notes else f'Platform: {platform}'
+                    }
+                    
+                    transaction_result = TransactionService.create_automatic_transaction(
+                        'inventory_sale', item.id, transaction_data
+                    )
+                    if not transaction_result['success']:
+                        unit.rollback()
+                        return {'success': False, 'error': f'Failed to create income transaction: {transaction_result["error"]}'}
+                    
+                    return {
+                        'success': True,
+                        'message': f'Item sold successfully for ${sold_price}',
+                        'item': item.to_dict(),
+                        'transaction_created': True,
+                        'transaction_id': transaction_result['transaction']['id']
+                    }
+                else:
+                    # For $0 sales, just mark as sold without creating transaction
+                    return {
+                        'success': True,
+                        'message': 'Item marked as sold (no revenue transaction created for $0 sale)',
+                        'item': item.to_dict(),
+                        'transaction_created': False,
+                        'zero_sale': True
+                    }
                 
         except Exception as e:
-            db.session.rollback()
             print(f"❌ Error selling inventory item {sku}: {e}")
             return {'success': False, 'error': str(e)}
 
     @staticmethod
+    @write_transaction()
     def delete_inventory_item(sku):
         """Delete inventory item completely from database"""
         try:
             item = BusinessInventory.query.filter_by(sku=sku).first()
             if not item:
                 return {'success': False, 'error': 'Item not found'}
-            db.session.delete(item)
-            db.session.commit()
+            with transaction_scope():
+                TransactionService.detach_source_transactions(('inventory_purchase', 'inventory_sale'), item.id)
+                emit('inventory.deleted', ids=[item.id], skus=[item.sku])
+                db.session.delete(item)
             # Post-delete check
             remaining = BusinessInventory.query.filter_by(sku=sku).first()
             if remaining:
@@ -331,7 +589,6 @@ class InventoryService:
             print(f"✅ Post-delete check: Item with SKU {sku} successfully deleted.")
             return {'success': True, 'message': 'Item deleted successfully'}
         except Exception as e:
-            db.session.rollback()
             print(f"❌ Error deleting item {sku}: {e}")
             return {'success': False, 'error': str(e)}
 
@@ -359,23 +616,40 @@ class InventoryService:
                 query = query.filter(BusinessInventory.drop_field == filters['drop'])
             
             if filters.get('search_term'):
-                search_term = f"%{filters['search_term']}%"
-                query = query.filter(
-                    db.or_(
-                        BusinessInventory.name.ilike(search_term),
-                        BusinessInventory.description.ilike(search_term),
-                        BusinessInventory.sku.ilike(search_term),
-                        BusinessInventory.drop_field.ilike(search_term)
-                    )
-                )
+                query = apply_inventory_search(query, filters['search_term'])
             
-            items = query.order_by(BusinessInventory.id.desc()).all()
-            return [item.to_dict() for item in items]
+            items = inventory_projection.apply(query).order_by(BusinessInventory.id.desc()).all()
+            return inventory_projection.to_dicts(items)
             
         except Exception as e:
             print(f"❌ Error searching inventory: {e}")
             return []
 
+    # Columns read by the streaming export, in output order
+    EXPORT_COLUMNS = (
+        'id', 'sku', 'name', 'description', 'category', 'cost_of_item', 'selling_price',
+        'sold_price', 'w_tax_price', 'listing_status', 'sold_date', 'location', 'size',
+        'condition', 'brand', 'drop_field'
+    )
+    
+    @staticmethod
+    def iter_inventory_rows(filters=None, batch_size=1000):
+        """Yield inventory rows for export without loading the catalog
+        
+        Selects only EXPORT_COLUMNS (plain Row tuples, no ORM objects) and
+        fetches them ``batch_size`` at a time with ``yield_per``, so memory
+        stays flat however many rows match. Accepts the same filters as the
+        batch patch (status, condition, brand, drop, category, search).
+        """
+        columns = [getattr(BusinessInventory, name) for name in InventoryService.EXPORT_COLUMNS]
+        stmt = select(*columns).order_by(BusinessInventory.id.desc())
+        
+        conditions = InventoryService._inventory_filter_conditions(filters or {})
+        if conditions:
+            stmt = stmt.where(*conditions)
+        
+        yield from db.session.execute(stmt.execution_options(yield_per=batch_size))
+
     @staticmethod
     def get_inventory_summary():
         """Get inventory summary statistics"""
@@ -487,6 +761,39 @@ class InventoryService:
         except (ValueError, TypeError):
             return 0
 
+    @staticmethod
+    def suggest_price(category, brand=None, condition=None, size=None, cost=None):
+        """Suggested selling price from comparable sales (blueprints/utils/comparables.py)
+        
+        With ``cost`` the profit and margin at the suggested price are
+        included, as ``calculate-profit`` reports them.
+        """
+        try:
+            if not category:
+                return {'success': False, 'error': 'Category is required'}
+            
+            index = get_comparables_index()
+            suggestion = index.suggest(category, brand, condition, size) if index is not None else None
+            if suggestion is None:
+                return {
+                    'success': True,
+                    'suggestion': None,
+                    'message': f'No sold items in category {category} to compare with'
+                }
+            
+            if cost is not None:
+                price = suggestion['suggested_price']
+                w_tax_price = InventoryService.calculate_w_tax_price(price)
+                profit = InventoryService.calculate_profit(cost, price)
+                suggestion['profit'] = round(profit, 2)
+                suggestion['profit_margin'] = round(profit / w_tax_price * 100, 2) if w_tax_price > 0 else 0
+            
+            return {'success': True, 'suggestion': suggestion}
+            
+        except Exception as e:
+            print(f"❌ Error suggesting price: {e}")
+            return {'success': False, 'error': 'Failed to suggest a price'}
+
     @staticmethod
     def can_edit_item(item):
         """Check if item can be edited (business rule: always allow for now)"""
@@ -526,6 +833,40 @@ class InventoryService:
                 
         return str(random.randint(100000, 999999))  # Final emergency fallback
 
+    @staticmethod
+    def generate_skus(count, exclude=None):
+        """Allocate ``count`` unique SKUs with a single existence query
+        
+        Same ``<milliseconds><2 digits>`` shape as :meth:`generate_sku`, taken
+        as a consecutive block so a whole drop needs one round trip.
+        """
+        import time
+        
+        if count <= 0:
+            return []
+        
+        exclude = set(exclude or ())
+        skus = []
+        offset = 0
+        base = int(time.time() * 1000)
+        
+        while len(skus) < count:
+            needed = count - len(skus)
+            candidates = []
+            while len(candidates) < needed:
+                candidate = f"{base + offset // 90}{10 + offset % 90}"
+                offset += 1
+                if candidate not in exclude:
+                    candidates.append(candidate)
+            
+            taken = {sku for (sku,) in db.session.query(BusinessInventory.sku).filter(
+                BusinessInventory.sku.in_(candidates)
+            ).all()}
+            skus.extend(candidate for candidate in candidates if candidate not in taken)
+        
+        logger.info(f"Generated {count} unique SKUs starting at {skus[0]}")
+        return skus
+
     @staticmethod
     def get_inventory_by_sku(sku):
         """Get single inventory item by SKU"""
@@ -0,0 +1,309 @@
+"""
+Ledger reconciliation - link legacy transactions to the inventory items they were booked for
+
+Transactions written before source links existed only name their item in
+free text (``Inventory Purchase - {name}``, ``Sale - {name} (SKU: {sku})``).
+This job recovers the links in a few sequential passes instead of one LIKE
+query per item:
+
+1. stream business_inventory once into hash maps keyed on SKU,
+   (normalized name, cost) and (normalized name, sold price)
+2. stream the unlinked purchase/sale transactions once, parsing SKU and name
+   from the description (and notes, for CSV imports)
+3. hash-join the two: SKU first, then name + amount, then name alone when
+   exactly one item and one transaction are left for that name
+4. write the links with batched executemany UPDATEs, committing per batch
+
+Only rows that were never linked (source_type NULL) are read or written, so
+an interrupted run can simply be started again and picks up where it stopped. Transactions
+that match several items, or none, are reported rather than guessed.
+"""
+
+import logging
+import re
+import time
+from collections import defaultdict
+from sqlalchemy import select, update, bindparam, or_
+from models import db, BusinessTransaction, BusinessInventory
+from blueprints.utils.database import run_write_transaction
+from blueprints.utils.events import emit
+
+logger = logging.getLogger(__name__)
+
+
+class ReconciliationService:
+    """Service class for backfilling transaction source links"""
+
+    DEFAULT_BATCH_SIZE = 5000
+    STREAM_BATCH_SIZE = 10000
+    MAX_REPORTED_CANDIDATES = 10
+
+    # source_type -> (transaction_type, description prefix)
+    SOURCES = {
+        'inventory_purchase': ('Expense', 'Inventory Purchase - '),
+        'inventory_sale': ('Income', 'Sale - '),
+    }
+
+    _SKU_PATTERN = re.compile(r'SKU:\s*([^\s,)]+)')
+    _SUFFIX_PATTERN = re.compile(r'\s*\((?:SKU:[^)]*|Updated)\)\s*$')
+
+    @staticmethod
+    def normalize_name(name):
+        """Case- and whitespace-insensitive form of an item name"""
+        return ' '.join((name or '').casefold().split())
+
+    @staticmethod
+    def _cents(amount):
+        return None if amount is None else int(round(float(amount) * 100))
+
+    @staticmethod
+    def parse_description(description, prefix):
+        """Item name from a generated description, without the SKU / (Updated) suffixes"""
+        name = description[len(prefix):]
+        while True:
+            stripped = ReconciliationService._SUFFIX_PATTERN.sub('', name)
+            if stripped == name:
+                break
+            name = stripped
+        return ReconciliationService.normalize_name(name)
+
+    @staticmethod
+    def parse_sku(*texts):
+        """First ``SKU: ...`` reference found in ``texts``"""
+        for value in texts:
+            match = ReconciliationService._SKU_PATTERN.search(value or '')
+            if match:
+                return match.group(1)
+        return None
+
+    @staticmethod
+    def reconcile(batch_size=DEFAULT_BATCH_SIZE, dry_run=False, progress=None):
+        """Link unlinked inventory purchase and sale transactions to their items
+
+        ``progress`` is called with a short message after each phase and
+        each committed batch. Returns the stats plus ``ambiguous`` and
+        ``unmatched`` report rows; with ``dry_run`` nothing is written.
+        """
+        started = time.perf_counter()
+        report = progress or (lambda message: None)
+
+        try:
+            items = ReconciliationService._load_items()
+            report(f"{items['count']} inventory items indexed")
+
+            candidates = ReconciliationService._load_transactions()
+            report(f"{sum(len(rows) for rows in candidates.values())} unlinked transactions to match")
+
+            links = []
+            ambiguous = []
+            unmatched = []
+            matched_by = defaultdict(int)
+            for source_type, rows in candidates.items():
+                ReconciliationService._match(
+                    source_type, rows, items, links, ambiguous, unmatched, matched_by
+                )
+            report(f"{len(links)} links resolved, {len(ambiguous)} ambiguous, {len(unmatched)} unmatched")
+
+            written = 0
+            if not dry_run:
+                written = ReconciliationService._write_links(links, batch_size, report)
+
+            return {
+                'success': True,
+                'dry_run': dry_run,
+                'items_scanned': items['count'],
+                'transactions_scanned': sum(len(rows) for rows in candidates.values()),
+                'matched': len(links),
+                'linked': written,
+                'matched_by': dict(matched_by),
+                'ambiguous_count': len(ambiguous),
+                'unmatched_count': len(unmatched),
+                'ambiguous': ambiguous,
+                'unmatched': unmatched,
+                'elapsed_seconds': round(time.perf_counter() - started, 2)
+            }
+
+        except Exception as e:
+            logger.exception("Ledger reconciliation failed")
+            return {'success': False, 'error': str(e)}
+
+    # ------------------------------------------------------------------
+    # Phase 1 and 2 - one streaming pass over each table
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _linked_item_ids():
+        """Item ids that already have a link, per source type (partial index scan)"""
+        linked = defaultdict(set)
+        rows = db.session.execute(
+            select(BusinessTransaction.source_type, BusinessTransaction.source_id).where(
+                BusinessTransaction.source_id.is_not(None),
+                BusinessTransaction.source_type.in_(list(ReconciliationService.SOURCES))
+            )
+        )
+        for source_type, source_id in rows:
+            linked[source_type].add(source_id)
+        return linked
+
+    @staticmethod
+    def _load_items():
+        normalize = ReconciliationService.normalize_name
+        cents = ReconciliationService._cents
+
+        by_sku = {}
+        by_name = defaultdict(list)
+        by_name_cost = defaultdict(list)
+        by_name_sold_price = defaultdict(list)
+        count = 0
+
+        result = db.session.execute(
+            select(
+                BusinessInventory.id, BusinessInventory.sku, BusinessInventory.name,
+                BusinessInventory.cost_of_item, BusinessInventory.sold_price, BusinessInventory.listing_status
+            ).order_by(BusinessInventory.id).execution_options(yield_per=ReconciliationService.STREAM_BATCH_SIZE)
+        )
+        for item_id, sku, name, cost, sold_price, status in result:
+            count += 1
+            name = normalize(name)
+            by_sku[sku] = item_id
+            by_name[name].append(item_id)
+            by_name_cost[(name, cents(cost))].append(item_id)
+            if status == 'sold' and sold_price is not None:
+                by_name_sold_price[(name, cents(sold_price))].append(item_id)
+
+        return {
+            'count': count,
+            'by_sku': by_sku,
+            'linked': ReconciliationService._linked_item_ids(),
+            'inventory_purchase': {'by_name_amount': by_name_cost, 'by_name': by_name},
+            'inventory_sale': {'by_name_amount': by_name_sold_price, 'by_name': None},
+        }
+
+    @staticmethod
+    def _load_transactions():
+        """Unlinked transactions that look generated, grouped by source type"""
+        sources = ReconciliationService.SOURCES
+        candidates = {source_type: [] for source_type in sources}
+
+        result = db.session.execute(
+            select(
+                BusinessTransaction.id, BusinessTransaction.transaction_type, BusinessTransaction.description,
+                BusinessTransaction.amount, BusinessTransaction.notes
+            ).where(
+                BusinessTransaction.source_type.is_(None),
+                or_(*[
+                    (BusinessTransaction.transaction_type == transaction_type)
+                    & BusinessTransaction.description.startswith(prefix, autoescape=True)
+                    for transaction_type, prefix in sources.values()
+                ])
+            ).order_by(BusinessTransaction.id).execution_options(yield_per=ReconciliationService.STREAM_BATCH_SIZE)
+        )
+        for transaction_id, transaction_type, description, amount, notes in result:
+            for source_type, (source_transaction_type, prefix) in sources.items():
+                if transaction_type == source_transaction_type and description.startswith(prefix):
+                    candidates[source_type].append((
+                        transaction_id,
+                        ReconciliationService.parse_sku(description, notes),
+                        ReconciliationService.parse_description(description, prefix),
+                        ReconciliationService._cents(amount),
+                        description,
+                        float(amount)
+                    ))
+                    break
+        return candidates
+
+    # ------------------------------------------------------------------
+    # Phase 3 - hash join
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _match(source_type, rows, items, links, ambiguous, unmatched, matched_by):
+        """Resolve ``rows`` (id-ordered) to item ids for one source type"""
+        claimed = items['linked'][source_type]
+        pools = items[source_type]
+        limit = ReconciliationService.MAX_REPORTED_CANDIDATES
+
+        def report_row(target, row, reason, candidate_ids=()):
+            transaction_id, _, _, _, description, amount = row
+            target.append({
+                'transaction_id': transaction_id,
+                'source_type': source_type,
+                'description': description,
+                'amount': amount,
+                'reason': reason,
+                'candidate_ids': list(candidate_ids)[:limit]
+            })
+
+        def link(row, item_id, method):
+            links.append({'b_id': row[0], 'b_source_type': source_type, 'b_source_id': item_id})
+            claimed.add(item_id)
+            matched_by[method] += 1
+
+        # 1. SKU references are exact
+        by_name_amount = defaultdict(list)
+        for row in rows:
+            sku = row[1]
+            item_id = items['by_sku'].get(sku) if sku else None
+            if item_id is None:
+                by_name_amount[(row[2], row[3])].append(row)
+            elif item_id in claimed:
+                report_row(ambiguous, row, 'item already linked to another transaction', [item_id])
+            else:
+                link(row, item_id, 'sku')
+
+        # 2. Name + amount: pair transactions and items in id order when the counts agree
+        by_name = defaultdict(list)
+        for key, key_rows in by_name_amount.items():
+            item_ids = [item_id for item_id in pools['by_name_amount'].get(key, ()) if item_id not in claimed]
+            if not item_ids:
+                by_name[key[0]].extend(key_rows)
+            elif len(item_ids) == len(key_rows):
+                for row, item_id in zip(key_rows, item_ids):
+                    link(row, item_id, 'name_amount')
+            else:
+                for row in key_rows:
+                    report_row(ambiguous, row, f'{len(key_rows)} transactions for {len(item_ids)} items', item_ids)
+
+        # 3. Name alone (cost edited without updating the ledger): one-to-one only
+        for name, name_rows in by_name.items():
+            item_ids = []
+            if pools['by_name'] is not None:
+                item_ids = [item_id for item_id in pools['by_name'].get(name, ()) if item_id not in claimed]
+            if not item_ids:
+                for row in name_rows:
+                    reason = 'SKU not found in inventory' if row[1] else 'no inventory item with this name and amount'
+                    report_row(unmatched, row, reason)
+            elif len(item_ids) == 1 and len(name_rows) == 1:
+                link(name_rows[0], item_ids[0], 'name')
+            else:
+                for row in name_rows:
+                    report_row(ambiguous, row, 'name matches several items with a different amount', item_ids)
+
+    # ------------------------------------------------------------------
+    # Phase 4 - batched writes
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _write_links(links, batch_size, report):
+        """executemany UPDATEs, one transaction per batch; rows linked meanwhile are left alone"""
+        statement = update(BusinessTransaction.__table__).where(
+            BusinessTransaction.__table__.c.id == bindparam('b_id'),
+            BusinessTransaction.__table__.c.source_type.is_(None)
+        ).values(
+            source_type=bindparam('b_source_type'),
+            source_id=bindparam('b_source_id')
+        )
+
+        def write_batch(batch):
+            result = db.session.execute(statement, batch)
+            count = result.rowcount if result.rowcount is not None and result.rowcount >= 0 else len(batch)
+            if count:
+                emit('transaction.linked', ids=[link['b_id'] for link in batch], count=count)
+            return count
+
+        written = 0
+        for start in range(0, len(links), batch_size):
+            batch = links[start:start + batch_size]
+            written += run_write_transaction('ReconciliationService.reconcile', lambda unit: write_batch(batch))
+            report(f"{written}/{len(links)} links written")
+        return written
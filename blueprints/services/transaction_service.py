@@ -3,45 +3,57 @@ Business logic for transaction management - UPDATED for new schema
 """
 
 from datetime import datetime, date
-from sqlalchemy import func, extract
-from models import db, BusinessTransaction
+from sqlalchemy import func, update
+from models import db, BusinessTransaction, get_rollup_totals
+from blueprints.utils.periods import period_filters, apply_period
+from blueprints.utils.database import transaction_scope, write_transaction
+from blueprints.utils.events import emit
 
 class TransactionService:
     """Service class for transaction business logic"""
         
     @staticmethod
+    @write_transaction()
     def create_transaction(data):
-        """Create a new business transaction - FIXED to return dictionary"""
+        """Create a new business transaction - FIXED to return dictionary
+        
+        Joins the caller's unit of work when there is one (inventory and
+        asset services), so the transaction commits together with the item
+        that booked it.
+        """
         try:
             # Validate data
             validation_result = TransactionService.validate_transaction_data(data)
             if not validation_result['valid']:
                 return {'success': False, 'error': validation_result['error']}
             
-            # Create transaction
-            transaction = BusinessTransaction(
-                date=datetime.strptime(data['date'], '%Y-%m-%d').date(),
-                description=data['description'],
-                amount=float(data['amount']),
-                category=data['category'],
-                sub_category=data.get('sub_category', ''),
-                transaction_type=data['transaction_type'],
-                account_name=data['account_name'],
-                notes=data.get('notes', '')
-            )
-            
-            db.session.add(transaction)
-            db.session.commit()
-            
-            # FIXED: Return transaction as dictionary instead of object
-            return {
-                'success': True,
-                'transaction': transaction.to_dict(),  # ← This fixes the "not subscriptable" error
-                'message': f'Transaction "{transaction.description}" created successfully!'
-            }
+            with transaction_scope():
+                # Create transaction
+                transaction = BusinessTransaction(
+                    date=datetime.strptime(data['date'], '%Y-%m-%d').date(),
+                    description=data['description'],
+                    amount=float(data['amount']),
+                    category=data['category'],
+                    sub_category=data.get('sub_category', ''),
+                    transaction_type=data['transaction_type'],
+                    account_name=data['account_name'],
+                    notes=data.get('notes', ''),
+                    source_type=data.get('source_type'),
+                    source_id=data.get('source_id')
+                )
+                
+                db.session.add(transaction)
+                db.session.flush()  # Get the ID
+                emit('transaction.created', ids=[transaction.id], source_type=transaction.source_type)
+                
+                # FIXED: Return transaction as dictionary instead of object
+                return {
+                    'success': True,
+                    'transaction': transaction.to_dict(),  # ← This fixes the "not subscriptable" error
+                    'message': f'Transaction "{transaction.description}" created successfully!'
+                }
             
         except Exception as e:
-            db.session.rollback()
             return {'success': False, 'error': str(e)}
         
     @staticmethod
@@ -77,20 +89,8 @@ class TransactionService:
     def get_monthly_summary(year, month):
             """Get monthly financial summary"""
             try:
-                results = db.session.query(
-                    BusinessTransaction.transaction_type,
-                    func.sum(BusinessTransaction.amount).label('total')
-                ).filter(
-                    extract('year', BusinessTransaction.date) == year,
-                    extract('month', BusinessTransaction.date) == month
-                ).group_by(BusinessTransaction.transaction_type).all()
-                
-                summary = {'income': 0, 'expenses': 0}
-                for transaction_type, total in results:
-                    if transaction_type.lower() == 'income':
-                        summary['income'] = float(total)
-                    elif transaction_type.lower() == 'expense':
-                        summary['expenses'] = float(total)
+                totals = get_rollup_totals(year, month)
+                summary = {'income': totals['income'], 'expenses': totals['expense']}
                 
                 summary['profit'] = summary['income'] - summary['expenses']
                 summary['profit_margin'] = (summary['profit'] / summary['income'] * 100) if summary['income'] > 0 else 0
@@ -104,19 +104,8 @@ class TransactionService:
     def get_yearly_summary(year):
             """Get yearly financial summary"""
             try:
-                results = db.session.query(
-                    BusinessTransaction.transaction_type,
-                    func.sum(BusinessTransaction.amount).label('total')
-                ).filter(
-                    extract('year', BusinessTransaction.date) == year
-                ).group_by(BusinessTransaction.transaction_type).all()
-                
-                summary = {'income': 0, 'expenses': 0}
-                for transaction_type, total in results:
-                    if transaction_type.lower() == 'income':
-                        summary['income'] = float(total)
-                    elif transaction_type.lower() == 'expense':
-                        summary['expenses'] = float(total)
+                totals = get_rollup_totals(year)
+                summary = {'income': totals['income'], 'expenses': totals['expense']}
                 
                 summary['profit'] = summary['income'] - summary['expenses']
                 summary['profit_margin'] = (summary['profit'] / summary['income'] * 100) if summary['income'] > 0 else 0
@@ -144,12 +133,9 @@ class TransactionService:
                     )).label('expenses'),
                     func.count(BusinessTransaction.id).label('count')
                 ).filter(
-                    extract('year', BusinessTransaction.date) == year
+                    *period_filters(BusinessTransaction.date, year, month)
                 )
                 
-                if month:
-                    query = query.filter(extract('month', BusinessTransaction.date) == month)
-                
                 results = query.group_by(BusinessTransaction.category).all()
             
                 breakdown = []
@@ -189,30 +175,55 @@ class TransactionService:
                 return []
         
     @staticmethod
+    @write_transaction()
     def create_automatic_transaction(source_type, source_id, transaction_data):
             """Create automatic transaction from other business operations
             
-            NOTE: source_type and source_id are no longer stored in database
-            but kept as parameters for backward compatibility
+            The transaction is linked to what booked it via source_type (e.g.
+            'inventory_purchase', 'asset_disposal') and source_id, so it can be
+            found again with :meth:`find_source_transaction`.
             """
             try:
-                # Simply create the transaction without source tracking
-                return TransactionService.create_transaction(transaction_data)
+                return TransactionService.create_transaction(
+                    dict(transaction_data, source_type=source_type, source_id=source_id)
+                )
                 
             except Exception as e:
                 return {'success': False, 'error': str(e)}
+    
+    @staticmethod
+    @write_transaction()
+    def detach_source_transactions(source_types, source_id):
+        """Clear source_id on the entries booked for a record that is being deleted
+        
+        The entries stay in the ledger and keep their source_type. SQLite
+        reuses the highest rowid after a delete, so a dangling source_id could
+        otherwise attach them to the next item or asset created.
+        """
+        detached_ids = db.session.execute(
+            update(BusinessTransaction)
+            .where(BusinessTransaction.source_type.in_(source_types), BusinessTransaction.source_id == source_id)
+            .values(source_id=None)
+            .returning(BusinessTransaction.id)
+            .execution_options(synchronize_session='fetch')
+        ).scalars().all()
+        if detached_ids:
+            emit('transaction.updated', ids=detached_ids)
+        return len(detached_ids)
+    
+    @staticmethod
+    def find_source_transaction(source_type, source_id):
+        """Ledger entry booked by ``source_type`` for ``source_id`` (indexed lookup), or None"""
+        return BusinessTransaction.query.filter_by(
+            source_id=source_id, source_type=source_type
+        ).order_by(BusinessTransaction.id).first()
         
     @staticmethod
     def get_profit_loss_statement(year, month=None):
         """Generate profit & loss statement"""
         try:
             # Get all transactions for the period
-            query = BusinessTransaction.query.filter(
-                extract('year', BusinessTransaction.date) == year
-            )
-            
-            if month:
-                query = query.filter(extract('month', BusinessTransaction.date) == month)
+            query = apply_period(BusinessTransaction.query, BusinessTransaction.date, year, month)
             
             transactions = query.all()
             
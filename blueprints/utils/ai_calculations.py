@@ -5,13 +5,21 @@ Provides intelligent insights for fashion resale business optimization
 
 import logging
 from datetime import datetime, date, timedelta
-from sqlalchemy import func, extract, case, and_, or_
+from sqlalchemy import func, case, and_, or_, select
 from models import db, BusinessInventory, BusinessTransaction
+from blueprints.utils.periods import period_filters, previous_month
+from blueprints.utils.analytics_core import get_inventory_frame, cents
+from blueprints.utils.serializers import real
+from blueprints.utils.comparables import get_comparables_index
 from collections import defaultdict, Counter
 import statistics
 
 logger = logging.getLogger(__name__)
 
+# Sold-price bins for the price range analysis: < 25, 25-50.99, 51-100.99, 101-200.99, >= 201
+PRICE_RANGE_EDGES = (25, 51, 101, 201)
+PRICE_RANGES = ('Under $25', '$25-$50', '$51-$100', '$101-$200', 'Over $200')
+
 class BusinessIntelligence:
     """AI-powered business intelligence engine for fashion resale optimization"""
     
@@ -71,23 +79,16 @@ class BusinessIntelligence:
         try:
             # Current month revenue
             current_revenue = db.session.query(func.sum(BusinessTransaction.amount)).filter(
-                and_(
-                    BusinessTransaction.transaction_type == 'Income',
-                    extract('year', BusinessTransaction.date) == year,
-                    extract('month', BusinessTransaction.date) == month
-                )
+                BusinessTransaction.transaction_type == 'Income',
+                *period_filters(BusinessTransaction.date, year, month)
             ).scalar() or 0
             
             # Previous month revenue
-            prev_month = month - 1 if month > 1 else 12
-            prev_year = year if month > 1 else year - 1
+            prev_year, prev_month = previous_month(year, month)
             
             prev_revenue = db.session.query(func.sum(BusinessTransaction.amount)).filter(
-                and_(
-                    BusinessTransaction.transaction_type == 'Income',
-                    extract('year', BusinessTransaction.date) == prev_year,
-                    extract('month', BusinessTransaction.date) == prev_month
-                )
+                BusinessTransaction.transaction_type == 'Income',
+                *period_filters(BusinessTransaction.date, prev_year, prev_month)
             ).scalar() or 0
             
             if prev_revenue == 0:
@@ -115,25 +116,17 @@ class BusinessIntelligence:
     def _calculate_inventory_efficiency_score():
         """Calculate inventory efficiency based on turnover and age"""
         try:
-            # Total inventory value
-            total_inventory_value = db.session.query(func.sum(BusinessInventory.cost_of_item)).filter(
-                BusinessInventory.listing_status != 'sold'
-            ).scalar() or 0
+            frame = get_inventory_frame()
             
-            # Items older than 90 days (estimated)
-            total_items = BusinessInventory.query.filter(BusinessInventory.listing_status != 'sold').count()
+            # Items still in stock
+            total_items = frame.count(frame.is_not('status', 'sold'))
             
             if total_items == 0:
                 return 100
             
             # Sales rate (items sold in last 30 days)
             thirty_days_ago = date.today() - timedelta(days=30)
-            recent_sales = BusinessInventory.query.filter(
-                and_(
-                    BusinessInventory.listing_status == 'sold',
-                    BusinessInventory.sold_date >= thirty_days_ago
-                )
-            ).count()
+            recent_sales = frame.count(frame.all_of(frame.is_('status', 'sold'), frame.sold_since(thirty_days_ago)))
             
             # Calculate efficiency score
             if total_items > 0:
@@ -159,31 +152,19 @@ class BusinessIntelligence:
     def _calculate_profit_margin_score():
         """Calculate profit margin health score"""
         try:
-            # Get sold items with profit data
-            sold_items = db.session.query(
-                BusinessInventory.cost_of_item,
-                BusinessInventory.sold_price
-            ).filter(
-                and_(
-                    BusinessInventory.listing_status == 'sold',
-                    BusinessInventory.sold_price.isnot(None),
-                    BusinessInventory.cost_of_item.isnot(None)
-                )
-            ).all()
+            # Sold items with profit data
+            frame = get_inventory_frame()
+            sold = frame.all_of(frame.is_('status', 'sold'), frame.has('sold'), frame.has('cost'))
             
-            if not sold_items:
+            if not frame.count(sold):
                 return 50
             
-            margins = []
-            for item in sold_items:
-                if item.cost_of_item > 0:
-                    margin = ((item.sold_price - item.cost_of_item) / item.cost_of_item) * 100
-                    margins.append(margin)
+            margins = frame.values(frame.margin_percent(), frame.all_of(sold, frame.compare('cost_cents', '>', 0)))
             
             if not margins:
                 return 50
             
-            avg_margin = statistics.mean(margins)
+            avg_margin = statistics.fmean(margins)
             
             # Score based on average margin
             if avg_margin >= 100:  # 100%+ margin
@@ -208,13 +189,9 @@ class BusinessIntelligence:
         """Calculate sales velocity score"""
         try:
             # Sales in last 30 days
+            frame = get_inventory_frame()
             thirty_days_ago = date.today() - timedelta(days=30)
-            recent_sales_count = BusinessInventory.query.filter(
-                and_(
-                    BusinessInventory.listing_status == 'sold',
-                    BusinessInventory.sold_date >= thirty_days_ago
-                )
-            ).count()
+            recent_sales_count = frame.count(frame.all_of(frame.is_('status', 'sold'), frame.sold_since(thirty_days_ago)))
             
             # Score based on sales velocity
             if recent_sales_count >= 20:
@@ -287,12 +264,12 @@ class InventoryIntelligence:
         """Identify slow-moving inventory items"""
         try:
             # Items that have been in inventory for estimated 60+ days
+            # (add age estimation logic here when date_added is available)
+            frame = get_inventory_frame()
+            slow_ids = frame.row_ids(frame.is_('status', 'inventory'), limit=20)
             slow_moving_items = BusinessInventory.query.filter(
-                and_(
-                    BusinessInventory.listing_status == 'inventory',
-                    # Add age estimation logic here when date_added is available
-                )
-            ).all()
+                BusinessInventory.id.in_(slow_ids)
+            ).order_by(BusinessInventory.id).all() if slow_ids else []
             
             analyzed_items = []
             for item in slow_moving_items:
@@ -360,30 +337,24 @@ class SalesIntelligence:
     def analyze_category_performance():
         """Analyze performance by category"""
         try:
-            # Get sold items grouped by category
-            category_data = db.session.query(
-                BusinessInventory.category,
-                func.count(BusinessInventory.id).label('items_sold'),
-                func.avg(BusinessInventory.sold_price).label('avg_price'),
-                func.sum(BusinessInventory.sold_price).label('total_revenue'),
-                func.avg(BusinessInventory.cost_of_item).label('avg_cost')
-            ).filter(
-                BusinessInventory.listing_status == 'sold'
-            ).group_by(BusinessInventory.category).all()
+            # Sold items grouped by category
+            frame = get_inventory_frame()
+            sold = frame.is_('status', 'sold')
+            avg_costs = {group.key: group.avg for group in frame.group_by('category', sold, 'cost')}
             
             categories = []
-            for category in category_data:
-                avg_cost = float(category.avg_cost or 0)
-                avg_price = float(category.avg_price or 0)
+            for category in frame.group_by('category', sold, 'sold'):
+                avg_cost = float(avg_costs[category.key] or 0)
+                avg_price = float(category.avg or 0)
                 margin = ((avg_price - avg_cost) / avg_cost * 100) if avg_cost > 0 else 0
                 
                 categories.append({
-                    'category': category.category,
-                    'items_sold': category.items_sold,
+                    'category': category.key,
+                    'items_sold': category.count,
                     'avg_selling_price': round(avg_price, 2),
-                    'total_revenue': round(float(category.total_revenue or 0), 2),
+                    'total_revenue': round(float(cents(category.total) or 0), 2),
                     'avg_margin_percent': round(margin, 1),
-                    'performance_rating': SalesIntelligence._rate_category_performance(category.items_sold, margin)
+                    'performance_rating': SalesIntelligence._rate_category_performance(category.count, margin)
                 })
             
             # Sort by total revenue descending
@@ -411,57 +382,25 @@ class SalesIntelligence:
     def analyze_price_range_performance():
         """Analyze performance by price ranges"""
         try:
-            sold_items = db.session.query(
-                BusinessInventory.sold_price,
-                BusinessInventory.cost_of_item
-            ).filter(
-                and_(
-                    BusinessInventory.listing_status == 'sold',
-                    BusinessInventory.sold_price.isnot(None)
-                )
-            ).all()
-            
-            price_ranges = {
-                'Under $25': {'count': 0, 'revenue': 0, 'margin': []},
-                '$25-$50': {'count': 0, 'revenue': 0, 'margin': []},
-                '$51-$100': {'count': 0, 'revenue': 0, 'margin': []},
-                '$101-$200': {'count': 0, 'revenue': 0, 'margin': []},
-                'Over $200': {'count': 0, 'revenue': 0, 'margin': []}
-            }
-            
-            for item in sold_items:
-                price = float(item.sold_price or 0)
-                cost = float(item.cost_of_item or 0)
-                margin = ((price - cost) / cost * 100) if cost > 0 else 0
-                
-                if price < 25:
-                    range_key = 'Under $25'
-                elif price < 51:
-                    range_key = '$25-$50'
-                elif price < 101:
-                    range_key = '$51-$100'
-                elif price < 201:
-                    range_key = '$101-$200'
-                else:
-                    range_key = 'Over $200'
-                
-                price_ranges[range_key]['count'] += 1
-                price_ranges[range_key]['revenue'] += price
-                price_ranges[range_key]['margin'].append(margin)
+            frame = get_inventory_frame()
+            sold = frame.all_of(frame.is_('status', 'sold'), frame.has('sold'))
+            price_bins = frame.bins('sold_cents', PRICE_RANGE_EDGES)
+            margins = frame.margin_percent(no_cost=0.0)
+            avg_margins = {group.key: group.avg for group in frame.group_by(price_bins, sold, margins)}
             
             # Format results
             results = []
-            for range_name, data in price_ranges.items():
-                if data['count'] > 0:
-                    avg_margin = statistics.mean(data['margin']) if data['margin'] else 0
-                    results.append({
-                        'price_range': range_name,
-                        'items_sold': data['count'],
-                        'total_revenue': round(data['revenue'], 2),
-                        'avg_revenue_per_item': round(data['revenue'] / data['count'], 2),
-                        'avg_margin_percent': round(avg_margin, 1),
-                        'performance': SalesIntelligence._rate_price_range_performance(data['count'], avg_margin)
-                    })
+            for price_range in frame.group_by(price_bins, sold, 'sold_cents'):
+                revenue = price_range.total
+                avg_margin = avg_margins[price_range.key] or 0
+                results.append({
+                    'price_range': PRICE_RANGES[price_range.key],
+                    'items_sold': price_range.count,
+                    'total_revenue': round(revenue, 2),
+                    'avg_revenue_per_item': round(revenue / price_range.count, 2),
+                    'avg_margin_percent': round(avg_margin, 1),
+                    'performance': SalesIntelligence._rate_price_range_performance(price_range.count, avg_margin)
+                })
             
             return sorted(results, key=lambda x: x['items_sold'], reverse=True)
             
@@ -484,65 +423,103 @@ class SalesIntelligence:
 class ProfitOptimization:
     """Profit optimization and pricing recommendations"""
     
+    # Recommendations kept by default (the profit optimization section)
+    DEFAULT_RECOMMENDATIONS = 15
+    # Price difference from the market average that triggers a recommendation
+    PRICE_GAP = 20
+    
     @staticmethod
-    def get_pricing_recommendations():
-        """Get AI-powered pricing recommendations"""
+    def get_pricing_recommendations(limit=DEFAULT_RECOMMENDATIONS, min_confidence=0):
+        """Get AI-powered pricing recommendations
+        
+        Unsold items are compared with the average sold price of items with
+        the same category, brand and condition. The market averages come
+        from one grouped aggregate joined to the unsold items; the database
+        ranks the items by price gap and returns only the ``limit`` largest.
+        ``min_confidence`` (0-100) drops recommendations based on too few
+        comparable sales. Each recommendation also carries the comparable-sales
+        suggestion for the item (``comparables``, see
+        blueprints/utils/comparables.py).
+        """
         try:
-            # Analyze current inventory pricing vs market performance
-            inventory_items = BusinessInventory.query.filter(
-                BusinessInventory.listing_status == 'inventory'
+            market = ProfitOptimization._market_prices_query(min_confidence)
+            item = BusinessInventory
+            market_average = real(market.c.price_total) / market.c.priced_count
+            impact = func.abs(func.coalesce(real(item.selling_price), 0) - market_average).label('impact')
+            
+            # Analyze current inventory pricing vs market performance, largest gaps first
+            rows = db.session.execute(
+                select(
+                    item.sku, item.name, item.category, item.brand, item.condition, item.size, item.selling_price,
+                    market.c.sold_count, market.c.price_total, market.c.priced_count, impact
+                ).join(market, and_(
+                    # NULL matches NULL (SQLite ``IS``), as the per-item comparison did
+                    item.category.is_not_distinct_from(market.c.category),
+                    item.brand.is_not_distinct_from(market.c.brand),
+                    item.condition.is_not_distinct_from(market.c.condition)
+                )).where(
+                    item.listing_status == 'inventory',
+                    # Slightly wider than PRICE_GAP: _analyze_item_pricing makes the exact check
+                    impact > ProfitOptimization.PRICE_GAP - 0.01
+                ).order_by(impact.desc(), item.id).limit(max(0, limit))
             ).all()
             
+            # Comparable-sales band for each recommendation (size-level match where there are enough sales)
+            index = get_comparables_index()
+            
             recommendations = []
-            for item in inventory_items:
-                recommendation = ProfitOptimization._analyze_item_pricing(item)
+            for row in rows:
+                recommendation = ProfitOptimization._analyze_item_pricing(row)
                 if recommendation:
+                    recommendation['comparables'] = (
+                        index.suggest(row.category, row.brand, row.condition, row.size) if index is not None else None
+                    )
                     recommendations.append(recommendation)
             
-            # Sort by potential impact
-            recommendations.sort(key=lambda x: x['potential_impact'], reverse=True)
-            
-            return recommendations[:15]  # Top 15 recommendations
+            return recommendations
             
         except Exception as e:
             logger.error(f"Error getting pricing recommendations: {e}")
             return []
     
     @staticmethod
-    def _analyze_item_pricing(item):
-        """Analyze individual item pricing"""
+    def _market_prices_query(min_confidence=0):
+        """Sold items per (category, brand, condition) and the total/count of their non-zero sold prices"""
+        item = BusinessInventory
+        # Sold prices in cents, as the ORM returns them; zero counts as no price
+        sold_price = func.nullif(func.round(item.sold_price, 2), 0, type_=item.sold_price.type)
+        query = select(
+            item.category, item.brand, item.condition,
+            func.count(item.id).label('sold_count'),
+            func.sum(sold_price).label('price_total'),
+            func.count(sold_price).label('priced_count')
+        ).where(
+            item.listing_status == 'sold'
+        ).group_by(
+            item.category, item.brand, item.condition
+        ).having(func.count(sold_price) > 0)
+        
+        if min_confidence > 0:
+            # Confidence is 10 points per comparable sale, capped at 100
+            query = query.having(func.count(item.id) * 10 >= min_confidence)
+        return query.subquery('market_prices')
+    
+    @staticmethod
+    def _analyze_item_pricing(row):
+        """Analyze individual item pricing against its market average"""
         try:
-            # Get similar sold items for comparison
-            similar_sold = db.session.query(BusinessInventory).filter(
-                and_(
-                    BusinessInventory.listing_status == 'sold',
-                    BusinessInventory.category == item.category,
-                    BusinessInventory.brand == item.brand,
-                    BusinessInventory.condition == item.condition
-                )
-            ).all()
-            
-            if not similar_sold:
-                return None
-            
-            sold_prices = [float(sold_item.sold_price or 0) for sold_item in similar_sold if sold_item.sold_price]
-            
-            if not sold_prices:
-                return None
-            
-            avg_market_price = statistics.mean(sold_prices)
-            current_price = float(item.selling_price or 0)
-            cost = float(item.cost_of_item or 0)
+            avg_market_price = float(row.price_total / row.priced_count)
+            current_price = float(row.selling_price or 0)
             
             # Calculate recommendation
             price_difference = current_price - avg_market_price
             potential_impact = abs(price_difference)
             
-            if price_difference > 20:  # Overpriced
+            if price_difference > ProfitOptimization.PRICE_GAP:  # Overpriced
                 action = "reduce_price"
                 new_price = avg_market_price * 0.95  # 5% below market average
                 reason = f"Currently ${price_difference:.2f} above market average"
-            elif price_difference < -20:  # Underpriced
+            elif price_difference < -ProfitOptimization.PRICE_GAP:  # Underpriced
                 action = "increase_price"
                 new_price = avg_market_price * 0.90  # 10% below market average
                 reason = f"Currently ${abs(price_difference):.2f} below market potential"
@@ -550,21 +527,21 @@ class ProfitOptimization:
                 return None  # Price is reasonable
             
             return {
-                'sku': item.sku,
-                'name': item.name,
-                'category': item.category,
-                'brand': item.brand,
+                'sku': row.sku,
+                'name': row.name,
+                'category': row.category,
+                'brand': row.brand,
                 'current_price': current_price,
                 'suggested_price': round(new_price, 2),
                 'market_average': round(avg_market_price, 2),
                 'action': action,
                 'reason': reason,
                 'potential_impact': potential_impact,
-                'confidence': min(len(similar_sold) * 10, 100)  # Confidence based on sample size
+                'confidence': min(row.sold_count * 10, 100)  # Confidence based on sample size
             }
             
         except Exception as e:
-            logger.error(f"Error analyzing item pricing for {item.sku}: {e}")
+            logger.error(f"Error analyzing item pricing for {row.sku}: {e}")
             return None
 
 class TrendAnalysis:
@@ -574,28 +551,21 @@ class TrendAnalysis:
     def analyze_seasonal_trends():
         """Analyze seasonal sales trends"""
         try:
-            # Get sales by month
-            monthly_sales = db.session.query(
-                extract('month', BusinessInventory.sold_date).label('month'),
-                func.count(BusinessInventory.id).label('sales_count'),
-                func.sum(BusinessInventory.sold_price).label('revenue')
-            ).filter(
-                and_(
-                    BusinessInventory.listing_status == 'sold',
-                    BusinessInventory.sold_date.isnot(None)
-                )
-            ).group_by(extract('month', BusinessInventory.sold_date)).all()
+            # Sales by month
+            frame = get_inventory_frame()
+            sold = frame.all_of(frame.is_('status', 'sold'), frame.has('sold_day'))
+            monthly_sales = {group.key: group for group in frame.group_by('sold_month', sold, 'sold')}
             
             months = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
                      'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
             
             seasonal_data = []
             for i in range(1, 13):
-                month_data = next((sale for sale in monthly_sales if sale.month == i), None)
+                month_data = monthly_sales.get(i)
                 seasonal_data.append({
                     'month': months[i-1],
-                    'sales_count': month_data.sales_count if month_data else 0,
-                    'revenue': float(month_data.revenue or 0) if month_data else 0
+                    'sales_count': month_data.count if month_data else 0,
+                    'revenue': float(cents(month_data.total) or 0) if month_data else 0
                 })
             
             return seasonal_data
@@ -608,24 +578,19 @@ class TrendAnalysis:
     def analyze_brand_trends():
         """Analyze brand performance trends"""
         try:
-            brand_performance = db.session.query(
-                BusinessInventory.brand,
-                func.count(BusinessInventory.id).label('items_sold'),
-                func.avg(BusinessInventory.sold_price).label('avg_price'),
-                func.sum(BusinessInventory.sold_price).label('total_revenue')
-            ).filter(
-                BusinessInventory.listing_status == 'sold'
-            ).group_by(BusinessInventory.brand).all()
+            frame = get_inventory_frame()
+            brand_performance = frame.group_by('brand', frame.is_('status', 'sold'), 'sold')
             
             brands = []
             for brand in brand_performance:
-                if brand.brand:  # Only include brands with names
+                if brand.key:  # Only include brands with names
+                    total_revenue = float(cents(brand.total) or 0)
                     brands.append({
-                        'brand': brand.brand,
-                        'items_sold': brand.items_sold,
-                        'avg_price': round(float(brand.avg_price or 0), 2),
-                        'total_revenue': round(float(brand.total_revenue or 0), 2),
-                        'performance_tier': TrendAnalysis._categorize_brand_performance(brand.items_sold, float(brand.total_revenue or 0))
+                        'brand': brand.key,
+                        'items_sold': brand.count,
+                        'avg_price': round(float(brand.avg or 0), 2),
+                        'total_revenue': round(total_revenue, 2),
+                        'performance_tier': TrendAnalysis._categorize_brand_performance(brand.count, total_revenue)
                     })
             
             # Sort by total revenue
@@ -0,0 +1,367 @@
+"""
+Columnar analytics core for Girasoul Business Dashboard
+
+The insights engine (blueprints/utils/ai_calculations.py and the helpers in
+InsightsService) used to answer every metric - health score, distribution,
+category and brand performance, price ranges, seasonal trends, margins -
+with its own query over ``business_inventory``, about thirty per insights
+render, and aggregate in Python with ``statistics.mean``.
+
+:class:`InventoryFrame` loads the columns those metrics need once, in one
+query, and keeps them as arrays:
+
+- ``category``, ``brand``, ``condition`` and ``status`` dictionary-encoded
+  (integer codes plus a label table, labels in SQLite ``GROUP BY`` order,
+  NULL first)
+- ``cost``, ``price`` and ``sold`` as floats, NaN for NULL
+- ``sold_day`` (Julian day), ``sold_year`` and ``sold_month`` for date
+  filters and calendar group-bys
+
+Metrics are masks, counts, sums and group-bys over those arrays: NumPy
+(``bincount`` group-bys) when it is installed, plain Python loops over the
+same arrays otherwise. :func:`get_inventory_frame` keeps one frame per
+``business_inventory`` data version, so the insights sections share a single
+load until the inventory changes.
+
+Results follow the SQL they replace: ``NULL`` never matches a comparison,
+``SUM``/``AVG`` skip NULLs and return None for none, ``SUM`` of a money
+column comes back rounded to cents (SQLAlchemy's ``Numeric(10, 2)``), and
+per-row money values are rounded to cents as ORM rows were.
+"""
+
+import logging
+import math
+import threading
+from collections import namedtuple
+from sqlalchemy import Float, func, select, type_coerce
+from models import db, BusinessInventory
+from blueprints.utils.data_versions import get_data_versions
+from blueprints.utils.serializers import real
+
+try:
+    import numpy as np
+except ImportError:  # Optional - pure-Python columns are used instead
+    np = None
+
+logger = logging.getLogger(__name__)
+
+NAN = float('nan')
+
+# Julian day number of date.toordinal() == 0 (as SQLite's julianday() counts)
+_JULIAN_OFFSET = 1721424.5
+
+ENCODED_COLUMNS = ('category', 'brand', 'condition', 'status')
+FLOAT_COLUMNS = ('cost', 'price', 'sold', 'sold_day', 'sold_year', 'sold_month')
+
+_NULL_KEY = object()
+
+# One row per group, in SQLite GROUP BY order; ``total``/``avg`` are None
+# when the group has no non-NULL values (or no value column was given)
+Group = namedtuple('Group', ('key', 'count', 'total', 'avg'))
+
+# A computed grouping (see InventoryFrame.bins): row codes plus their labels
+GroupKey = namedtuple('GroupKey', ('codes', 'labels'))
+
+
+def julian_day(day):
+    """SQLite ``julianday()`` of a ``date`` at midnight"""
+    return day.toordinal() + _JULIAN_OFFSET
+
+
+def cents(value):
+    """A money aggregate as SQLAlchemy returns ``Numeric(10, 2)``: rounded to cents, None kept"""
+    return None if value is None else round(value, 2)
+
+
+def _sql_order(value):
+    # SQLite sorts NULL, then numbers, then text
+    if value is None:
+        return (0, 0)
+    if isinstance(value, str):
+        return (2, value)
+    return (1, value)
+
+
+def _encode(values):
+    """Dictionary-encode ``values``: (codes, labels) with labels in SQL order"""
+    labels = sorted(set(values), key=_sql_order)
+    index = {label: code for code, label in enumerate(labels)}
+    codes = [index[value] for value in values]
+    if np is not None:
+        codes = np.array(codes, dtype=np.int32)
+    return codes, labels
+
+
+def _floats(values):
+    if np is not None:
+        return np.array(values, dtype=np.float64)  # None becomes NaN
+    return [NAN if value is None else float(value) for value in values]
+
+
+class InventoryFrame:
+    """The inventory columns the insights need, as arrays (see module docstring)"""
+
+    def __init__(self, rows):
+        columns = list(zip(*rows)) if rows else [()] * 11
+        (ids, category, brand, condition, status, cost, price, sold,
+         sold_day, sold_year, sold_month) = columns
+
+        self.size = len(ids)
+        self.ids = np.array(ids, dtype=np.int64) if np is not None else list(ids)
+        self._codes = {}
+        self._labels = {}
+        for name, values in zip(ENCODED_COLUMNS, (category, brand, condition, status)):
+            self._codes[name], self._labels[name] = _encode(values)
+        self._floats = {
+            name: _floats(values)
+            for name, values in zip(FLOAT_COLUMNS, (cost, price, sold, sold_day, sold_year, sold_month))
+        }
+        self._rounded = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls):
+        """Read the inventory columns in one query"""
+        item = BusinessInventory
+        rows = db.session.execute(
+            select(
+                item.id, item.category, item.brand, item.condition, item.listing_status,
+                real(item.cost_of_item), real(item.selling_price), real(item.sold_price),
+                type_coerce(func.julianday(item.sold_date), Float),
+                real(func.strftime('%Y', item.sold_date)), real(func.strftime('%m', item.sold_date)),
+            ).order_by(item.id)
+        ).all()
+        return cls(rows)
+
+    # ------------------------------------------------------------------
+    # Columns and masks
+    # ------------------------------------------------------------------
+
+    def column(self, name):
+        """A float column; ``cost_cents`` / ``price_cents`` / ``sold_cents`` are rounded per row
+
+        Arrays computed from the frame (e.g. :meth:`margin_percent`) pass through.
+        """
+        if not isinstance(name, str):
+            return name
+        if not name.endswith('_cents'):
+            return self._floats[name]
+        with self._lock:
+            if name not in self._rounded:
+                values = self._floats[name[:-len('_cents')]]
+                # round() per value: numpy's rounding differs from Python's on ties
+                rounded = [round(value, 2) if value == value else value
+                           for value in (values.tolist() if np is not None else values)]
+                self._rounded[name] = np.array(rounded) if np is not None else rounded
+            return self._rounded[name]
+
+    def labels(self, name):
+        return self._labels[name]
+
+    def is_(self, name, *labels):
+        """Rows whose encoded column ``name`` is one of ``labels`` (None matches NULL)"""
+        wanted = [code for code, label in enumerate(self._labels[name]) if label in labels]
+        codes = self._codes[name]
+        if np is not None:
+            return np.isin(codes, wanted)
+        wanted = set(wanted)
+        return [code in wanted for code in codes]
+
+    def is_not(self, name, *labels):
+        """Rows whose column is not NULL and not one of ``labels`` (SQL ``!=``)"""
+        return self.is_(name, *[label for label in self._labels[name] if label is not None and label not in labels])
+
+    def has(self, name):
+        """Rows where the float column ``name`` is not NULL"""
+        values = self.column(name)
+        if np is not None:
+            return ~np.isnan(values)
+        return [value == value for value in values]
+
+    def compare(self, name, op, value):
+        """Rows where ``column <op> value`` for op in ``>=``, ``>``, ``<``, ``<=``, ``==`` (NULL never matches)"""
+        values = self.column(name)
+        if np is not None:
+            return {'>=': np.greater_equal, '>': np.greater, '<': np.less,
+                    '<=': np.less_equal, '==': np.equal}[op](values, value)
+        if op == '>=':
+            return [v >= value for v in values]
+        if op == '>':
+            return [v > value for v in values]
+        if op == '<':
+            return [v < value for v in values]
+        if op == '<=':
+            return [v <= value for v in values]
+        return [v == value for v in values]
+
+    def margin_percent(self, cost='cost_cents', price='sold_cents', no_cost=NAN):
+        """``(price - cost) / cost * 100`` per row; ``no_cost`` where cost is not positive"""
+        costs, prices = self.column(cost), self.column(price)
+        if np is not None:
+            positive = costs > 0
+            margins = np.full(self.size, no_cost)
+            margins[positive] = (prices[positive] - costs[positive]) / costs[positive] * 100
+            return margins
+        return [(p - c) / c * 100 if c > 0 else no_cost for c, p in zip(costs, prices)]
+
+    def bins(self, name, edges):
+        """Group rows by which of ``[edges[i-1], edges[i])`` holds the column; labels are bin numbers"""
+        values = self.column(name)
+        labels = list(range(len(edges) + 1)) + [_NULL_KEY]
+        if np is not None:
+            codes = np.searchsorted(np.asarray(edges, dtype=np.float64), values, side='right')
+            codes[np.isnan(values)] = len(edges) + 1
+            return GroupKey(codes, labels)
+        codes = [len(edges) + 1 if value != value else sum(1 for edge in edges if edge <= value) for value in values]
+        return GroupKey(codes, labels)
+
+    def sold_since(self, day):
+        """Rows with ``sold_date >= day``"""
+        return self.compare('sold_day', '>=', julian_day(day))
+
+    def sold_between(self, start, end):
+        """Rows with ``start <= sold_date < end``"""
+        return self.all_of(self.compare('sold_day', '>=', julian_day(start)),
+                           self.compare('sold_day', '<', julian_day(end)))
+
+    def all_of(self, *masks):
+        """Rows matching every mask"""
+        if np is not None:
+            return np.logical_and.reduce(masks) if len(masks) > 1 else masks[0]
+        return [all(bits) for bits in zip(*masks)] if len(masks) > 1 else masks[0]
+
+    # ------------------------------------------------------------------
+    # Aggregates
+    # ------------------------------------------------------------------
+
+    def count(self, mask):
+        if np is not None:
+            return int(np.count_nonzero(mask))
+        return sum(mask)
+
+    def values(self, name, mask):
+        """The column's values on ``mask`` as a list (NaN for NULL)"""
+        values = self.column(name)
+        if np is not None:
+            return values[mask].tolist()
+        return [value for value, keep in zip(values, mask) if keep]
+
+    def row_ids(self, mask, limit=None):
+        """Ids of the rows on ``mask``, in id order"""
+        if np is not None:
+            selected = self.ids[mask]
+            return (selected[:limit] if limit is not None else selected).tolist()
+        selected = [row_id for row_id, keep in zip(self.ids, mask) if keep]
+        return selected[:limit] if limit is not None else selected
+
+    def sum(self, name, mask):
+        """SQL ``SUM``: None when there are no non-NULL values"""
+        present = [value for value in self.values(name, mask) if value == value]
+        return math.fsum(present) if present else None
+
+    def avg(self, name, mask):
+        """SQL ``AVG``: None when there are no non-NULL values"""
+        present = [value for value in self.values(name, mask) if value == value]
+        return math.fsum(present) / len(present) if present else None
+
+    def group_by(self, key, mask, value=None):
+        """Count (and SUM/AVG of ``value``) per group of ``key`` on ``mask``
+
+        ``key`` is an encoded column, a float column (``sold_month``), a
+        tuple of float columns (``('sold_year', 'sold_month')``) or a
+        :meth:`bins` grouping; ``value`` a column name or computed array.
+        Groups come in SQLite ``GROUP BY`` order; only groups with rows are
+        returned.
+        """
+        codes, labels = self._group_codes(key, mask)
+        size = len(labels)
+        values = self.column(value) if value is not None else None
+
+        if np is not None:
+            selected = codes[mask]
+            counts = np.bincount(selected, minlength=size)
+            if values is not None:
+                picked = values[mask]
+                present = ~np.isnan(picked)
+                totals = np.bincount(selected[present], weights=picked[present], minlength=size)
+                nonnull = np.bincount(selected[present], minlength=size)
+            counts = counts.tolist()
+            totals = totals.tolist() if values is not None else None
+            nonnull = nonnull.tolist() if values is not None else None
+        else:
+            counts = [0] * size
+            totals = [0.0] * size
+            nonnull = [0] * size
+            for row, keep in enumerate(mask):
+                if keep:
+                    code = codes[row]
+                    counts[code] += 1
+                    if values is not None and values[row] == values[row]:
+                        totals[code] += values[row]
+                        nonnull[code] += 1
+
+        groups = []
+        for code, label in enumerate(labels):
+            if counts[code] and label is not _NULL_KEY:
+                has_values = values is not None and nonnull[code] > 0
+                groups.append(Group(
+                    label, counts[code],
+                    totals[code] if has_values else None,
+                    totals[code] / nonnull[code] if has_values else None
+                ))
+        return groups
+
+    def _group_codes(self, key, mask):
+        """(codes, labels) for ``key``; rows with a NULL float key get a trailing ``_NULL_KEY`` label"""
+        if isinstance(key, GroupKey):
+            return key
+        if isinstance(key, str) and key in self._codes:
+            return self._codes[key], self._labels[key]
+
+        names = key if isinstance(key, tuple) else (key,)
+        columns = [self.column(name) for name in names]
+        if np is not None:
+            # Small integers (years, months): one order-preserving float per combination
+            combined = columns[0]
+            for column in columns[1:]:
+                combined = combined * 10000 + column
+            present = np.unique(combined[np.logical_and(mask, ~np.isnan(combined))])
+            codes = np.searchsorted(present, combined)
+            codes[np.isnan(combined)] = len(present)
+            labels = [(int(value) // 10000, int(value) % 10000) if len(names) > 1 else int(value)
+                      for value in present.tolist()]
+            return codes, labels + [_NULL_KEY]
+
+        combos = list(zip(*columns))
+        present = sorted({combo for combo, keep in zip(combos, mask)
+                          if keep and all(part == part for part in combo)})
+        index = {combo: code for code, combo in enumerate(present)}
+        codes = [index.get(combo, len(present)) for combo in combos]
+        labels = [tuple(int(part) for part in combo) if len(names) > 1 else int(combo[0]) for combo in present]
+        return codes, labels + [_NULL_KEY]
+
+
+_frame_lock = threading.Lock()
+_cached_frame = (None, None)
+
+
+def get_inventory_frame():
+    """The :class:`InventoryFrame` for the current inventory data version
+
+    Rebuilt when ``business_inventory`` changes; without data versions (not
+    SQLite) every call loads a fresh frame.
+    """
+    global _cached_frame
+
+    versions = get_data_versions()
+    version = versions.get('business_inventory') if versions is not None else None
+    if version is None:
+        return InventoryFrame.load()
+
+    with _frame_lock:
+        cached_version, frame = _cached_frame
+        if frame is None or cached_version != version:
+            frame = InventoryFrame.load()
+            _cached_frame = (version, frame)
+        return frame
+
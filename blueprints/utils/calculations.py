@@ -3,39 +3,17 @@ Business calculations and metrics for Girasoul Business Dashboard
 """
 
 from datetime import datetime, date
-from sqlalchemy import func, extract
-from models import db, BusinessTransaction, BusinessAsset, BusinessInventory
+from models import db, BusinessAsset, BusinessInventory, get_rollup_totals
 
 def calculate_business_metrics(year, month):
     """Calculate key business metrics for dashboard"""
     try:
-        # Current month filter
-        monthly_transactions = BusinessTransaction.query.filter(
-            extract('year', BusinessTransaction.date) == year,
-            extract('month', BusinessTransaction.date) == month
-        )
-        
-        # Calculate monthly totals
-        monthly_income = monthly_transactions.filter(
-            BusinessTransaction.transaction_type == 'Income'
-        ).with_entities(func.sum(BusinessTransaction.amount)).scalar() or 0
-        
-        monthly_expenses = monthly_transactions.filter(
-            BusinessTransaction.transaction_type == 'Expense'
-        ).with_entities(func.sum(BusinessTransaction.amount)).scalar() or 0
-        
-        # Year-to-date metrics
-        ytd_transactions = BusinessTransaction.query.filter(
-            extract('year', BusinessTransaction.date) == year
-        )
-        
-        ytd_income = ytd_transactions.filter(
-            BusinessTransaction.transaction_type == 'Income'
-        ).with_entities(func.sum(BusinessTransaction.amount)).scalar() or 0
-        
-        ytd_expenses = ytd_transactions.filter(
-            BusinessTransaction.transaction_type == 'Expense'
-        ).with_entities(func.sum(BusinessTransaction.amount)).scalar() or 0
+        # Current month and year-to-date totals from the monthly rollup
+        monthly = get_rollup_totals(year, month)
+        ytd = get_rollup_totals(year)
+        
+        monthly_income, monthly_expenses = monthly['income'], monthly['expense']
+        ytd_income, ytd_expenses = ytd['income'], ytd['expense']
         
         return {
             'monthly_revenue': float(monthly_income),
@@ -60,44 +38,13 @@ def calculate_business_metrics(year, month):
 def calculate_financial_summary(year, month):
     """Calculate financial summary for the given period"""
     try:
-        # Build base query
-        base_query = BusinessTransaction.query.filter(
-            extract('year', BusinessTransaction.date) == year
-        )
-        
-        # Add month filter if specified
-        if month != 'all':
-            base_query = base_query.filter(
-                extract('month', BusinessTransaction.date) == int(month)
-            )
-        
-        # Monthly revenue
-        monthly_revenue = base_query.filter(
-            BusinessTransaction.transaction_type == 'Income'
-        ).with_entities(func.sum(BusinessTransaction.amount)).scalar() or 0
-        
-        # Monthly expenses
-        monthly_expenses = base_query.filter(
-            BusinessTransaction.transaction_type == 'Expense'
-        ).with_entities(func.sum(BusinessTransaction.amount)).scalar() or 0
+        # Period totals (whole year, or a single month if specified)
+        period = get_rollup_totals(year, month)
+        monthly_revenue, monthly_expenses = period['income'], period['expense']
         
         # YTD calculations (if month filter is applied, calculate up to that month)
-        ytd_query = BusinessTransaction.query.filter(
-            extract('year', BusinessTransaction.date) == year
-        )
-        
-        if month != 'all':
-            ytd_query = ytd_query.filter(
-                extract('month', BusinessTransaction.date) <= int(month)
-            )
-        
-        ytd_revenue = ytd_query.filter(
-            BusinessTransaction.transaction_type == 'Income'
-        ).with_entities(func.sum(BusinessTransaction.amount)).scalar() or 0
-        
-        ytd_expenses = ytd_query.filter(
-            BusinessTransaction.transaction_type == 'Expense'
-        ).with_entities(func.sum(BusinessTransaction.amount)).scalar() or 0
+        ytd = get_rollup_totals(year, month, ytd=True)
+        ytd_revenue, ytd_expenses = ytd['income'], ytd['expense']
         
         return {
             'monthly_revenue': float(monthly_revenue),
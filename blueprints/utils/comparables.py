@@ -0,0 +1,334 @@
+"""
+Comparable-sales index for Girasoul Business Dashboard
+
+Pricing an item at intake means looking at what similar items sold for.
+:class:`ComparablesIndex` keeps every previously sold item with a sold
+price - inventory items marked ``sold`` plus the imported sales history in
+``business_sold`` - in memory, bucketed at four levels from most to least
+specific:
+
+1. category + brand + condition + size
+2. category + brand + condition
+3. category + brand
+4. category
+
+Each bucket is a sorted list of sold prices, so its quartiles are index
+lookups. :meth:`ComparablesIndex.suggest` walks the levels and uses the
+first bucket with at least ``COMPARABLES_MIN_SAMPLES`` sales (or the most
+specific non-empty one): the median is the suggested price and the
+confidence grows with the number of comparables and shrinks with the
+level's generality and the spread of prices.
+
+The index is built with two queries on first use and then kept current
+from domain events (blueprints/utils/events.py):
+
+- ``inventory.sold`` carries the item's fields, and the sale is added
+  without a query
+- ``inventory.updated`` / ``inventory.deleted`` / ``inventory.imported``
+  queue the item ids, re-read in one query on the next lookup
+- a sold-history import (``transaction.imported``, kind ``sold``), too many
+  queued ids, or an index older than ``COMPARABLES_MAX_AGE`` seconds
+  (writes from other processes) rebuild it
+
+Category, brand, condition and size are compared case-insensitively with
+whitespace collapsed; empty values count as unknown.
+"""
+
+import bisect
+import logging
+import threading
+import time
+from flask import current_app, has_app_context
+from sqlalchemy import select
+from models import db, BusinessInventory, BusinessSold
+from blueprints.utils.events import event_bus
+
+logger = logging.getLogger(__name__)
+
+_EXTENSION_KEY = 'comparables_index'
+
+# (name, fields, confidence weight), most specific first
+LEVELS = (
+    ('category_brand_condition_size', ('category', 'brand', 'condition', 'size'), 1.0),
+    ('category_brand_condition', ('category', 'brand', 'condition'), 0.9),
+    ('category_brand', ('category', 'brand'), 0.75),
+    ('category', ('category',), 0.5),
+)
+
+FIELDS = ('category', 'brand', 'condition', 'size')
+
+# Comparables for full confidence on sample size
+FULL_CONFIDENCE_SAMPLES = 10
+
+# Queued ids beyond which a full rebuild is cheaper than re-reading them
+MAX_PENDING_IDS = 1000
+
+# Inventory fields that affect the index (bulk updates list the fields they set)
+_RELEVANT_FIELDS = frozenset(FIELDS + ('sold_price', 'listing_status'))
+
+
+def normalize(value):
+    """Comparison form of a category/brand/condition/size: casefolded, None when empty"""
+    if value is None:
+        return None
+    value = ' '.join(str(value).split()).casefold()
+    return value or None
+
+
+def quantile(prices, q):
+    """``q`` quantile of sorted ``prices`` (linear interpolation between neighbours)"""
+    position = (len(prices) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(prices) - 1)
+    return prices[lower] + (prices[upper] - prices[lower]) * (position - lower)
+
+
+def _bucket_keys(category, brand=None, condition=None, size=None):
+    """The (level, key) of every bucket an item belongs to (every level is a prefix of FIELDS)"""
+    values = (normalize(category), normalize(brand), normalize(condition), normalize(size))
+    keys = []
+    for level, (_, names, _) in enumerate(LEVELS):
+        key = values[:len(names)]
+        if None not in key:
+            keys.append((level, key))
+    return keys
+
+
+class ComparablesIndex:
+    """Sold prices bucketed by category/brand/condition/size (see module docstring)"""
+
+    def __init__(self, max_age=600, min_samples=3):
+        self.max_age = float(max_age)
+        self.min_samples = max(1, int(min_samples))
+        self._lock = threading.Lock()
+        self._items = {}    # ('inventory' | 'sold', id) -> (bucket keys, price)
+        self._buckets = {}  # (level, key) -> sorted prices
+        self._built_at = None
+        # Filled by event handlers, drained by lookups
+        self._events_lock = threading.Lock()
+        self._incoming_sales = []
+        self._pending_ids = set()
+        self._rebuild_requested = False
+        self.counters = {'builds': 0, 'sales_applied': 0, 'items_refreshed': 0, 'lookups': 0}
+
+    # ------------------------------------------------------------------
+    # Event intake (any thread, no database access)
+    # ------------------------------------------------------------------
+
+    def record_sale(self, item_id, price, **fields):
+        with self._events_lock:
+            self._incoming_sales.append((item_id, price, fields))
+
+    def mark_changed(self, item_ids):
+        with self._events_lock:
+            self._pending_ids.update(item_ids)
+
+    def request_rebuild(self):
+        with self._events_lock:
+            self._rebuild_requested = True
+
+    def _drain(self):
+        with self._events_lock:
+            sales, self._incoming_sales = self._incoming_sales, []
+            pending, self._pending_ids = self._pending_ids, set()
+            rebuild, self._rebuild_requested = self._rebuild_requested, False
+        return sales, pending, rebuild
+
+    # ------------------------------------------------------------------
+    # Maintenance (needs an app context)
+    # ------------------------------------------------------------------
+
+    def _put(self, item_key, fields, price):
+        self._remove(item_key)
+        if not price:
+            return
+        keys = _bucket_keys(*(fields.get(name) for name in FIELDS))
+        for bucket_key in keys:
+            bisect.insort(self._buckets.setdefault(bucket_key, []), price)
+        self._items[item_key] = (keys, price)
+
+    def _remove(self, item_key):
+        entry = self._items.pop(item_key, None)
+        if entry is None:
+            return
+        keys, price = entry
+        for bucket_key in keys:
+            prices = self._buckets[bucket_key]
+            del prices[bisect.bisect_left(prices, price)]
+            if not prices:
+                del self._buckets[bucket_key]
+
+    def _rebuild(self):
+        items, buckets = {}, {}
+        keys_for = {}  # Few distinct (category, brand, condition, size) combinations
+        for source, model, conditions in (
+            ('inventory', BusinessInventory, (BusinessInventory.listing_status == 'sold',)),
+            ('sold', BusinessSold, ()),
+        ):
+            rows = db.session.execute(
+                select(model.id, model.category, model.brand, model.condition, model.size, model.sold_price)
+                .where(model.sold_price.is_not(None), model.sold_price != 0, *conditions)
+            )
+            for item_id, category, brand, condition, size, sold_price in rows:
+                price = float(sold_price)
+                if not price:
+                    continue  # Rounds to zero
+                fields = (category, brand, condition, size)
+                keys = keys_for.get(fields)
+                if keys is None:
+                    keys = keys_for[fields] = _bucket_keys(*fields)
+                for bucket_key in keys:
+                    buckets.setdefault(bucket_key, []).append(price)
+                items[(source, item_id)] = (keys, price)
+        for prices in buckets.values():
+            prices.sort()
+
+        self._items, self._buckets = items, buckets
+        self._built_at = time.monotonic()
+        self.counters['builds'] += 1
+
+    def _refresh_items(self, item_ids):
+        """Re-read queued inventory items: drop them, then re-add the ones still sold"""
+        item = BusinessInventory
+        rows = db.session.execute(
+            select(item.id, item.category, item.brand, item.condition, item.size, item.sold_price)
+            .where(item.id.in_(item_ids), item.listing_status == 'sold')
+        ).all()
+        for item_id in item_ids:
+            self._remove(('inventory', item_id))
+        for item_id, category, brand, condition, size, sold_price in rows:
+            self._put(('inventory', item_id),
+                      {'category': category, 'brand': brand, 'condition': condition, 'size': size},
+                      float(sold_price) if sold_price is not None else None)
+        self.counters['items_refreshed'] += len(item_ids)
+
+    def _ensure_current(self):
+        # Called with self._lock held
+        sales, pending, rebuild = self._drain()
+        expired = self._built_at is None or time.monotonic() - self._built_at > self.max_age
+        if rebuild or expired or len(pending) > MAX_PENDING_IDS:
+            # The rebuild reads every committed sale, including the drained ones
+            self._rebuild()
+            return
+        for item_id, price, fields in sales:
+            self._put(('inventory', item_id), fields, price)
+        self.counters['sales_applied'] += len(sales)
+        if pending:
+            self._refresh_items(sorted(pending))
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def suggest(self, category, brand=None, condition=None, size=None):
+        """Suggested price for an item, or None without comparables in its category
+
+        Returns ``suggested_price`` (median), ``confidence`` (0-100),
+        ``basis`` (the level used), ``comparables`` (sales at that level)
+        and ``price_range`` (min, quartiles, max).
+        """
+        keys = _bucket_keys(category, brand, condition, size)
+        if not keys:
+            return None  # No category
+
+        with self._lock:
+            self._ensure_current()
+            self.counters['lookups'] += 1
+            chosen = None
+            for bucket_key in keys:
+                name, _, weight = LEVELS[bucket_key[0]]
+                prices = self._buckets.get(bucket_key)
+                if not prices:
+                    continue
+                if chosen is None or len(prices) >= self.min_samples:
+                    chosen = (name, weight, prices)
+                if len(prices) >= self.min_samples:
+                    break
+            if chosen is None:
+                return None
+
+            name, weight, prices = chosen
+            count = len(prices)
+            low, median, high = quantile(prices, 0.25), quantile(prices, 0.5), quantile(prices, 0.75)
+            lowest, highest = prices[0], prices[-1]
+
+        spread = min((high - low) / median, 1.0) if median > 0 else 1.0
+        confidence = 100 * weight * min(count, FULL_CONFIDENCE_SAMPLES) / FULL_CONFIDENCE_SAMPLES * (1 - spread / 2)
+        return {
+            'suggested_price': round(median, 2),
+            'confidence': round(confidence),
+            'basis': name,
+            'comparables': count,
+            'price_range': {
+                'min': round(lowest, 2),
+                'low': round(low, 2),
+                'median': round(median, 2),
+                'high': round(high, 2),
+                'max': round(highest, 2)
+            }
+        }
+
+    def stats(self):
+        with self._lock:
+            return dict(
+                self.counters,
+                items=len(self._items),
+                buckets=len(self._buckets),
+                age_seconds=round(time.monotonic() - self._built_at, 1) if self._built_at is not None else None
+            )
+
+
+def _on_inventory_event(domain_event):
+    # Runs in the committing thread; only records the change
+    if not has_app_context():
+        return
+    index = current_app.extensions.get(_EXTENSION_KEY)
+    if index is None:
+        return
+    payload = domain_event.payload
+    if domain_event.type == 'inventory.sold' and 'category' in payload:
+        for item_id in payload['ids']:
+            index.record_sale(item_id, round(payload['sold_price'], 2), category=payload['category'],
+                              brand=payload.get('brand'), condition=payload.get('condition'),
+                              size=payload.get('size'))
+    elif domain_event.type == 'inventory.created':
+        return  # New items have no sold price
+    elif domain_event.type == 'inventory.updated' and 'fields' in payload \
+            and not _RELEVANT_FIELDS.intersection(payload['fields']):
+        return
+    elif payload.get('ids'):
+        index.mark_changed(payload['ids'])
+    else:
+        index.request_rebuild()
+
+
+def _on_sold_import(domain_event):
+    if domain_event.payload.get('kind') == 'sold' and has_app_context():
+        index = current_app.extensions.get(_EXTENSION_KEY)
+        if index is not None:
+            index.request_rebuild()
+
+
+_subscribed = False
+
+
+def init_comparables_index(app):
+    """Create the app's index (built on first lookup) and subscribe it to inventory events"""
+    global _subscribed
+
+    index = ComparablesIndex(
+        max_age=app.config.get('COMPARABLES_MAX_AGE', 600),
+        min_samples=app.config.get('COMPARABLES_MIN_SAMPLES', 3),
+    )
+    app.extensions[_EXTENSION_KEY] = index
+
+    if not _subscribed:
+        event_bus.subscribe('inventory.*', _on_inventory_event)
+        event_bus.subscribe('transaction.imported', _on_sold_import)
+        _subscribed = True
+    return index
+
+
+def get_comparables_index():
+    """The current app's comparables index, or None when it was not initialized"""
+    return current_app.extensions.get(_EXTENSION_KEY)
@@ -0,0 +1,95 @@
+"""
+Response compression for Girasoul Business Dashboard
+
+``/api/inventory``, the transaction list and the insights endpoints return
+tens to hundreds of kilobytes of repetitive JSON. An ``after_request`` hook
+compresses such responses with brotli (when the ``brotli`` package is
+installed and the client accepts ``br``) or gzip.
+
+Only complete (non-streamed) 2xx responses are touched, and only when they
+are at least ``COMPRESSION_MIN_SIZE`` bytes, have a mimetype in
+``COMPRESSION_MIMETYPES`` and carry no ``Content-Encoding`` yet. Streamed
+exports (``/api/inventory/export``) are sent as they are. Turned on with
+``COMPRESSION_ENABLED``.
+"""
+
+import gzip
+
+try:
+    import brotli
+except ImportError:  # Optional - gzip only
+    brotli = None
+
+DEFAULT_MIMETYPES = (
+    'application/json', 'application/x-ndjson', 'text/html', 'text/css', 'text/csv',
+    'text/plain', 'text/javascript', 'application/javascript', 'image/svg+xml'
+)
+
+
+def _choose_encoding(accept_encodings):
+    """Best of ``br`` / ``gzip`` the client accepts (q > 0), or None"""
+    choices = ('br', 'gzip') if brotli is not None else ('gzip',)
+    quality = {encoding: accept_encodings[encoding] for encoding in choices}
+    best = max(choices, key=lambda encoding: quality[encoding])
+    return best if quality[best] > 0 else None
+
+
+def compress_response(response, accept_encodings, min_size=1024, mimetypes=DEFAULT_MIMETYPES,
+                      gzip_level=6, brotli_quality=4):
+    """Compress ``response`` in place when it qualifies; returns the encoding used or None"""
+    if response.mimetype not in mimetypes:
+        return None
+    response.vary.add('Accept-Encoding')
+
+    if (response.direct_passthrough or response.is_streamed
+            or not 200 <= response.status_code < 300 or response.status_code == 204
+            or 'Content-Encoding' in response.headers):
+        return None
+
+    encoding = _choose_encoding(accept_encodings)
+    if encoding is None:
+        return None
+
+    body = response.get_data()
+    if len(body) < min_size:
+        return None
+
+    if encoding == 'br':
+        compressed = brotli.compress(body, quality=brotli_quality)
+    else:
+        compressed = gzip.compress(body, compresslevel=gzip_level, mtime=0)
+    if len(compressed) >= len(body):
+        return None
+
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    # A different representation: a strong validator must not match the plain body
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(f'{etag}-{encoding}')
+    return encoding
+
+
+def init_compression(app):
+    """Register the compression hook when ``COMPRESSION_ENABLED`` is set
+
+    Returns the encodings available (e.g. ``['br', 'gzip']``), or None when
+    compression is off.
+    """
+    if not app.config.get('COMPRESSION_ENABLED'):
+        return None
+
+    from flask import request
+
+    min_size = app.config.get('COMPRESSION_MIN_SIZE', 1024)
+    mimetypes = frozenset(app.config.get('COMPRESSION_MIMETYPES') or DEFAULT_MIMETYPES)
+    gzip_level = app.config.get('COMPRESSION_GZIP_LEVEL', 6)
+    brotli_quality = app.config.get('COMPRESSION_BROTLI_QUALITY', 4)
+
+    @app.after_request
+    def compress(response):
+        compress_response(response, request.accept_encodings, min_size=min_size, mimetypes=mimetypes,
+                          gzip_level=gzip_level, brotli_quality=brotli_quality)
+        return response
+
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
@@ -0,0 +1,192 @@
+"""
+Data versions and conditional GETs for Girasoul Business Dashboard
+
+The inventory page, filters and insights re-fetch their JSON on every load
+even when nothing has changed. Each business table gets a row in
+``data_versions`` holding a version counter and the time of the last
+change. SQL triggers bump both on every insert, update and delete, so
+ORM writes, bulk statements, imports and raw SQL are all counted, and the
+new version is visible to every worker process exactly when the write
+commits (a rolled-back write never bumps it).
+
+:func:`conditional_get` turns a GET view into a conditional one. It reads
+the versions of the tables the view depends on (one lookup in a
+six-row table), derives a strong ETag from them and the request URL, and
+answers ``If-None-Match`` / ``If-Modified-Since`` with ``304 Not Modified``
+before the view's own queries run.
+"""
+
+import hashlib
+import logging
+import time
+from datetime import date, datetime, timezone
+from functools import wraps
+from flask import g, request, make_response
+from sqlalchemy import text
+from models import db
+
+logger = logging.getLogger(__name__)
+
+VERSIONS_TABLE = 'data_versions'
+
+# Tables whose writes are counted (the monthly rollup is derived from transactions)
+TRACKED_TABLES = (
+    'business_transactions', 'business_inventory', 'business_assets',
+    'business_sold', 'business_categories', 'business_conditions'
+)
+
+# Seconds since the epoch, with sub-second precision
+_NOW_EXPRESSION = "(julianday('now') - 2440587.5) * 86400.0"
+
+# None = not checked yet for this process
+_versions_ready = None
+
+
+def _trigger_statements(table):
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_version_{action.lower()} AFTER {action} ON {table} BEGIN
+            UPDATE {VERSIONS_TABLE} SET version = version + 1, updated_at = {_NOW_EXPRESSION}
+            WHERE table_name = '{table}';
+        END
+        """
+        for action in ('INSERT', 'UPDATE', 'DELETE')
+    ]
+
+
+def ensure_data_versions():
+    """Create the versions table, its rows and the bump triggers
+
+    Returns True when data versions are available. Non-SQLite databases
+    return False and conditional GETs are skipped.
+    """
+    global _versions_ready
+
+    if db.engine.dialect.name != 'sqlite':
+        _versions_ready = False
+        return False
+
+    try:
+        with db.engine.begin() as conn:
+            conn.exec_driver_sql(f"""
+                CREATE TABLE IF NOT EXISTS {VERSIONS_TABLE} (
+                    table_name TEXT PRIMARY KEY,
+                    version INTEGER NOT NULL DEFAULT 0,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            for table in TRACKED_TABLES:
+                conn.execute(
+                    text(f"INSERT OR IGNORE INTO {VERSIONS_TABLE} (table_name, version, updated_at) "
+                         f"VALUES (:table, 0, {_NOW_EXPRESSION})"),
+                    {'table': table}
+                )
+                for statement in _trigger_statements(table):
+                    conn.exec_driver_sql(statement)
+        _versions_ready = True
+    except Exception as e:
+        print(f"⚠️ Data versions unavailable, conditional GETs disabled: {e}")
+        _versions_ready = False
+
+    return _versions_ready
+
+
+def data_versions_available():
+    """Whether the versions table exists in the current database"""
+    global _versions_ready
+
+    if _versions_ready is None:
+        if db.engine.dialect.name != 'sqlite':
+            _versions_ready = False
+        else:
+            _versions_ready = db.session.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {'name': VERSIONS_TABLE}
+            ).first() is not None
+    return _versions_ready
+
+
+def get_data_versions():
+    """``{table_name: (version, updated_at)}`` for every tracked table, or None when unavailable"""
+    if not data_versions_available():
+        return None
+    rows = db.session.execute(text(f'SELECT table_name, version, updated_at FROM {VERSIONS_TABLE}'))
+    return {name: (version, updated_at) for name, version, updated_at in rows}
+
+
+def mark_response_stale():
+    """Keep :func:`conditional_get` from validating this response
+
+    For views that answer from a cache older than the current data versions:
+    an ETag for the current versions must not be attached to an older body.
+    """
+    g.data_versions_stale = True
+
+
+def _not_modified(etag, last_modified):
+    """Whether the request's validators match; returns the matching ETag (or True) or None"""
+    if_none_match = request.if_none_match
+    if if_none_match:
+        # Compressed responses carry the encoding as an ETag suffix
+        for candidate in (etag, f'{etag}-gzip', f'{etag}-br'):
+            if if_none_match.contains_weak(candidate):
+                return candidate
+        return None
+    # If-Modified-Since only counts when no ETag was sent (RFC 9110)
+    if last_modified is not None and request.if_modified_since is not None:
+        if last_modified <= request.if_modified_since:
+            return True
+    return None
+
+
+def conditional_get(*tables, daily=False):
+    """Serve ``304 Not Modified`` for a GET view while ``tables`` are unchanged
+
+    The strong ETag covers the request path and query string plus the
+    versions of ``tables``; ``daily=True`` adds today's date for views that
+    depend on it ("last 30 days", "this month"). Only 200 responses get the
+    validators. Views run normally when data versions are unavailable.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                versions = get_data_versions()
+            except Exception as e:
+                logger.warning("Data versions unavailable for %s: %s", request.path, e)
+                versions = None
+            if versions is None:
+                return view(*args, **kwargs)
+
+            counters = [versions.get(table, (0, 0.0)) for table in tables]
+            # The change times keep a rebuilt database (versions back at 0) from matching old ETags
+            key = '|'.join([request.full_path] + [
+                f'{table}={version}@{updated_at!r}' for table, (version, updated_at) in zip(tables, counters)
+            ])
+            if daily:
+                key += f'|{date.today().isoformat()}'
+            etag = hashlib.sha1(key.encode()).hexdigest()[:24]
+
+            # Last-Modified has one-second resolution: leave it off while the
+            # current second may still see another write
+            changed_at = max((updated_at for _, updated_at in counters), default=0.0)
+            last_modified = None
+            if int(changed_at) < int(time.time()) and not daily:
+                last_modified = datetime.fromtimestamp(int(changed_at), tz=timezone.utc)
+
+            matched = _not_modified(etag, last_modified)
+            if matched:
+                response = make_response('', 304)
+                response.set_etag(matched if isinstance(matched, str) else etag)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200 or g.pop('data_versions_stale', False):
+                    return response
+                response.set_etag(etag)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+
+        return wrapper
+    return decorator
@@ -3,16 +3,388 @@ Database utilities for Girasoul Business Dashboard
 """
 
 import os
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
 from datetime import datetime, date
+from functools import wraps
 from pathlib import Path
+from flask import jsonify, request, current_app, has_app_context, has_request_context
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
 from models import db, BusinessTransaction, BusinessAsset, BusinessInventory, BusinessCategory
 
+_UNIT_OF_WORK_KEY = 'unit_of_work'
+_READ_ONLY_KEY = 'read_only'
+
+DEFAULT_WRITE_RETRY_DEADLINE = 10  # seconds
+DEFAULT_WRITE_RETRY_BASE_DELAY_MS = 10
+DEFAULT_WRITE_RETRY_MAX_DELAY_MS = 500
+_LOCK_WAIT_SAMPLES = 512
+
 def ensure_data_directory():
     """Ensure the data directory exists"""
     data_dir = Path(__file__).parent.parent.parent / 'data'
     data_dir.mkdir(exist_ok=True)
     return data_dir
 
+def configure_sqlite_engine(engine, pragmas):
+    """Apply the configured SQLite pragmas to every new connection of ``engine``
+    
+    Pragmas are per-connection in SQLite, so they are set from a ``connect``
+    event rather than once at startup. Non-SQLite engines are left untouched.
+    """
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return False
+    
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
+    
+    return True
+
+class UnitOfWork:
+    """The database transaction shared by nested :func:`transaction_scope` blocks"""
+    
+    def __init__(self, session):
+        self.session = session
+        self.depth = 0
+        self.rollback_only = False
+    
+    def rollback(self):
+        """Discard everything in this unit of work when the outermost scope exits"""
+        self.rollback_only = True
+
+def current_unit_of_work():
+    """The unit of work open on the current session, or None"""
+    return db.session.info.get(_UNIT_OF_WORK_KEY)
+
+def begin_immediate(session):
+    """Take SQLite's write lock now instead of at the first INSERT/UPDATE/DELETE
+    
+    The sqlite3 driver opens transactions lazily and DEFERRED, so a
+    read-then-write sequence only competes for the write lock at its first
+    write. ``BEGIN IMMEDIATE`` waits for the lock up front (honouring
+    busy_timeout), so whatever the block reads next is current until it
+    commits. No-op on other databases, or when this connection already holds
+    the lock because the unit of work has written.
+    """
+    connection = session.connection()
+    if connection.dialect.name != 'sqlite':
+        return False
+    if connection.connection.driver_connection.in_transaction:
+        return False
+    connection.exec_driver_sql('BEGIN IMMEDIATE')
+    return True
+
+@contextmanager
+def transaction_scope(immediate=False):
+    """Run a block as one database transaction, joining an enclosing one if open
+    
+    The outermost scope commits once when its block finishes (or rolls back
+    on an exception or after ``unit.rollback()``). Inner scopes - a service
+    called from another service or from a :func:`transactional` view - only
+    flush; an exception or ``rollback()`` inside them marks the whole unit for
+    rollback. Code inside a scope must not call ``db.session.commit()``.
+    
+    ``immediate=True`` starts the write transaction with :func:`begin_immediate`
+    for blocks that check a row and then change it.
+    """
+    session = db.session
+    unit = session.info.get(_UNIT_OF_WORK_KEY)
+    
+    if unit is not None:
+        unit.depth += 1
+        try:
+            if immediate:
+                begin_immediate(session)
+            yield unit
+            session.flush()
+        except BaseException:
+            unit.rollback_only = True
+            raise
+        finally:
+            unit.depth -= 1
+        return
+    
+    unit = UnitOfWork(session)
+    session.info[_UNIT_OF_WORK_KEY] = unit
+    try:
+        if immediate:
+            begin_immediate(session)
+        yield unit
+        if unit.rollback_only:
+            session.rollback()
+        else:
+            session.commit()
+    except BaseException:
+        session.rollback()
+        raise
+    finally:
+        session.info.pop(_UNIT_OF_WORK_KEY, None)
+
+@contextmanager
+def savepoint_scope():
+    """Run a block in a SAVEPOINT of the open unit of work
+    
+    Lets one unit of work carry several independent operations: an exception
+    or ``unit.rollback()`` inside the block rolls back to the savepoint only,
+    and the rest of the unit still commits.
+    """
+    session = db.session
+    unit = session.info.get(_UNIT_OF_WORK_KEY)
+    if unit is None:
+        raise RuntimeError('savepoint_scope() needs an open transaction_scope()')
+    
+    outer_rollback_only = unit.rollback_only
+    unit.rollback_only = False
+    savepoint = session.begin_nested()
+    try:
+        yield unit
+        if unit.rollback_only:
+            savepoint.rollback()
+        else:
+            savepoint.commit()
+    except BaseException:
+        savepoint.rollback()
+        raise
+    finally:
+        unit.rollback_only = outer_rollback_only
+
+@event.listens_for(Session, 'after_begin')
+def _begin_read_only(session, transaction, connection):
+    if session.info.get(_READ_ONLY_KEY):
+        _set_query_only(connection)
+
+def _set_query_only(connection):
+    if connection.dialect.name == 'sqlite' and not connection.info.get(_READ_ONLY_KEY):
+        connection.exec_driver_sql('PRAGMA query_only = ON')
+        connection.info[_READ_ONLY_KEY] = True
+
+def _reset_query_only(dbapi_connection, connection_record):
+    # Pool checkin: the next borrower gets a writable connection again
+    if connection_record.info.pop(_READ_ONLY_KEY, False) and dbapi_connection is not None:
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute('PRAGMA query_only = OFF')
+        finally:
+            cursor.close()
+
+@contextmanager
+def read_only_scope():
+    """Run a block on a read-only ``db.session``
+    
+    For work that must never write, such as insights sections computed on
+    worker threads. On SQLite every connection the session uses inside the
+    block is set to ``PRAGMA query_only``, so an INSERT/UPDATE/DELETE fails
+    with "attempt to write a readonly database"; the pragma is cleared when
+    the connection returns to the pool. The session is closed on exit.
+    Other databases run the block unprotected.
+    """
+    engine = db.engine
+    if engine.dialect.name == 'sqlite' and not event.contains(engine, 'checkin', _reset_query_only):
+        event.listen(engine, 'checkin', _reset_query_only)
+    
+    session = db.session()
+    session.info[_READ_ONLY_KEY] = True
+    try:
+        if session.in_transaction():
+            _set_query_only(session.connection())
+        yield session
+    finally:
+        session.info.pop(_READ_ONLY_KEY, None)
+        session.close()
+
+def is_lock_error(error):
+    """True for SQLite's "database is locked" / busy errors, which are worth retrying"""
+    if not isinstance(error, OperationalError):
+        return False
+    message = str(getattr(error, 'orig', error)).lower()
+    return 'database is locked' in message or 'database table is locked' in message or 'busy' in message
+
+class WriteContentionMetrics:
+    """Per-endpoint write attempts, lock-wait time and busy retries"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+    
+    def record(self, name, lock_wait, retries, gave_up):
+        with self._lock:
+            stats = self._endpoints.get(name)
+            if stats is None:
+                stats = self._endpoints[name] = {
+                    'writes': 0, 'retries': 0, 'retried_writes': 0, 'gave_up': 0,
+                    'lock_wait_total': 0.0, 'lock_wait_max': 0.0,
+                    'lock_waits': deque(maxlen=_LOCK_WAIT_SAMPLES)
+                }
+            stats['writes'] += 1
+            stats['retries'] += retries
+            stats['retried_writes'] += 1 if retries else 0
+            stats['gave_up'] += 1 if gave_up else 0
+            stats['lock_wait_total'] += lock_wait
+            stats['lock_wait_max'] = max(stats['lock_wait_max'], lock_wait)
+            stats['lock_waits'].append(lock_wait)
+    
+    def snapshot(self):
+        with self._lock:
+            snapshot = {}
+            for name, stats in sorted(self._endpoints.items()):
+                waits = sorted(stats['lock_waits'])
+                snapshot[name] = {
+                    'writes': stats['writes'],
+                    'retries': stats['retries'],
+                    'retried_writes': stats['retried_writes'],
+                    'gave_up': stats['gave_up'],
+                    'lock_wait_ms': {
+                        'mean': round(stats['lock_wait_total'] / stats['writes'] * 1000, 2),
+                        'p95': round(waits[min(len(waits) - 1, int(len(waits) * 0.95))] * 1000, 2),
+                        'max': round(stats['lock_wait_max'] * 1000, 2),
+                    }
+                }
+            return snapshot
+    
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+write_contention_metrics = WriteContentionMetrics()
+
+def _write_retry_settings():
+    config = current_app.config if has_app_context() else {}
+    return (
+        config.get('WRITE_RETRY_DEADLINE', DEFAULT_WRITE_RETRY_DEADLINE),
+        config.get('WRITE_RETRY_BASE_DELAY_MS', DEFAULT_WRITE_RETRY_BASE_DELAY_MS) / 1000,
+        config.get('WRITE_RETRY_MAX_DELAY_MS', DEFAULT_WRITE_RETRY_MAX_DELAY_MS) / 1000,
+    )
+
+def run_write_transaction(name, body):
+    """Run ``body(unit)`` as a write transaction, retrying while the database is locked
+    
+    Each attempt opens the unit of work with ``BEGIN IMMEDIATE``, so the
+    write lock is taken before ``body`` runs and "database is locked" can
+    only surface when beginning or committing - never halfway through the
+    work. Locked attempts are rolled back and retried after a jittered
+    exponential backoff until WRITE_RETRY_DEADLINE seconds have passed,
+    then the last error is raised. Time spent waiting for the lock
+    (SQLite's own busy_timeout wait plus backoff) and retry counts are
+    recorded under ``name``.
+    
+    Inside an open unit of work ``body`` just joins it; whoever opened the
+    unit owns the retries.
+    """
+    session = db.session
+    unit = session.info.get(_UNIT_OF_WORK_KEY)
+    if unit is not None:
+        with transaction_scope(immediate=True) as unit:
+            return body(unit)
+    
+    deadline_seconds, base_delay, max_delay = _write_retry_settings()
+    deadline = time.monotonic() + deadline_seconds
+    lock_wait = 0.0
+    retries = 0
+    
+    while True:
+        try:
+            with transaction_scope() as unit:
+                waiting_since = time.monotonic()
+                try:
+                    begin_immediate(session)
+                finally:
+                    lock_wait += time.monotonic() - waiting_since
+                result = body(unit)
+        except OperationalError as e:
+            locked = is_lock_error(e)
+            now = time.monotonic()
+            if not locked or now >= deadline:
+                write_contention_metrics.record(name, lock_wait, retries, gave_up=locked)
+                raise
+            delay = min(max_delay, base_delay * (2 ** retries)) * random.uniform(0.5, 1.5)
+            delay = min(delay, deadline - now)
+            retries += 1
+            time.sleep(delay)
+            lock_wait += delay
+            continue
+        
+        write_contention_metrics.record(name, lock_wait, retries, gave_up=False)
+        return result
+
+def write_transaction(name=None):
+    """Decorator form of :func:`run_write_transaction` for service-layer writes"""
+    def decorator(func):
+        label = name or func.__qualname__
+        
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            return run_write_transaction(label, lambda unit: func(*args, **kwargs))
+        
+        return wrapper
+    
+    return decorator
+
+BUSY_RESULT = {'success': False, 'error': 'The database is busy, please retry', 'busy': True}
+
+def busy_response(result):
+    """JSON 503 with Retry-After for a write that never got the database lock"""
+    response = jsonify(result)
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+def _response_status(rv):
+    if isinstance(rv, tuple):
+        if len(rv) > 1 and isinstance(rv[1], int):
+            return rv[1]
+        rv = rv[0]
+    return getattr(rv, 'status_code', 200)
+
+def transactional(view):
+    """Make a Flask view one unit of work: a single commit per request
+    
+    Service calls inside the view join the request's transaction instead of
+    committing on their own. Error responses (status >= 400) roll everything
+    back. The view runs as a :func:`run_write_transaction` under its endpoint
+    name, so it is retried while the database is locked; a write that still
+    cannot get the lock becomes a JSON 503, any other failed commit a 500.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        def body(unit):
+            rv = view(*args, **kwargs)
+            if _response_status(rv) >= 400:
+                unit.rollback()
+            return rv
+        
+        name = request.endpoint if has_request_context() else view.__name__
+        try:
+            return run_write_transaction(name, body)
+        except OperationalError as e:
+            if not is_lock_error(e):
+                print(f"❌ Error committing {view.__name__}: {e}")
+                return jsonify({'success': False, 'error': str(e)}), 500
+            print(f"⚠️ Gave up waiting for the database write lock in {view.__name__}: {e}")
+            return busy_response(BUSY_RESULT)
+        except Exception as e:
+            print(f"❌ Error committing {view.__name__}: {e}")
+            return jsonify({'success': False, 'error': str(e)}), 500
+    
+    return wrapper
+
+def get_sqlite_pragmas():
+    """Read back the effective pragma values from a live connection"""
+    pragmas = {}
+    with db.engine.connect() as conn:
+        for name in ('journal_mode', 'synchronous', 'busy_timeout', 'cache_size', 'mmap_size', 'temp_store'):
+            pragmas[name] = conn.exec_driver_sql(f'PRAGMA {name}').scalar()
+    return pragmas
+
 def create_database_tables():
     """Create all database tables if they don't exist"""
     try:
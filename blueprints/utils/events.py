@@ -0,0 +1,229 @@
+"""
+Domain event bus for Girasoul Business Dashboard
+
+Services announce what changed - ``inventory.created``, ``inventory.sold``,
+``transaction.updated``, ... - with :func:`emit`. Events are held on the
+database session and published only after the transaction they belong to
+commits: a rolled-back unit of work (or savepoint) drops its events, so
+subscribers never hear about changes that did not happen.
+
+Subscribers register at startup with :func:`subscribe` (an exact event
+type, ``'inventory.*'`` for a domain or ``'*'`` for everything) and are
+called synchronously in the committing thread, from the session's
+``after_commit`` hook. They should be quick and must not use the session
+that just committed - anything slow belongs on a background thread. A
+failing subscriber is logged and does not affect the others or the
+request.
+
+Each domain also has a version counter, increased once per published
+event, for caches that only need to know *whether* a domain changed. The
+counters are per process; the ``data_versions`` table
+(blueprints/utils/data_versions.py) is the cross-process equivalent.
+
+Derived data that must commit together with the write is not kept from
+here, since subscribers only run once the commit is done:
+
+- the inventory FTS index and ``data_versions`` are SQL triggers, which
+  also see raw SQL and other processes
+- the monthly ledger rollup is updated by BusinessTransaction mapper events
+  inside the same flush (models.py), so it commits with the ledger rows.
+  Like the bus, those only see ORM writes; raw SQL must call
+  ``apply_rollup_for_transactions()`` or ``rebuild_monthly_rollup()``
+"""
+
+import logging
+import threading
+import time
+from collections import defaultdict
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+_PENDING_KEY = 'pending_domain_events'
+
+# Every event type that can be emitted, by domain
+EVENT_TYPES = frozenset([
+    'inventory.created', 'inventory.updated', 'inventory.sold',
+    'inventory.deleted', 'inventory.imported',
+    'transaction.created', 'transaction.updated', 'transaction.deleted', 'transaction.imported',
+    'transaction.linked',
+    'asset.created', 'asset.updated', 'asset.disposed', 'asset.deleted', 'asset.depreciated',
+    'category.created', 'condition.created',
+])
+
+DOMAINS = frozenset(event_type.split('.', 1)[0] for event_type in EVENT_TYPES)
+
+
+class UnknownEventType(ValueError):
+    """Raised when emitting an event type that is not in EVENT_TYPES"""
+
+
+class DomainEvent:
+    """Something that changed in one domain: ``type`` plus a small payload"""
+
+    __slots__ = ('type', 'domain', 'payload', 'occurred_at', 'version')
+
+    def __init__(self, event_type, payload):
+        self.type = event_type
+        self.domain = event_type.split('.', 1)[0]
+        self.payload = payload
+        self.occurred_at = time.time()
+        self.version = None  # Domain version, set when published
+
+    def to_dict(self):
+        return {
+            'type': self.type,
+            'domain': self.domain,
+            'payload': self.payload,
+            'occurred_at': self.occurred_at,
+            'version': self.version
+        }
+
+    def __repr__(self):
+        return f'<DomainEvent {self.type} {self.payload}>'
+
+
+class EventBus:
+    """Subscriber registry, publisher and per-domain version counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(list)
+        self._versions = {domain: 0 for domain in DOMAINS}
+        self._published = defaultdict(int)
+        self._subscriber_errors = 0
+
+    def subscribe(self, pattern, handler):
+        """Call ``handler(event)`` for events matching ``pattern`` ('inventory.sold', 'inventory.*', '*')"""
+        domain, _, name = pattern.partition('.')
+        if pattern != '*' and (domain not in DOMAINS or (name != '*' and pattern not in EVENT_TYPES)):
+            raise UnknownEventType(f'Unknown event pattern: {pattern}')
+        with self._lock:
+            self._subscribers[pattern].append(handler)
+        return handler
+
+    def unsubscribe(self, pattern, handler):
+        with self._lock:
+            if handler in self._subscribers.get(pattern, []):
+                self._subscribers[pattern].remove(handler)
+
+    def version(self, domain):
+        """Published events so far in ``domain`` (monotonically increasing)"""
+        return self._versions[domain]
+
+    def versions(self):
+        with self._lock:
+            return dict(self._versions)
+
+    def publish(self, events):
+        """Bump the domain versions and deliver ``events`` to their subscribers"""
+        for domain_event in events:
+            with self._lock:
+                self._versions[domain_event.domain] += 1
+                domain_event.version = self._versions[domain_event.domain]
+                self._published[domain_event.type] += 1
+                handlers = (self._subscribers.get(domain_event.type, [])
+                            + self._subscribers.get(f'{domain_event.domain}.*', [])
+                            + self._subscribers.get('*', []))
+            for handler in handlers:
+                try:
+                    handler(domain_event)
+                except Exception:
+                    self._subscriber_errors += 1
+                    logger.exception("Event subscriber %r failed for %s", handler, domain_event.type)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'versions': dict(self._versions),
+                'published': dict(self._published),
+                'subscribers': {pattern: len(handlers) for pattern, handlers in self._subscribers.items() if handlers},
+                'subscriber_errors': self._subscriber_errors
+            }
+
+
+event_bus = EventBus()
+
+_default_subscribers_registered = False
+
+
+def subscribe(pattern):
+    """Decorator form of ``event_bus.subscribe(pattern, handler)``"""
+    def decorator(handler):
+        return event_bus.subscribe(pattern, handler)
+    return decorator
+
+
+def register_default_subscribers():
+    """Subscribe the app's own caches; safe to call once per create_app()
+
+    Returns the number of subscriptions added (0 when already registered).
+    """
+    global _default_subscribers_registered
+
+    if _default_subscribers_registered:
+        return 0
+    from blueprints.utils.pagination import clear_count_cache
+
+    def invalidate_counts(domain_event):
+        clear_count_cache()
+
+    for pattern in ('inventory.*', 'transaction.*'):
+        event_bus.subscribe(pattern, invalidate_counts)
+    _default_subscribers_registered = True
+    return 2
+
+
+def emit(event_type, session=None, **payload):
+    """Queue a domain event on the session; it is published after the transaction commits
+
+    With no transaction open (nothing to commit) the event is published at
+    once.
+    """
+    if event_type not in EVENT_TYPES:
+        raise UnknownEventType(f'Unknown event type: {event_type}')
+    if session is None:
+        from models import db
+        session = db.session()
+
+    domain_event = DomainEvent(event_type, payload)
+    transaction = session.get_nested_transaction() or session.get_transaction()
+    if transaction is None:
+        event_bus.publish([domain_event])
+    else:
+        session.info.setdefault(_PENDING_KEY, []).append((transaction, domain_event))
+    return domain_event
+
+
+def _within(transaction, ancestor):
+    while transaction is not None:
+        if transaction is ancestor:
+            return True
+        transaction = transaction.parent
+    return False
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _drop_rolled_back_events(session, previous_transaction):
+    pending = session.info.get(_PENDING_KEY)
+    if pending:
+        # A savepoint rollback only drops the events emitted inside it
+        pending[:] = [(transaction, domain_event) for transaction, domain_event in pending
+                      if not _within(transaction, previous_transaction)]
+
+
+@event.listens_for(Session, 'after_commit')
+def _publish_committed_events(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        event_bus.publish([domain_event for _, domain_event in pending])
+
+
+@event.listens_for(Session, 'after_transaction_end')
+def _drop_unpublished_events(session, transaction):
+    # A session closed without commit() or rollback() still discards its events
+    if transaction.parent is None:
+        pending = session.info.get(_PENDING_KEY)
+        if pending:
+            pending[:] = [(t, domain_event) for t, domain_event in pending if not _within(t, transaction)]
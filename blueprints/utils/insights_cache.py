@@ -0,0 +1,318 @@
+"""
+Insights cache for Girasoul Business Dashboard
+
+Every insights section (overview, inventory, sales, profit, trends) is a
+few dozen aggregate queries plus Python scoring, and the ``/insights`` page
+and ``/api/insights/*`` endpoints used to recompute them on every request.
+
+Results are cached per section under a *version key*: the data versions of
+the tables the insights read (blueprints/utils/data_versions.py) plus
+today's date, since several metrics are "last 30 days" / "this month".
+
+- Same key: the cached payload is served.
+- Different key (the data changed): the cached payload is served as it is
+  and a recompute is scheduled (stale-while-revalidate), unless it is older
+  than ``INSIGHTS_CACHE_MAX_STALE`` seconds, in which case the request
+  recomputes it.
+- Nothing cached yet: the request computes it; concurrent requests for the
+  same section wait for that one computation.
+
+Recomputes run on one background thread. Committed inventory and
+transaction events (blueprints/utils/events.py) schedule a recompute of the
+cached sections, debounced by ``INSIGHTS_CACHE_DEBOUNCE_MS`` so a burst of
+sells costs one recompute; writes from other processes are noticed by the
+version check on the next read. Failed computations are never cached.
+"""
+
+import atexit
+import logging
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import date, datetime
+from flask import current_app, has_app_context
+from blueprints.utils.data_versions import get_data_versions, mark_response_stale
+from blueprints.utils.events import event_bus
+
+logger = logging.getLogger(__name__)
+
+_EXTENSION_KEY = 'insights_cache'
+_STOP = object()
+_MAX_JOBS_KEPT = 50
+
+# Tables the insights read
+INSIGHTS_TABLES = ('business_inventory', 'business_transactions')
+
+
+class RefreshJob:
+    """A scheduled recompute of some sections"""
+
+    def __init__(self, sections, force, reason, not_before=0.0):
+        self.id = uuid.uuid4().hex
+        self.sections = list(sections)
+        self.force = force
+        self.reason = reason
+        self.not_before = not_before
+        self.status = 'queued'
+        self.queued_at = datetime.now()
+        self.started_at = None
+        self.finished_at = None
+        self.computed = []
+        self.fresh = []
+        self.failed = []
+
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'reason': self.reason,
+            'sections': self.sections,
+            'computed': self.computed,
+            'already_fresh': self.fresh,
+            'failed': self.failed,
+            'queued_at': self.queued_at.isoformat(),
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+
+class _Entry:
+    __slots__ = ('key', 'payload', 'computed_at', 'compute_seconds')
+
+    def __init__(self, key, payload, compute_seconds):
+        self.key = key
+        self.payload = payload
+        self.computed_at = time.time()
+        self.compute_seconds = compute_seconds
+
+
+class InsightsCache:
+    """Versioned per-section cache with a background recompute thread
+
+    ``compute(section)`` returns a section's payload (a dict with
+    ``success``); ``sections`` lists the valid section names.
+    """
+
+    def __init__(self, app, compute, sections, max_stale=900, debounce_ms=500):
+        self.app = app
+        self.compute = compute
+        self.sections = tuple(sections)
+        self.max_stale = float(max_stale)
+        self.debounce = max(0.0, float(debounce_ms)) / 1000
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._section_locks = {section: threading.Lock() for section in self.sections}
+        self._queue = queue.Queue()
+        self._jobs = OrderedDict()
+        self._pending_event_job = None
+        self._thread = None
+        self.counters = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'recomputes': 0, 'failures': 0}
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='insights-cache', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=5):
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def version_key(self):
+        """Data versions of the insights tables plus today's date (needs an app context)"""
+        versions = get_data_versions()
+        if versions is None:
+            # No versions table (not SQLite): this process's event counters
+            counters = tuple(event_bus.version(domain) for domain in ('inventory', 'transaction'))
+        else:
+            counters = tuple(versions.get(table, (0, 0.0)) for table in INSIGHTS_TABLES)
+        return counters, date.today().isoformat()
+
+    def get(self, section):
+        """The section's payload, from the cache where possible"""
+        key = self.version_key()
+        with self._lock:
+            entry = self._entries.get(section)
+        if entry is not None and entry.key == key:
+            self._count('hits')
+            return entry.payload
+        if entry is not None and time.time() - entry.computed_at <= self.max_stale:
+            self._count('stale_hits')
+            self.schedule([section], reason='stale')
+            mark_response_stale()
+            return entry.payload
+
+        # Nothing usable: compute here, once per section however many requests wait
+        with self._section_locks[section]:
+            with self._lock:
+                entry = self._entries.get(section)
+            if entry is not None and entry.key == key:
+                self._count('hits')
+                return entry.payload
+            self._count('misses')
+            return self._recompute(section, key)
+
+    def _recompute(self, section, key):
+        # Callers hold the section lock, so one computation per section at a time
+        started = time.perf_counter()
+        payload = self.compute(section)
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            if payload.get('success'):
+                self._entries[section] = _Entry(key, payload, elapsed)
+                self.counters['recomputes'] += 1
+            else:
+                self.counters['failures'] += 1
+        return payload
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+
+    # ------------------------------------------------------------------
+    # Background recompute
+    # ------------------------------------------------------------------
+
+    def schedule(self, sections=None, force=False, reason='manual'):
+        """Queue a recompute of ``sections`` (default: all) and return its job
+
+        Event-triggered jobs wait out the debounce window and absorb any
+        further events that arrive meanwhile.
+        """
+        sections = [section for section in (sections or self.sections) if section in self._section_locks]
+        with self._lock:
+            pending = self._pending_event_job
+            if reason in ('event', 'stale') and pending is not None and pending.status == 'queued':
+                pending.sections.extend(section for section in sections if section not in pending.sections)
+                return pending
+            not_before = time.monotonic() + self.debounce if reason == 'event' else 0.0
+            job = RefreshJob(sections, force, reason, not_before)
+            if reason in ('event', 'stale'):
+                self._pending_event_job = job
+            self._jobs[job.id] = job
+            while len(self._jobs) > _MAX_JOBS_KEPT:
+                self._jobs.popitem(last=False)
+        self.start()
+        self._queue.put(job)
+        return job
+
+    def data_changed(self):
+        """Schedule a recompute of the sections currently cached"""
+        with self._lock:
+            cached = list(self._entries)
+        if cached:
+            self.schedule(cached, reason='event')
+
+    def job(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is _STOP:
+                return
+            delay = job.not_before - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            try:
+                self._run_job(job)
+            except Exception:
+                logger.exception("Insights refresh job %s failed", job.id)
+                job.status = 'failed'
+                job.finished_at = datetime.now()
+
+    def _run_job(self, job):
+        with self._lock:
+            job.status = 'running'
+            if self._pending_event_job is job:
+                self._pending_event_job = None
+        job.started_at = datetime.now()
+        with self.app.app_context():
+            for section in list(job.sections):
+                with self._section_locks[section]:
+                    key = self.version_key()
+                    with self._lock:
+                        entry = self._entries.get(section)
+                    if not job.force and entry is not None and entry.key == key:
+                        job.fresh.append(section)
+                        continue
+                    payload = self._recompute(section, key)
+                    (job.computed if payload.get('success') else job.failed).append(section)
+        job.status = 'failed' if job.failed else 'done'
+        job.finished_at = datetime.now()
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+
+    def stats(self):
+        now = time.time()
+        with self._lock:
+            return dict(
+                self.counters,
+                enabled=True,
+                queue_depth=self._queue.qsize(),
+                sections={
+                    section: {
+                        'age_seconds': round(now - entry.computed_at, 1),
+                        'compute_ms': round(entry.compute_seconds * 1000, 1),
+                        'computed_at': datetime.fromtimestamp(entry.computed_at).isoformat()
+                    }
+                    for section, entry in self._entries.items()
+                }
+            )
+
+
+def _on_data_changed(domain_event):
+    # Runs in the committing thread; only queues work
+    if has_app_context():
+        cache = current_app.extensions.get(_EXTENSION_KEY)
+        if cache is not None:
+            cache.data_changed()
+
+
+_subscribed = False
+
+
+def init_insights_cache(app, compute, sections):
+    """Create the cache and its worker thread when ``INSIGHTS_CACHE_ENABLED`` is set"""
+    global _subscribed
+
+    if not app.config.get('INSIGHTS_CACHE_ENABLED'):
+        return None
+    cache = InsightsCache(
+        app, compute, sections,
+        max_stale=app.config.get('INSIGHTS_CACHE_MAX_STALE', 900),
+        debounce_ms=app.config.get('INSIGHTS_CACHE_DEBOUNCE_MS', 500),
+    )
+    cache.start()
+    atexit.register(cache.stop)
+    app.extensions[_EXTENSION_KEY] = cache
+
+    if not _subscribed:
+        for pattern in ('inventory.*', 'transaction.*'):
+            event_bus.subscribe(pattern, _on_data_changed)
+        _subscribed = True
+    return cache
+
+
+def get_insights_cache():
+    """The current app's insights cache, or None when caching is off"""
+    return current_app.extensions.get(_EXTENSION_KEY)
+
+
+def insights_cache_stats():
+    """Metrics for the stats endpoint; ``{'enabled': False}`` when caching is off"""
+    cache = get_insights_cache()
+    return cache.stats() if cache is not None else {'enabled': False}
@@ -0,0 +1,88 @@
+"""
+JSON provider for Girasoul Business Dashboard
+
+Flask's default provider runs every ``jsonify`` through the stdlib encoder,
+which is a large share of the time spent on big payloads like
+``/api/inventory`` or the insights endpoints. :class:`FastJSONProvider`
+encodes with orjson when it is installed - straight to bytes, no
+intermediate ``str`` - and falls back to the stdlib encoder otherwise, or
+for anything orjson cannot encode (e.g. integers wider than 64 bits).
+
+Both paths produce the same JSON: sorted keys, compact separators (indented
+in debug, like Flask), dates/datetimes as ISO 8601 strings and ``Decimal``
+as a number. Turned on with ``FAST_JSON_ENABLED``.
+"""
+
+import dataclasses
+import decimal
+import json
+import uuid
+from datetime import date, datetime, time
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # Optional - the stdlib encoder is used instead
+    orjson = None
+
+
+def _default(o):
+    """Types the encoders do not handle on their own"""
+    if isinstance(o, (datetime, date, time)):
+        return o.isoformat()
+    if isinstance(o, decimal.Decimal):
+        return float(o)
+    if isinstance(o, uuid.UUID):
+        return str(o)
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+    raise TypeError(f'Object of type {type(o).__name__} is not JSON serializable')
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """orjson-backed JSON provider with a stdlib fallback"""
+
+    default = staticmethod(_default)
+
+    _ORJSON_OPTIONS = (orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS) if orjson is not None else 0
+
+    def _indent(self):
+        return self.compact is False or (self.compact is None and self._app.debug)
+
+    def _encode(self, obj, indent=False):
+        """``obj`` as UTF-8 JSON bytes"""
+        if orjson is not None:
+            options = self._ORJSON_OPTIONS | (orjson.OPT_INDENT_2 if indent else 0)
+            try:
+                return orjson.dumps(obj, default=_default, option=options)
+            except TypeError:
+                pass  # e.g. an int wider than 64 bits - let the stdlib encoder have it
+        layout = {'indent': 2} if indent else {'separators': (',', ':')}
+        text = json.dumps(obj, default=_default, sort_keys=self.sort_keys, ensure_ascii=self.ensure_ascii, **layout)
+        return text.encode('utf-8')
+
+    def dumps(self, obj, **kwargs):
+        # Callers passing encoder options (cls=, indent=, ...) get the stdlib encoder
+        if kwargs:
+            kwargs.setdefault('default', _default)
+            return super().dumps(obj, **kwargs)
+        return self._encode(obj).decode('utf-8')
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        body = self._encode(obj, indent=self._indent())
+        return self._app.response_class(body + b'\n', mimetype=self.mimetype)
+
+
+def init_json_provider(app):
+    """Install :class:`FastJSONProvider` when ``FAST_JSON_ENABLED`` is set
+
+    Returns the encoder in use (``'orjson'`` or ``'stdlib'``), or None when
+    Flask's default provider is kept.
+    """
+    if not app.config.get('FAST_JSON_ENABLED'):
+        return None
+    app.json = FastJSONProvider(app)
+    return 'orjson' if orjson is not None else 'stdlib'
@@ -0,0 +1,150 @@
+"""
+Keyset (cursor) pagination helpers for Girasoul Business Dashboard
+
+``query.paginate()`` runs ``OFFSET n`` plus a full ``COUNT(*)`` for every
+page, so page 500 of the ledger reads 500 pages of rows first. Keyset
+pagination instead remembers the sort key of the last row shown and asks for
+rows strictly after it (``WHERE (date, id) < (:date, :id)``), which is an
+index range scan that costs the same on every page.
+
+Cursors are opaque url-safe tokens; clients only pass back the
+``next_cursor`` / ``prev_cursor`` values they were given. Totals are
+optional and come from a short-lived cache, so they are approximate.
+"""
+
+import base64
+import json
+import threading
+import time
+from datetime import date, datetime
+from sqlalchemy import tuple_, func, select
+
+DEFAULT_COUNT_TTL = 30  # seconds
+_COUNT_CACHE_MAX_ENTRIES = 256
+
+_count_cache = {}
+_count_cache_lock = threading.Lock()
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor token cannot be decoded for the requested sort"""
+
+
+def _encode_value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _decode_value(column, value):
+    python_type = column.type.python_type
+    if python_type is date:
+        return date.fromisoformat(value)
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    return python_type(value)
+
+
+def encode_cursor(values, direction='next'):
+    """Build an opaque cursor token from a row's sort-key values"""
+    payload = json.dumps({'k': [_encode_value(v) for v in values], 'd': direction}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, sort_columns):
+    """Decode a cursor token into ``(values, direction)`` for ``sort_columns``"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = payload['k']
+        direction = payload.get('d', 'next')
+        if len(values) != len(sort_columns) or direction not in ('next', 'prev'):
+            raise ValueError('cursor does not match sort order')
+        return [_decode_value(column, value) for column, value in zip(sort_columns, values)], direction
+    except Exception as e:
+        raise InvalidCursor(f'Invalid pagination cursor: {e}') from e
+
+
+def _key_expression(sort_columns):
+    return sort_columns[0] if len(sort_columns) == 1 else tuple_(*sort_columns)
+
+
+def _key_values(values):
+    return values[0] if len(values) == 1 else tuple_(*values)
+
+
+def keyset_paginate(query, sort_columns, cursor=None, per_page=20):
+    """Fetch one page of ``query`` ordered newest-first by ``sort_columns``
+
+    ``sort_columns`` must be unique together (end with the primary key), e.g.
+    ``[BusinessTransaction.date, BusinessTransaction.id]``. Any ``order_by``
+    already on ``query`` is replaced.
+
+    Returns ``(items, info)`` where ``info`` carries ``per_page``,
+    ``has_next``/``has_prev`` and the ``next_cursor``/``prev_cursor`` tokens.
+    Raises :class:`InvalidCursor` for a malformed cursor.
+    """
+    values, direction = (None, 'next')
+    if cursor:
+        values, direction = decode_cursor(cursor, sort_columns)
+
+    key = _key_expression(sort_columns)
+    query = query.order_by(None)
+
+    if direction == 'next':
+        if values is not None:
+            query = query.filter(key < _key_values(values))
+        rows = query.order_by(*[column.desc() for column in sort_columns]).limit(per_page + 1).all()
+        has_more = len(rows) > per_page
+        items = rows[:per_page]
+        has_next, has_prev = has_more, values is not None
+    else:
+        query = query.filter(key > _key_values(values))
+        rows = query.order_by(*[column.asc() for column in sort_columns]).limit(per_page + 1).all()
+        has_more = len(rows) > per_page
+        items = list(reversed(rows[:per_page]))
+        has_next, has_prev = True, has_more
+
+    def row_key(item):
+        return [getattr(item, column.key) for column in sort_columns]
+
+    info = {
+        'per_page': per_page,
+        'has_next': has_next and bool(items),
+        'has_prev': has_prev and bool(items),
+        'next_cursor': encode_cursor(row_key(items[-1]), 'next') if has_next and items else None,
+        'prev_cursor': encode_cursor(row_key(items[0]), 'prev') if has_prev and items else None,
+    }
+    return items, info
+
+
+def cached_count(query, ttl=DEFAULT_COUNT_TTL):
+    """Row count for ``query``, cached for ``ttl`` seconds per distinct SQL + parameters
+
+    Good enough for "about N results" labels without a COUNT(*) per page;
+    the value may lag recent writes by up to ``ttl`` seconds.
+    """
+    statement = query.order_by(None).statement
+    compiled = statement.compile()
+    cache_key = (str(compiled), tuple(sorted((k, str(v)) for k, v in compiled.params.items())))
+    now = time.monotonic()
+
+    with _count_cache_lock:
+        cached = _count_cache.get(cache_key)
+        if cached and cached[1] > now:
+            return cached[0]
+
+    count_statement = select(func.count()).select_from(statement.subquery())
+    total = query.session.execute(count_statement).scalar() or 0
+
+    with _count_cache_lock:
+        if len(_count_cache) >= _COUNT_CACHE_MAX_ENTRIES:
+            _count_cache.clear()
+        _count_cache[cache_key] = (total, now + ttl)
+    return total
+
+
+def clear_count_cache():
+    """Forget every cached count (called when inventory or transactions change)"""
+    with _count_cache_lock:
+        _count_cache.clear()
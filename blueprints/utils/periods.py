@@ -0,0 +1,108 @@
+"""
+Reporting period helpers for Girasoul Business Dashboard
+
+Turns the year/month/YTD/"all" selections used across the dashboard, financial
+page, services and insights into half-open ``date >= start AND date < end``
+ranges. Unlike ``extract('year', date) == ...`` these predicates can use the
+index on the date column, so monthly and YTD totals become index range scans.
+"""
+
+from datetime import date
+from sqlalchemy import extract
+
+
+def _normalize(value):
+    """Return an int for a concrete year/month selection, None for 'all'/empty"""
+    if value is None or value == '' or value == 'all':
+        return None
+    return int(value)
+
+
+def month_range(year, month):
+    """Half-open range covering a single calendar month"""
+    start = date(year, month, 1)
+    end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return start, end
+
+
+def year_range(year):
+    """Half-open range covering a calendar year"""
+    return date(year, 1, 1), date(year + 1, 1, 1)
+
+
+def ytd_range(year, month=None):
+    """Half-open range from January 1st through the end of ``month`` (or the whole year)"""
+    month = _normalize(month)
+    if month is None:
+        return year_range(year)
+    return date(year, 1, 1), month_range(year, month)[1]
+
+
+def period_range(year=None, month=None, ytd=False):
+    """Resolve a year/month selection to ``(start, end)``
+
+    Returns ``(None, None)`` when the selection is not a contiguous range
+    (all years, or a month across all years).
+    """
+    year = _normalize(year)
+    month = _normalize(month)
+
+    if year is None:
+        return None, None
+    if ytd:
+        return ytd_range(year, month)
+    if month is None:
+        return year_range(year)
+    return month_range(year, month)
+
+
+def period_filters(column, year=None, month=None, ytd=False):
+    """Build filter clauses on ``column`` for a year/month selection
+
+    Concrete years become a single index-friendly range. "All years" combined
+    with a specific month is not a contiguous range, so that one case still
+    falls back to ``extract('month', ...)``.
+    """
+    year = _normalize(year)
+    month = _normalize(month)
+
+    if year is not None:
+        start, end = period_range(year, month, ytd=ytd)
+        return [column >= start, column < end]
+
+    if month is not None:
+        if ytd:
+            return [extract('month', column) <= month]
+        return [extract('month', column) == month]
+
+    return []
+
+
+def apply_period(query, column, year=None, month=None, ytd=False):
+    """Apply :func:`period_filters` to a query"""
+    clauses = period_filters(column, year, month, ytd=ytd)
+    return query.filter(*clauses) if clauses else query
+
+
+def previous_month(year, month):
+    """Return (year, month) for the month before the given one"""
+    if month == 1:
+        return year - 1, 12
+    return year, month - 1
+
+
+def period_key_filters(year_column, month_column, year=None, month=None, ytd=False):
+    """Build filter clauses for tables keyed by integer (year, month) columns
+
+    Same selection semantics as :func:`period_filters`, for pre-aggregated
+    tables such as ``business_monthly_rollup``.
+    """
+    year = _normalize(year)
+    month = _normalize(month)
+
+    clauses = []
+    if year is not None:
+        clauses.append(year_column == year)
+    if month is not None:
+        clauses.append(month_column <= month if ytd else month_column == month)
+    return clauses
@@ -0,0 +1,176 @@
+"""
+Inventory full-text search for Girasoul Business Dashboard
+
+Mirrors the searchable text of business_inventory (name, description, sku,
+brand, drop_field) into an SQLite FTS5 table so the search box becomes an
+index lookup instead of five ``ILIKE '%x%'`` scans. The FTS table is an
+external-content table kept in sync by SQL triggers, so ORM writes, bulk
+``query.update()`` calls and raw SQL all stay searchable.
+
+Each word typed is matched as a prefix ("lev jea" finds "Levi's jeans") and
+results are ranked by bm25, with name matches weighted highest.
+"""
+
+import re
+from sqlalchemy import text, select, func, literal_column, or_
+from models import db, BusinessInventory
+
+SEARCH_TABLE = 'business_inventory_fts'
+SEARCH_COLUMNS = ('name', 'description', 'sku', 'brand', 'drop_field')
+
+# bm25 weights, in SEARCH_COLUMNS order
+SEARCH_WEIGHTS = (10.0, 1.0, 5.0, 5.0, 2.0)
+
+_TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+# None = not checked yet for this process
+_search_index_ready = None
+
+_CREATE_STATEMENTS = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+        {', '.join(SEARCH_COLUMNS)},
+        content='business_inventory',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS business_inventory_fts_insert AFTER INSERT ON business_inventory BEGIN
+        INSERT INTO {SEARCH_TABLE}(rowid, {', '.join(SEARCH_COLUMNS)})
+        VALUES (new.id, {', '.join('new.' + c for c in SEARCH_COLUMNS)});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS business_inventory_fts_delete AFTER DELETE ON business_inventory BEGIN
+        INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, {', '.join(SEARCH_COLUMNS)})
+        VALUES ('delete', old.id, {', '.join('old.' + c for c in SEARCH_COLUMNS)});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS business_inventory_fts_update
+    AFTER UPDATE OF {', '.join(SEARCH_COLUMNS)} ON business_inventory BEGIN
+        INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, {', '.join(SEARCH_COLUMNS)})
+        VALUES ('delete', old.id, {', '.join('old.' + c for c in SEARCH_COLUMNS)});
+        INSERT INTO {SEARCH_TABLE}(rowid, {', '.join(SEARCH_COLUMNS)})
+        VALUES (new.id, {', '.join('new.' + c for c in SEARCH_COLUMNS)});
+    END
+    """,
+]
+
+
+def ensure_inventory_search_index():
+    """Create the FTS5 table and sync triggers, populating them on first run
+
+    Returns True when full-text search is available. Non-SQLite databases and
+    SQLite builds without FTS5 return False and search falls back to ILIKE.
+    """
+    global _search_index_ready
+
+    if db.engine.dialect.name != 'sqlite':
+        _search_index_ready = False
+        return False
+
+    try:
+        with db.engine.begin() as conn:
+            existed = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {'name': SEARCH_TABLE}
+            ).first() is not None
+            for statement in _CREATE_STATEMENTS:
+                conn.exec_driver_sql(statement)
+            if not existed:
+                conn.exec_driver_sql(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')")
+        _search_index_ready = True
+    except Exception as e:
+        print(f"⚠️ Full-text search unavailable, using LIKE search: {e}")
+        _search_index_ready = False
+
+    return _search_index_ready
+
+
+def rebuild_inventory_search_index():
+    """Re-index every inventory row (after restoring a backup, etc.)"""
+    if not search_index_available():
+        return False
+    with db.engine.begin() as conn:
+        conn.exec_driver_sql(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')")
+    return True
+
+
+def search_index_available():
+    """Whether the FTS5 table exists in the current database"""
+    global _search_index_ready
+
+    if _search_index_ready is None:
+        if db.engine.dialect.name != 'sqlite':
+            _search_index_ready = False
+        else:
+            _search_index_ready = db.session.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {'name': SEARCH_TABLE}
+            ).first() is not None
+    return _search_index_ready
+
+
+def build_match_expression(search_term):
+    """Turn free text into an FTS5 prefix query
+
+    Every word becomes a quoted prefix term and all words must match, so
+    user input can never produce an FTS syntax error. Returns None when the
+    text has no searchable words.
+    """
+    tokens = _TOKEN_PATTERN.findall(search_term or '')
+    if not tokens:
+        return None
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def inventory_search_condition(search_term):
+    """WHERE clause selecting items that match ``search_term`` (no ranking)
+
+    For statements that cannot join, such as set-based UPDATEs. Returns None
+    for an empty search.
+    """
+    if not search_term or not search_term.strip():
+        return None
+
+    if not search_index_available():
+        pattern = f"%{search_term}%"
+        return or_(*[getattr(BusinessInventory, column).ilike(pattern) for column in SEARCH_COLUMNS])
+
+    match = build_match_expression(search_term)
+    if match is None:
+        return db.false()
+
+    fts = literal_column(SEARCH_TABLE)
+    matching_ids = select(literal_column('rowid')).select_from(text(SEARCH_TABLE)).where(fts.op('MATCH')(match))
+    return BusinessInventory.id.in_(matching_ids)
+
+
+def apply_inventory_search(query, search_term):
+    """Restrict a BusinessInventory query to items matching ``search_term``
+
+    Matching rows are ordered by relevance; callers can append their own
+    ``order_by`` as a tie-breaker. Other filters on ``query`` (status,
+    condition, brand, drop) are left untouched and combine as usual.
+    """
+    if not search_term or not search_term.strip():
+        return query
+
+    if not search_index_available():
+        pattern = f"%{search_term}%"
+        return query.filter(or_(*[getattr(BusinessInventory, column).ilike(pattern) for column in SEARCH_COLUMNS]))
+
+    match = build_match_expression(search_term)
+    if match is None:
+        return query.filter(db.false())
+
+    fts = literal_column(SEARCH_TABLE)
+    matches = select(
+        literal_column('rowid').label('item_id'),
+        func.bm25(fts, *SEARCH_WEIGHTS).label('rank')
+    ).select_from(text(SEARCH_TABLE)).where(fts.op('MATCH')(match)).subquery()
+
+    return query.join(matches, matches.c.item_id == BusinessInventory.id).order_by(matches.c.rank)
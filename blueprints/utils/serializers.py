@@ -0,0 +1,167 @@
+"""
+Projection serializers for list endpoints
+
+``Model.query.all()`` followed by ``to_dict()`` hydrates an ORM object per
+row, converts every Numeric through ``Decimal`` and then to float, and
+evaluates ``margin_percentage`` / ``profit_amount`` row by row in Python.
+For a list response none of that is needed.
+
+A :class:`Projection` selects exactly the keys ``to_dict()`` returns as plain
+Row tuples: money comes back as REAL (no ``Decimal``), dates as ISO strings
+and margin/profit are computed by the database. Each projection compiles a
+row converter once - the key tuple plus the few per-column conversions -
+so building a dict is ``dict(zip(keys, row))`` and a handful of ``round()``
+calls.
+
+Money is rounded in Python rather than with SQL ``ROUND()`` because SQLite
+rounds the decimal text (27.075 -> 27.08) while ``to_dict()`` rounds the
+stored binary value (27.075 -> 27.07), and tax-inclusive prices hit that
+case often. Margin/profit are computed in SQL from clean two-decimal
+prices; the rare row with more decimals is flagged and recomputed in
+Python, so the output matches ``to_dict()`` exactly.
+
+Projections wrap existing queries with ``with_entities``, so filters,
+full-text search joins and keyset pagination apply unchanged.
+"""
+
+from sqlalchemy import Float, String, and_, case, cast, func, null, select, type_coerce
+from models import BusinessInventory, BusinessTransaction
+
+
+def real(column):
+    """The stored value as a float (integers stored by NUMERIC affinity included)"""
+    return type_coerce(column + 0.0, Float)
+
+
+def iso_date(column):
+    """``value.isoformat() if value else None`` without parsing into ``date``"""
+    return cast(column, String)
+
+
+def money(value):
+    """``float(value) if value else 0.0`` for a Numeric(10, 2) column"""
+    # ``or``: a value that rounds to (-)0.00 is falsy as a Decimal too
+    return (round(value, 2) or 0.0) if value else 0.0
+
+
+def optional_money(value):
+    """``float(value) if value else None`` for a Numeric(10, 2) column"""
+    return (round(value, 2) or None) if value else None
+
+
+class Projection:
+    """Column-projected select for one model with a precompiled row -> dict converter
+
+    ``fields`` are ``(key, expression)`` or ``(key, expression, convert)``
+    tuples; ``convert`` is applied to that value in Python. ``exact`` is an
+    optional ``(condition, recompute)`` pair: the condition is selected as
+    a trailing column and ``recompute(item)`` fixes up rows where it is
+    false.
+    """
+
+    def __init__(self, fields, exact=None):
+        self.keys = tuple(field[0] for field in fields)
+        columns = [field[1].label(field[0]) for field in fields]
+        if exact is not None:
+            columns.append(exact[0].label('_exact'))
+        self.columns = tuple(columns)
+        self.to_dict = self._compile(
+            [(field[0], field[2]) for field in fields if len(field) > 2],
+            exact[1] if exact is not None else None
+        )
+
+    def _compile(self, conversions, recompute):
+        keys = self.keys
+        width = len(keys)
+        conversions = tuple(conversions)
+
+        if not conversions and recompute is None:
+            return lambda row: dict(zip(keys, row))
+
+        def to_dict(row):
+            item = dict(zip(keys, row))
+            for key, convert in conversions:
+                item[key] = convert(item[key])
+            if recompute is not None and not row[width]:
+                recompute(item)
+            return item
+
+        return to_dict
+
+    def select(self):
+        """``select()`` of the projected columns, for new statements"""
+        return select(*self.columns)
+
+    def apply(self, query):
+        """The same ``Model.query`` (filters, joins, order) returning projected rows"""
+        return query.with_entities(*self.columns)
+
+    def to_dicts(self, rows):
+        to_dict = self.to_dict
+        return [to_dict(row) for row in rows]
+
+
+def _recompute_inventory_profit(item):
+    """BusinessInventory.margin_percentage / profit_amount from the rounded prices"""
+    price, cost = item['selling_price'], item['cost_of_item']
+    if price and cost:
+        item['margin_percentage'] = ((price - cost) / price) * 100
+        item['profit_amount'] = price - cost
+    else:
+        item['margin_percentage'] = item['profit_amount'] = 0
+
+
+def _inventory_projection():
+    cost = real(BusinessInventory.cost_of_item)
+    price = real(BusinessInventory.selling_price)
+    # to_dict(): only when both are set and non-zero, otherwise 0
+    priced = and_(price != 0, cost != 0)
+    # SQL arithmetic matches Python only when both prices have at most two decimals
+    clean = and_(
+        func.coalesce(cost, 0) == func.round(func.coalesce(cost, 0), 2),
+        func.coalesce(price, 0) == func.round(func.coalesce(price, 0), 2)
+    )
+    return Projection([
+        ('id', BusinessInventory.id),
+        ('sku', BusinessInventory.sku),
+        ('name', BusinessInventory.name),
+        ('description', BusinessInventory.description),
+        ('category', BusinessInventory.category),
+        ('cost_of_item', cost, money),
+        ('selling_price', price, money),
+        ('sold_price', real(BusinessInventory.sold_price), optional_money),
+        ('w_tax_price', real(BusinessInventory.w_tax_price), optional_money),
+        ('listing_status', BusinessInventory.listing_status),
+        ('date_added', null()),  # Temporarily disabled on the model
+        ('sold_date', iso_date(BusinessInventory.sold_date)),
+        ('location', BusinessInventory.location),
+        ('size', BusinessInventory.size),
+        ('condition', BusinessInventory.condition),
+        ('brand', BusinessInventory.brand),
+        ('drop_field', BusinessInventory.drop_field),
+        ('margin_percentage', type_coerce(case((priced, (price - cost) / price * 100), else_=0), Float)),
+        ('profit_amount', type_coerce(case((priced, price - cost), else_=0), Float)),
+    ], exact=(clean, _recompute_inventory_profit))
+
+
+def _transaction_projection():
+    return Projection([
+        ('id', BusinessTransaction.id),
+        ('date', iso_date(BusinessTransaction.date)),
+        ('description', BusinessTransaction.description),
+        ('amount', real(BusinessTransaction.amount), money),
+        ('category', BusinessTransaction.category),
+        ('sub_category', BusinessTransaction.sub_category),
+        ('transaction_type', BusinessTransaction.transaction_type),
+        ('account_name', BusinessTransaction.account_name),
+        ('vendor', BusinessTransaction.vendor),
+        ('invoice_number', BusinessTransaction.invoice_number),
+        ('notes', BusinessTransaction.notes),
+        ('source_type', BusinessTransaction.source_type),
+        ('source_id', BusinessTransaction.source_id),
+    ])
+
+
+# Same keys and values as BusinessInventory.to_dict() / BusinessTransaction.to_dict()
+inventory_projection = _inventory_projection()
+transaction_projection = _transaction_projection()
@@ -0,0 +1,140 @@
+"""
+Read-only task pool for Girasoul Business Dashboard
+
+The ``/insights`` page needs five independent sections (overview,
+inventory, sales, profit, trends). Computed one after another, a page
+with nothing cached took as long as all five together, and one failing
+section took the whole page down to its error fallback.
+
+:class:`TaskPool` runs such tasks concurrently on a bounded set of worker
+threads shared by all requests (``INSIGHTS_PARALLEL_WORKERS``). Each task
+runs in its own app context, so it gets its own scoped ``db.session``,
+inside :func:`read_only_scope`, so its connection rejects writes.
+
+:meth:`TaskPool.run` gives every task ``INSIGHTS_SECTION_TIMEOUT`` seconds
+from submission. A task that raises or runs out of time is replaced by
+``fallback(name, error)`` and the other tasks are unaffected. A timed-out
+task that has not started yet is cancelled; one already running finishes in
+the background and its result is dropped (the insights cache still stores
+it for the next request).
+"""
+
+import atexit
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from flask import current_app
+from blueprints.utils.database import read_only_scope
+
+logger = logging.getLogger(__name__)
+
+_EXTENSION_KEY = 'task_pool'
+
+
+class TaskTimeout(Exception):
+    """A task did not finish within its timeout"""
+
+
+class TaskPool:
+    """Bounded worker threads running read-only tasks, each in its own app context"""
+
+    def __init__(self, app, max_workers=5, timeout=10):
+        self.app = app
+        self.max_workers = max(1, int(max_workers))
+        self.timeout = float(timeout) if timeout else None
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='task-pool')
+        self._lock = threading.Lock()
+        self.counters = {'tasks': 0, 'completed': 0, 'failed': 0, 'timed_out': 0}
+
+    def stop(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run_task(self, func):
+        with self.app.app_context():
+            with read_only_scope():
+                return func()
+
+    def run(self, tasks, fallback):
+        """Run ``{name: callable}`` concurrently and return ``{name: result}``
+
+        A task that raises or times out gets ``fallback(name, error)``
+        instead, with a :class:`TaskTimeout` as the error on timeout.
+        """
+        submitted = time.monotonic()
+        futures = {name: self._executor.submit(self._run_task, func) for name, func in tasks.items()}
+        self._count('tasks', len(futures))
+
+        results = {}
+        for name, future in futures.items():
+            remaining = None
+            if self.timeout is not None:
+                remaining = max(0.0, submitted + self.timeout - time.monotonic())
+            try:
+                results[name] = future.result(timeout=remaining)
+                self._count('completed')
+            except FutureTimeoutError:
+                future.cancel()
+                self._count('timed_out')
+                logger.warning("Task %s timed out after %ss", name, self.timeout)
+                results[name] = fallback(name, TaskTimeout(f'{name} timed out after {self.timeout:g}s'))
+            except Exception as e:
+                self._count('failed')
+                logger.error("Task %s failed: %s", name, e)
+                results[name] = fallback(name, e)
+        return results
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def stats(self):
+        with self._lock:
+            return dict(
+                self.counters,
+                enabled=True,
+                max_workers=self.max_workers,
+                timeout_seconds=self.timeout
+            )
+
+
+def init_task_pool(app):
+    """Create the worker pool when ``INSIGHTS_PARALLEL_WORKERS`` is above 0"""
+    workers = app.config.get('INSIGHTS_PARALLEL_WORKERS', 0)
+    if not workers or workers <= 0:
+        return None
+    pool = TaskPool(app, max_workers=workers, timeout=app.config.get('INSIGHTS_SECTION_TIMEOUT', 10))
+    atexit.register(pool.stop)
+    app.extensions[_EXTENSION_KEY] = pool
+    return pool
+
+
+def get_task_pool():
+    """The current app's task pool, or None when tasks run sequentially"""
+    return current_app.extensions.get(_EXTENSION_KEY)
+
+
+def run_tasks(tasks, fallback):
+    """Run ``{name: callable}`` on the task pool, or one after another in this context without one
+
+    Either way a task that raises gets ``fallback(name, error)``; timeouts
+    only apply on the pool.
+    """
+    pool = get_task_pool()
+    if pool is not None:
+        return pool.run(tasks, fallback)
+
+    results = {}
+    for name, func in tasks.items():
+        try:
+            results[name] = func()
+        except Exception as e:
+            logger.error("Task %s failed: %s", name, e)
+            results[name] = fallback(name, e)
+    return results
+
+
+def task_pool_stats():
+    """Metrics for the stats endpoint; ``{'enabled': False}`` when tasks run sequentially"""
+    pool = get_task_pool()
+    return pool.stats() if pool is not None else {'enabled': False}
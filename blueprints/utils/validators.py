@@ -396,6 +396,68 @@ def validate_report_data(data):
     
     return {'valid': True}
 
+def validate_sold_data(data):
+    """Validate a sold item record (business_sold)"""
+    required_fields = ['sku', 'name', 'category', 'cost_of_item', 'sold_price', 'sold_date', 'platform']
+    validation = validate_required_fields(data, required_fields)
+    if not validation['valid']:
+        return validation
+    
+    validation = validate_sku(data['sku'])
+    if not validation['valid']:
+        return validation
+    
+    validation = validate_string_length(data['name'], 'Name', min_length=2, max_length=100)
+    if not validation['valid']:
+        return validation
+    
+    validation = validate_currency_amount(data['cost_of_item'], 'Cost per unit', allow_zero=True)
+    if not validation['valid']:
+        return validation
+    
+    validation = validate_currency_amount(data['sold_price'], 'Sold price', allow_zero=True)
+    if not validation['valid']:
+        return validation
+    
+    if data.get('selling_price'):
+        validation = validate_currency_amount(data['selling_price'], 'Selling price', allow_zero=True)
+        if not validation['valid']:
+            return validation
+    
+    validation = validate_date_string(data['sold_date'], 'Sold date')
+    if not validation['valid']:
+        return validation
+    
+    validation = validate_string_length(data['category'], 'Category', min_length=2, max_length=50)
+    if not validation['valid']:
+        return validation
+    
+    validation = validate_string_length(data['platform'], 'Platform', min_length=1, max_length=50)
+    if not validation['valid']:
+        return validation
+    
+    return {'valid': True}
+
+# Batch Validation (CSV import)
+
+def validate_batch(rows, validator, first_row_number=1):
+    """Run a single-record validator over a batch of records
+    
+    Returns ``(valid_rows, errors)``; ``errors`` is a list of
+    ``{'row': n, 'error': message}`` numbered from ``first_row_number``.
+    """
+    valid_rows = []
+    errors = []
+    
+    for offset, row in enumerate(rows):
+        validation = validator(row)
+        if validation['valid']:
+            valid_rows.append(row)
+        else:
+            errors.append({'row': first_row_number + offset, 'error': validation['error']})
+    
+    return valid_rows, errors
+
 def sanitize_input(value, max_length=None):
     """Sanitize user input by removing potentially harmful characters"""
     if not isinstance(value, str):
@@ -0,0 +1,256 @@
+"""
+Group-commit write queue for Girasoul Business Dashboard
+
+SQLite has a single writer lock, and every sell or create normally takes it
+for its own transaction (and, with synchronous=FULL, its own fsync). During a
+live-stream drop dozens of sells a second queue up on that lock.
+
+With ``WRITE_QUEUE_ENABLED`` the sell and create endpoints hand their
+service call to a dedicated writer thread instead. The writer drains
+whatever has queued up (waiting at most ``WRITE_QUEUE_MAX_WAIT_MS`` for
+more, up to ``WRITE_QUEUE_MAX_BATCH`` requests) and runs the batch in one
+``BEGIN IMMEDIATE`` transaction, each request in its own SAVEPOINT so a
+failed request does not undo the others. Results are handed back to the
+waiting requests only after the batch has committed.
+
+The queue is off by default; :func:`run_write` then runs the service call
+inline as its own write transaction.
+"""
+
+import atexit
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from flask import current_app, request, has_request_context
+from blueprints.utils.database import (
+    savepoint_scope, run_write_transaction, is_lock_error, BUSY_RESULT
+)
+
+logger = logging.getLogger(__name__)
+
+_EXTENSION_KEY = 'write_queue'
+_STOP = object()
+_SAMPLE_SIZE = 1024
+_BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+
+class WriteQueueTimeout(Exception):
+    """Raised when a queued write was not started within the result timeout"""
+
+
+def _percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class WriteQueueMetrics:
+    """Batch size and latency counters, with a sliding window for percentiles"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.jobs = 0
+        self.failed_jobs = 0
+        self.failed_batches = 0
+        self.max_batch_size = 0
+        self.batch_size_histogram = {bucket: 0 for bucket in _BATCH_SIZE_BUCKETS}
+        self._queue_waits = deque(maxlen=_SAMPLE_SIZE)
+        self._batch_times = deque(maxlen=_SAMPLE_SIZE)
+
+    def record_batch(self, size, queue_waits, batch_seconds, failed_jobs, committed):
+        with self._lock:
+            self.batches += 1
+            self.jobs += size
+            self.failed_jobs += failed_jobs
+            self.failed_batches += 0 if committed else 1
+            self.max_batch_size = max(self.max_batch_size, size)
+            bucket = next((b for b in _BATCH_SIZE_BUCKETS if size <= b), _BATCH_SIZE_BUCKETS[-1])
+            self.batch_size_histogram[bucket] += 1
+            self._queue_waits.extend(queue_waits)
+            self._batch_times.append(batch_seconds)
+
+    def snapshot(self):
+        with self._lock:
+            queue_waits = list(self._queue_waits)
+            batch_times = list(self._batch_times)
+            return {
+                'batches': self.batches,
+                'jobs': self.jobs,
+                'failed_jobs': self.failed_jobs,
+                'failed_batches': self.failed_batches,
+                'mean_batch_size': round(self.jobs / self.batches, 2) if self.batches else 0.0,
+                'max_batch_size': self.max_batch_size,
+                'batch_size_histogram': {f'<={bucket}': count for bucket, count in self.batch_size_histogram.items()},
+                'queue_wait_ms': {
+                    'p50': round(_percentile(queue_waits, 0.50) * 1000, 2),
+                    'p95': round(_percentile(queue_waits, 0.95) * 1000, 2),
+                    'max': round(max(queue_waits, default=0.0) * 1000, 2),
+                },
+                'batch_ms': {
+                    'p50': round(_percentile(batch_times, 0.50) * 1000, 2),
+                    'p95': round(_percentile(batch_times, 0.95) * 1000, 2),
+                },
+            }
+
+
+class WriteQueue:
+    """A writer thread that runs queued service calls in group-committed batches"""
+
+    def __init__(self, app, max_batch=64, max_wait_ms=2, result_timeout=30):
+        self.app = app
+        self.max_batch = max(1, int(max_batch))
+        self.max_wait = max(0, float(max_wait_ms)) / 1000
+        self.result_timeout = result_timeout
+        self.metrics = WriteQueueMetrics()
+        self._queue = queue.Queue()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='write-queue', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=5):
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+
+    def submit(self, func, *args, **kwargs):
+        """Queue ``func(*args, **kwargs)`` and wait for its result once its batch commits"""
+        future = Future()
+        self._queue.put((future, time.perf_counter(), func, args, kwargs))
+        try:
+            return future.result(timeout=self.result_timeout)
+        except FutureTimeoutError:
+            if future.cancel():
+                raise WriteQueueTimeout(f'Write not started within {self.result_timeout}s')
+            # Already running - its batch is about to commit or fail
+            return future.result()
+
+    def stats(self):
+        return dict(self.metrics.snapshot(), enabled=True, queue_depth=self._queue.qsize(),
+                    max_batch=self.max_batch, max_wait_ms=self.max_wait * 1000)
+
+    # ------------------------------------------------------------------
+    # Writer thread
+    # ------------------------------------------------------------------
+
+    def _next_batch(self):
+        job = self._queue.get()
+        if job is _STOP:
+            return None
+        batch = [job]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            try:
+                remaining = deadline - time.perf_counter()
+                job = self._queue.get_nowait() if remaining <= 0 else self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if job is _STOP:
+                self._queue.put(_STOP)
+                break
+            batch.append(job)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            try:
+                self._run_batch(batch)
+            except Exception:
+                logger.exception("Write queue batch failed")
+
+    def _run_batch(self, batch):
+        started = time.perf_counter()
+        jobs = [job for job in batch if job[0].set_running_or_notify_cancel()]
+        queue_waits = [started - enqueued for _, enqueued, _, _, _ in jobs]
+        outcomes = []
+
+        def run_jobs(unit):
+            # Starts over if the batch has to be retried for the write lock
+            outcomes.clear()
+            for future, _, func, args, kwargs in jobs:
+                try:
+                    with savepoint_scope():
+                        outcomes.append((future, func(*args, **kwargs), None))
+                except Exception as e:
+                    outcomes.append((future, None, e))
+
+        committed = False
+        try:
+            with self.app.app_context():
+                run_write_transaction('write_queue.batch', run_jobs)
+            committed = True
+        except Exception as e:
+            logger.exception("Write queue commit failed for %d queued writes", len(jobs))
+            for future, _, _, _, _ in jobs:
+                future.set_exception(e)
+        else:
+            for future, result, error in outcomes:
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+        finally:
+            failed = sum(1 for _, _, error in outcomes if error is not None) if committed else len(jobs)
+            self.metrics.record_batch(len(jobs), queue_waits, time.perf_counter() - started,
+                                      failed, committed)
+
+
+def init_write_queue(app):
+    """Start the writer thread when ``WRITE_QUEUE_ENABLED`` is set"""
+    if not app.config.get('WRITE_QUEUE_ENABLED'):
+        return None
+    write_queue = WriteQueue(
+        app,
+        max_batch=app.config.get('WRITE_QUEUE_MAX_BATCH', 64),
+        max_wait_ms=app.config.get('WRITE_QUEUE_MAX_WAIT_MS', 2),
+        result_timeout=app.config.get('WRITE_QUEUE_RESULT_TIMEOUT', 30),
+    )
+    write_queue.start()
+    atexit.register(write_queue.stop)
+    app.extensions[_EXTENSION_KEY] = write_queue
+    return write_queue
+
+
+def get_write_queue():
+    """The current app's write queue, or None when group commit is off"""
+    return current_app.extensions.get(_EXTENSION_KEY)
+
+
+def run_write(func, *args, **kwargs):
+    """Run a service write as its own write transaction, through the write queue when enabled
+    
+    Without the queue the call runs inline under :func:`run_write_transaction`
+    (named after the current endpoint), so it is retried while the database
+    is locked. Either way a write that never gets the lock returns a
+    ``busy`` result instead of raising, for the view to turn into a 503.
+    """
+    write_queue = get_write_queue()
+    try:
+        if write_queue is not None:
+            return write_queue.submit(func, *args, **kwargs)
+        name = request.endpoint if has_request_context() else func.__qualname__
+        return run_write_transaction(name, lambda unit: func(*args, **kwargs))
+    except WriteQueueTimeout as e:
+        logger.warning("%s: %s", func.__qualname__, e)
+        return dict(BUSY_RESULT)
+    except Exception as e:
+        if not is_lock_error(e):
+            raise
+        logger.warning("%s gave up waiting for the database write lock: %s", func.__qualname__, e)
+        return dict(BUSY_RESULT)
+
+
+def write_queue_stats():
+    """Metrics for the stats endpoint; ``{'enabled': False}`` when the queue is off"""
+    write_queue = get_write_queue()
+    return write_queue.stats() if write_queue is not None else {'enabled': False}
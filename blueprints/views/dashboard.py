@@ -1,7 +1,7 @@
 from flask import Blueprint, render_template, request, jsonify
 from datetime import datetime
 from models import BusinessTransaction, BusinessAsset, BusinessInventory, BusinessCategory
-from models import get_financial_summary, get_inventory_summary, get_assets_summary
+from models import get_financial_summary, get_inventory_summary, get_assets_summary, get_rollup_totals
 
 # Create dashboard blueprint
 dashboard_bp = Blueprint('dashboard', __name__)
@@ -56,45 +56,14 @@ def dashboard():
 def calculate_dashboard_metrics(year, month):
     """Calculate key business metrics for dashboard"""
     try:
-        from sqlalchemy import func, extract
-        from models import db
-        
-        # Current month filter
-        monthly_transactions = BusinessTransaction.query.filter(
-            extract('year', BusinessTransaction.date) == year,
-            extract('month', BusinessTransaction.date) == month
-        )
-        
-        # Calculate monthly totals
-        monthly_income = monthly_transactions.filter(
-            BusinessTransaction.transaction_type == 'Income'
-        ).with_entities(func.sum(BusinessTransaction.amount)).scalar() or 0
-        
-        monthly_expenses = monthly_transactions.filter(
-            BusinessTransaction.transaction_type == 'Expense'
-        ).with_entities(func.sum(BusinessTransaction.amount)).scalar() or 0
-        
-        # Year-to-date metrics
-        ytd_transactions = BusinessTransaction.query.filter(
-            extract('year', BusinessTransaction.date) == year
-        )
-        
-        ytd_income = ytd_transactions.filter(
-            BusinessTransaction.transaction_type == 'Income'
-        ).with_entities(func.sum(BusinessTransaction.amount)).scalar() or 0
-        
-        ytd_expenses = ytd_transactions.filter(
-            BusinessTransaction.transaction_type == 'Expense'
-        ).with_entities(func.sum(BusinessTransaction.amount)).scalar() or 0
-        
-        # NEW: All-time metrics
-        all_time_income = BusinessTransaction.query.filter(
-            BusinessTransaction.transaction_type == 'Income'
-        ).with_entities(func.sum(BusinessTransaction.amount)).scalar() or 0
-        
-        all_time_expenses = BusinessTransaction.query.filter(
-            BusinessTransaction.transaction_type == 'Expense'
-        ).with_entities(func.sum(BusinessTransaction.amount)).scalar() or 0
+        # Current month, year-to-date and all-time totals from the monthly rollup
+        monthly = get_rollup_totals(year, month)
+        ytd = get_rollup_totals(year)
+        all_time = get_rollup_totals()
+        
+        monthly_income, monthly_expenses = monthly['income'], monthly['expense']
+        ytd_income, ytd_expenses = ytd['income'], ytd['expense']
+        all_time_income, all_time_expenses = all_time['income'], all_time['expense']
         
         return {
             'monthly_revenue': float(monthly_income),
@@ -1,7 +1,9 @@
-from flask import Blueprint, render_template, request
+from flask import Blueprint, render_template, request, current_app
 from datetime import datetime
-from sqlalchemy import func, extract, case
-from models import db, BusinessTransaction
+from sqlalchemy import func, case
+from models import db, BusinessTransaction, BusinessMonthlyRollup, get_rollup_totals
+from blueprints.utils.periods import apply_period, period_key_filters
+from blueprints.utils.pagination import keyset_paginate, cached_count, InvalidCursor
 
 # Create financial blueprint
 financial_bp = Blueprint('financial', __name__)
@@ -23,7 +25,7 @@ def financial():
         if month != 'all':
             month = int(month)
         category = request.args.get('category', 'all')
-        page = request.args.get('page', 1, type=int)
+        cursor = request.args.get('cursor')
 
         # Get available years for filter
         available_years = get_available_years()
@@ -46,7 +48,7 @@ def financial():
 
         # Get recent business transactions with pagination (50 per page)
         per_page = 50
-        business_transactions, pagination_info = get_filtered_transactions_paginated(year, month, category, page, per_page)
+        business_transactions, pagination_info = get_filtered_transactions_paginated(year, month, category, cursor, per_page)
 
         # Get category breakdown
         category_breakdown = get_category_breakdown(year, month, category)
@@ -102,7 +104,7 @@ def get_available_years():
     """Get years that have transaction data, plus 'All Years' option"""
     try:
         results = db.session.query(
-            extract('year', BusinessTransaction.date).label('year')
+            BusinessMonthlyRollup.year.label('year')
         ).distinct().order_by('year').all()
         
         years = [int(result.year) for result in results if result.year]
@@ -133,77 +135,15 @@ def get_available_months():
 def calculate_financial_summary(year, month, category='all'):
     """Calculate financial summary for given period"""
     try:
-        # Monthly totals
-        if year == 'all':
-            monthly_query = db.session.query(
-                BusinessTransaction.transaction_type,
-                func.sum(BusinessTransaction.amount).label('total')
-            )
-        else:
-            monthly_query = db.session.query(
-                BusinessTransaction.transaction_type,
-                func.sum(BusinessTransaction.amount).label('total')
-            ).filter(
-                extract('year', BusinessTransaction.date) == year
-            )
-        
-        if month != 'all':
-            monthly_query = monthly_query.filter(
-                extract('month', BusinessTransaction.date) == int(month)
-            )
-        
-        # NEW: Category filter
-        if category != 'all':
-            monthly_query = monthly_query.filter(BusinessTransaction.category == category)
-        
-        monthly_results = monthly_query.group_by(
-            BusinessTransaction.transaction_type
-        ).all()
-        
-        monthly_revenue = 0
-        monthly_expenses = 0
-        
-        for transaction_type, total in monthly_results:
-            if transaction_type == 'Income':
-                monthly_revenue = float(total)
-            elif transaction_type == 'Expense':
-                monthly_expenses = float(total)
+        # Monthly totals (read from the monthly rollup; NEW: category filter)
+        monthly = get_rollup_totals(year, month, category=category)
+        monthly_revenue = monthly['income']
+        monthly_expenses = monthly['expense']
         
         # YTD totals (same logic for consistency)
-        if year == 'all':
-            ytd_query = db.session.query(
-                BusinessTransaction.transaction_type,
-                func.sum(BusinessTransaction.amount).label('total')
-            )
-        else:
-            ytd_query = db.session.query(
-                BusinessTransaction.transaction_type,
-                func.sum(BusinessTransaction.amount).label('total')
-            ).filter(
-                extract('year', BusinessTransaction.date) == year
-            )
-        
-        if month != 'all':
-            ytd_query = ytd_query.filter(
-                extract('month', BusinessTransaction.date) <= int(month)
-            )
-        
-        # NEW: Category filter
-        if category != 'all':
-            ytd_query = ytd_query.filter(BusinessTransaction.category == category)
-        
-        ytd_results = ytd_query.group_by(
-            BusinessTransaction.transaction_type
-        ).all()
-        
-        ytd_revenue = 0
-        ytd_expenses = 0
-        
-        for transaction_type, total in ytd_results:
-            if transaction_type == 'Income':
-                ytd_revenue = float(total)
-            elif transaction_type == 'Expense':
-                ytd_expenses = float(total)
+        ytd = get_rollup_totals(year, month, ytd=True, category=category)
+        ytd_revenue = ytd['income']
+        ytd_expenses = ytd['expense']
         
         return {
             'monthly_revenue': monthly_revenue,
@@ -225,53 +165,38 @@ def calculate_financial_summary(year, month, category='all'):
             'ytd_profit': 0
         }
 
-def get_filtered_transactions_paginated(year, month, category='all', page=1, per_page=50):
-    """Get filtered business transactions with pagination"""
+def get_filtered_transactions_paginated(year, month, category='all', cursor=None, per_page=50):
+    """Get filtered business transactions one keyset page at a time
+    
+    ``cursor`` is a ``next_cursor``/``prev_cursor`` token from a previous
+    page (None for the newest page). The total is an approximate cached count.
+    """
     try:
         # NEW: Handle "All Years" option
-        if year == 'all':
-            query = BusinessTransaction.query
-        else:
-            query = BusinessTransaction.query.filter(
-                extract('year', BusinessTransaction.date) == year
-            )
-        
-        if month != 'all':
-            query = query.filter(
-                extract('month', BusinessTransaction.date) == int(month)
-            )
+        query = apply_period(BusinessTransaction.query, BusinessTransaction.date, year, month)
         
         # NEW: Category filter
         if category != 'all':
             query = query.filter(BusinessTransaction.category == category)
         
-        # Order by date (newest first)
-        query = query.order_by(
-            BusinessTransaction.date.desc(), 
-            BusinessTransaction.id.desc()
-        )
+        # Seek on (date, id), newest first - every page costs the same as the first
+        try:
+            items, pagination_info = keyset_paginate(
+                query,
+                [BusinessTransaction.date, BusinessTransaction.id],
+                cursor=cursor,
+                per_page=per_page
+            )
+        except InvalidCursor as e:
+            print(f"⚠️ Ignoring invalid transactions cursor: {e}")
+            items, pagination_info = keyset_paginate(
+                query, [BusinessTransaction.date, BusinessTransaction.id], per_page=per_page
+            )
         
-        # Paginate
-        pagination = query.paginate(
-            page=page,
-            per_page=per_page,
-            error_out=False
-        )
+        pagination_info['total'] = cached_count(query, ttl=current_app.config.get('PAGINATION_COUNT_TTL', 30))
+        pagination_info['count'] = len(items)
         
-        # Create pagination info
-        pagination_info = {
-            'page': pagination.page,
-            'pages': pagination.pages,
-            'per_page': pagination.per_page,
-            'total': pagination.total,
-            'has_next': pagination.has_next,
-            'has_prev': pagination.has_prev,
-            'prev_num': pagination.prev_num,
-            'next_num': pagination.next_num,
-            'iter_pages': list(pagination.iter_pages())
-        }
-        
-        return pagination.items, pagination_info
+        return items, pagination_info
         
     except Exception as e:
         print(f"❌ Error getting filtered transactions: {e}")
@@ -280,14 +205,7 @@ def get_filtered_transactions_paginated(year, month, category='all', page=1, per
 def get_filtered_transactions(year, month, limit=20):
     """Get filtered business transactions (legacy function, kept for compatibility)"""
     try:
-        query = BusinessTransaction.query.filter(
-            extract('year', BusinessTransaction.date) == year
-        )
-        
-        if month != 'all':
-            query = query.filter(
-                extract('month', BusinessTransaction.date) == int(month)
-            )
+        query = apply_period(BusinessTransaction.query, BusinessTransaction.date, year, month)
         
         return query.order_by(
             BusinessTransaction.date.desc(), 
@@ -301,74 +219,36 @@ def get_filtered_transactions(year, month, limit=20):
 def get_category_breakdown(year, month, category='all'):
     """Get financial breakdown by category - FIXED SQLAlchemy syntax and added category filter"""
     try:
-        # Build base query
-        if year == 'all':
-            base_query = BusinessTransaction.query
-        else:
-            base_query = BusinessTransaction.query.filter(
-                extract('year', BusinessTransaction.date) == year
+        # Get category breakdown from the monthly rollup
+        income_total = func.sum(
+            case(
+                (BusinessMonthlyRollup.transaction_type == 'Income', BusinessMonthlyRollup.total_amount),
+                else_=0
             )
-        
-        if month != 'all':
-            base_query = base_query.filter(
-                extract('month', BusinessTransaction.date) == int(month)
-            )
-        
-        # NEW: Category filter
-        if category != 'all':
-            base_query = base_query.filter(BusinessTransaction.category == category)
-        
-        # Get category breakdown - FIXED: Added missing closing parenthesis
-        if year == 'all':
-            category_results = db.session.query(
-                BusinessTransaction.category,
-                func.sum(
-                    case(
-                        (BusinessTransaction.transaction_type == 'Income', BusinessTransaction.amount),
-                        else_=0
-                    )
-                ).label('income'),
-                func.sum(
-                    case(
-                        (BusinessTransaction.transaction_type == 'Expense', BusinessTransaction.amount),
-                        else_=0
-                    )
-                ).label('expenses'),
-                func.count(BusinessTransaction.id).label('transaction_count')
-            )
-        else:
-            category_results = db.session.query(
-                BusinessTransaction.category,
-                func.sum(
-                    case(
-                        (BusinessTransaction.transaction_type == 'Income', BusinessTransaction.amount),
-                        else_=0
-                    )
-                ).label('income'),
-                func.sum(
-                    case(
-                        (BusinessTransaction.transaction_type == 'Expense', BusinessTransaction.amount),
-                        else_=0
-                    )
-                ).label('expenses'),
-                func.count(BusinessTransaction.id).label('transaction_count')
-            ).filter(
-                extract('year', BusinessTransaction.date) == year
-            )
-        
-        if month != 'all':
-            category_results = category_results.filter(
-                extract('month', BusinessTransaction.date) == int(month)
+        )
+        expense_total = func.sum(
+            case(
+                (BusinessMonthlyRollup.transaction_type == 'Expense', BusinessMonthlyRollup.total_amount),
+                else_=0
             )
+        )
+        category_results = db.session.query(
+            BusinessMonthlyRollup.category,
+            income_total.label('income'),
+            expense_total.label('expenses'),
+            func.sum(BusinessMonthlyRollup.transaction_count).label('transaction_count')
+        ).filter(
+            *period_key_filters(BusinessMonthlyRollup.year, BusinessMonthlyRollup.month, year, month)
+        )
         
         # NEW: Category filter
         if category != 'all':
-            category_results = category_results.filter(BusinessTransaction.category == category)
+            category_results = category_results.filter(BusinessMonthlyRollup.category == category)
         
         category_results = category_results.group_by(
-            BusinessTransaction.category
+            BusinessMonthlyRollup.category
         ).order_by(
-            (func.sum(BusinessTransaction.amount)).desc()
+            (func.sum(BusinessMonthlyRollup.total_amount)).desc()
         ).all()
         
         category_breakdown = []
@@ -12,12 +12,17 @@ def ai_insights():
     print("🧠 Loading AI Insights dashboard...")
     
     try:
-        # Get comprehensive business insights
-        business_overview = InsightsService.get_business_overview()
-        inventory_insights = InsightsService.get_inventory_insights()
-        sales_analytics = InsightsService.get_sales_analytics()
-        profit_optimization = InsightsService.get_profit_optimization()
-        trend_analysis = InsightsService.get_trend_analysis()
+        # Get comprehensive business insights (cached per data version, computed concurrently)
+        sections = InsightsService.get_sections()
+        business_overview = sections['business_overview']
+        inventory_insights = sections['inventory_insights']
+        sales_analytics = sections['sales_analytics']
+        profit_optimization = sections['profit_optimization']
+        trend_analysis = sections['trend_analysis']
+        
+        degraded = [section for section, payload in sections.items() if not payload.get('success')]
+        if degraded:
+            print(f"⚠️ AI Insights sections unavailable: {', '.join(degraded)}")
         
         # Prepare dashboard data
         dashboard_data = {
@@ -1,6 +1,7 @@
 from flask import Blueprint, render_template, request, jsonify
 from models import BusinessInventory, BusinessCategory, db
 from sqlalchemy import func
+from blueprints.utils.search import apply_inventory_search
 
 # Create inventory blueprint
 inventory_bp = Blueprint('inventory', __name__)
@@ -38,14 +39,7 @@ def inventory():
             query = query.filter(BusinessInventory.drop_field == drop_filter)
             
         if search_query:
-            search_pattern = f"%{search_query}%"
-            query = query.filter(
-                (BusinessInventory.name.ilike(search_pattern)) |
-                (BusinessInventory.description.ilike(search_pattern)) |
-                (BusinessInventory.sku.ilike(search_pattern)) |
-                (BusinessInventory.brand.ilike(search_pattern)) |
-                (BusinessInventory.drop_field.ilike(search_pattern))
-            )
+            query = apply_inventory_search(query, search_query)
         
         # Get filtered inventory items (order by date_added if it exists, otherwise by id)
         try:
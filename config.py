@@ -18,12 +18,83 @@ class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SQLALCHEMY_ECHO = os.environ.get('SQLALCHEMY_ECHO', 'False').lower() == 'true'
     
+    # SQLite Engine Profile
+    # Applied to every new DBAPI connection through a SQLAlchemy connect event
+    # (see blueprints/utils/database.py). WAL lets dashboard readers run while a
+    # sell/create is writing; busy_timeout makes writers wait instead of failing
+    # with "database is locked".
+    SQLITE_PRAGMAS = {
+        'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'),
+        'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', '5000')),
+        'cache_size': int(os.environ.get('SQLITE_CACHE_SIZE_KB', '-32000')),  # Negative = KiB (~32MB)
+        'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', str(128 * 1024 * 1024))),  # 128MB
+        'temp_store': os.environ.get('SQLITE_TEMP_STORE', 'MEMORY'),
+    }
+    
+    # Engine / connection pool options (passed straight to create_engine)
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', '5')),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', '10')),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', '30')),
+        'pool_pre_ping': True,
+        'connect_args': {
+            'timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', '5000')) / 1000,
+        },
+    }
+    
+    # Writes start with BEGIN IMMEDIATE and, when the database stays locked
+    # past busy_timeout (e.g. several gunicorn workers), are retried with
+    # jittered exponential backoff until the deadline, then answered with 503.
+    WRITE_RETRY_DEADLINE = float(os.environ.get('WRITE_RETRY_DEADLINE', '10'))  # Seconds per write
+    WRITE_RETRY_BASE_DELAY_MS = float(os.environ.get('WRITE_RETRY_BASE_DELAY_MS', '10'))
+    WRITE_RETRY_MAX_DELAY_MS = float(os.environ.get('WRITE_RETRY_MAX_DELAY_MS', '500'))
+    
+    # Group commit for sell/create bursts (see blueprints/utils/write_queue.py).
+    # Off by default; when on, a writer thread batches queued writes into one
+    # transaction, waiting up to MAX_WAIT_MS for more after the first arrives.
+    WRITE_QUEUE_ENABLED = os.environ.get('WRITE_QUEUE_ENABLED', 'False').lower() == 'true'
+    WRITE_QUEUE_MAX_BATCH = int(os.environ.get('WRITE_QUEUE_MAX_BATCH', '64'))
+    WRITE_QUEUE_MAX_WAIT_MS = float(os.environ.get('WRITE_QUEUE_MAX_WAIT_MS', '2'))
+    WRITE_QUEUE_RESULT_TIMEOUT = int(os.environ.get('WRITE_QUEUE_RESULT_TIMEOUT', '30'))  # Seconds a request waits
+    
+    # Insights sections cached per data version (see blueprints/utils/insights_cache.py);
+    # changed data is served stale while a background thread recomputes it
+    INSIGHTS_CACHE_ENABLED = os.environ.get('INSIGHTS_CACHE_ENABLED', 'True').lower() == 'true'
+    INSIGHTS_CACHE_MAX_STALE = int(os.environ.get('INSIGHTS_CACHE_MAX_STALE', '900'))  # Seconds a stale section may be served
+    INSIGHTS_CACHE_DEBOUNCE_MS = float(os.environ.get('INSIGHTS_CACHE_DEBOUNCE_MS', '500'))
+    
+    # The /insights page computes its sections concurrently on read-only worker threads
+    # (see blueprints/utils/task_pool.py); 0 workers computes them one after another
+    INSIGHTS_PARALLEL_WORKERS = int(os.environ.get('INSIGHTS_PARALLEL_WORKERS', '5'))
+    INSIGHTS_SECTION_TIMEOUT = float(os.environ.get('INSIGHTS_SECTION_TIMEOUT', '10'))  # Seconds before a section falls back
+    
+    # In-memory comparable sales for price suggestions (see blueprints/utils/comparables.py);
+    # kept current from sale events, rebuilt after MAX_AGE seconds for other processes' writes
+    COMPARABLES_MAX_AGE = int(os.environ.get('COMPARABLES_MAX_AGE', '600'))
+    COMPARABLES_MIN_SAMPLES = int(os.environ.get('COMPARABLES_MIN_SAMPLES', '3'))  # Sales needed before falling back a level
+    
+    # Responses: orjson-backed jsonify (stdlib fallback) and gzip/brotli compression
+    # of JSON/HTML responses of at least COMPRESSION_MIN_SIZE bytes
+    FAST_JSON_ENABLED = os.environ.get('FAST_JSON_ENABLED', 'True').lower() == 'true'
+    COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', 'True').lower() == 'true'
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', '1024'))  # Bytes
+    COMPRESSION_GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', '6'))
+    COMPRESSION_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', '4'))  # Used when brotli is installed
+    COMPRESSION_MIMETYPES = [
+        'application/json', 'application/x-ndjson', 'text/html', 'text/css', 'text/csv',
+        'text/plain', 'text/javascript', 'application/javascript', 'image/svg+xml'
+    ]
+    
     # Application Settings
     DEBUG = os.environ.get('FLASK_DEBUG', 'True').lower() == 'true'
     TESTING = False
     
     # Pagination
     ITEMS_PER_PAGE = int(os.environ.get('ITEMS_PER_PAGE', '50'))
+    MAX_ITEMS_PER_PAGE = int(os.environ.get('MAX_ITEMS_PER_PAGE', '500'))
+    BULK_INTAKE_MAX_ITEMS = int(os.environ.get('BULK_INTAKE_MAX_ITEMS', '500'))  # Items per POST /api/inventory/bulk
+    PAGINATION_COUNT_TTL = int(os.environ.get('PAGINATION_COUNT_TTL', '30'))  # Seconds an approximate total is reused
     
     # File Upload Settings (for future features)
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
@@ -74,6 +145,13 @@ class DevelopmentConfig(Config):
     """Development configuration"""
     DEBUG = True
     SQLALCHEMY_ECHO = True
+    
+    # Smaller cache/mmap footprint for laptops; keep WAL so behaviour matches production
+    SQLITE_PRAGMAS = {
+        **Config.SQLITE_PRAGMAS,
+        'cache_size': -8000,  # ~8MB
+        'mmap_size': 32 * 1024 * 1024,  # 32MB
+    }
     # Use a development-specific secret key
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'girasoul-dev-secret-2024-not-for-production'
 
@@ -82,6 +160,23 @@ class ProductionConfig(Config):
     DEBUG = False
     SQLALCHEMY_ECHO = False
     
+    # Larger page cache and memory map for concurrent sells + dashboard loads
+    SQLITE_PRAGMAS = {
+        **Config.SQLITE_PRAGMAS,
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', '10000')),
+        'cache_size': int(os.environ.get('SQLITE_CACHE_SIZE_KB', '-64000')),  # ~64MB
+        'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024))),  # 256MB
+    }
+    
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        **Config.SQLALCHEMY_ENGINE_OPTIONS,
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', '10')),
+        'pool_recycle': 3600,
+        'connect_args': {
+            'timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', '10000')) / 1000,
+        },
+    }
+    
     # For production, use environment variable or generate a warning
     SECRET_KEY = os.environ.get('SECRET_KEY')
     if not SECRET_KEY:
@@ -97,6 +192,13 @@ class TestingConfig(Config):
     # Use in-memory database for testing
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
     WTF_CSRF_ENABLED = False
+    
+    # In-memory databases cannot use WAL and must not be pooled
+    SQLITE_PRAGMAS = {}
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    WRITE_QUEUE_ENABLED = False
+    INSIGHTS_CACHE_ENABLED = False  # A background thread would not see the in-memory database
+    INSIGHTS_PARALLEL_WORKERS = 0  # Nor would the task pool's worker threads
     SECRET_KEY = 'testing-secret-key'
 
 # Configuration dictionary
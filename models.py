@@ -4,6 +4,7 @@ Database models for business management with all requested schema changes
 """
 
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, inspect
 from datetime import datetime, date
 from decimal import Decimal
 
@@ -12,6 +13,17 @@ db = SQLAlchemy()
 class BusinessTransaction(db.Model):
     """Business transactions for income and expense tracking"""
     __tablename__ = 'business_transactions'
+    __table_args__ = (
+        # SUM(amount) per type over a date range is answered from the index alone.
+        # ORDER BY date DESC, id DESC needs nothing extra: SQLite index entries end
+        # with the rowid (id), so ix_business_transactions_date is already (date, id).
+        db.Index('ix_business_transactions_type_date_amount', 'transaction_type', 'date', 'amount'),
+        # Ledger entries booked for an inventory item or asset. Partial, so manual
+        # and legacy rows (NULL source) neither bloat it nor skew its ANALYZE stats.
+        db.Index('ix_business_transactions_source', 'source_type', 'source_id',
+                 sqlite_where=db.text('source_id IS NOT NULL'),
+                 postgresql_where=db.text('source_id IS NOT NULL')),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     date = db.Column(db.Date, nullable=False, index=True)
@@ -27,7 +39,18 @@ class BusinessTransaction(db.Model):
     invoice_number = db.Column(db.String(50))
     notes = db.Column(db.Text)
     
-    # REMOVED: tax_deductible, source_type, source_id, created_at, updated_at
+    # SHA-256 of the normalized row for CSV imports (NULL for rows entered in the app);
+    # the unique index makes re-running an import a no-op
+    content_hash = db.Column(db.String(64), unique=True, index=True)
+    
+    # What booked this entry: source_type is the event ('inventory_purchase',
+    # 'inventory_sale', 'asset_purchase', 'asset_disposal'), source_id the id of
+    # the inventory item or asset. NULL for manual entries and unlinked legacy rows;
+    # deleting the item or asset clears source_id but keeps source_type.
+    source_type = db.Column(db.String(30))
+    source_id = db.Column(db.Integer)
+    
+    # REMOVED: tax_deductible, created_at, updated_at
     
     def __repr__(self):
         return f'<BusinessTransaction {self.id}: {self.description} - ${self.amount}>'
@@ -45,7 +68,42 @@ class BusinessTransaction(db.Model):
             'account_name': self.account_name,
             'vendor': self.vendor,
             'invoice_number': self.invoice_number,
-            'notes': self.notes
+            'notes': self.notes,
+            'source_type': self.source_type,
+            'source_id': self.source_id
+        }
+
+class BusinessMonthlyRollup(db.Model):
+    """Monthly ledger totals per transaction type and category
+    
+    Maintained incrementally from BusinessTransaction flush events (see
+    ``_rollup_after_insert`` and friends below) so dashboard and financial
+    summaries read a few hundred rollup rows instead of scanning the ledger.
+    Writes that bypass the ORM (raw SQL, bulk ``query.update()``) must call
+    ``apply_rollup_for_transactions()`` for inserts or ``rebuild_monthly_rollup()``
+    afterwards.
+    """
+    __tablename__ = 'business_monthly_rollup'
+    
+    year = db.Column(db.Integer, primary_key=True)
+    month = db.Column(db.Integer, primary_key=True)
+    transaction_type = db.Column(db.String(10), primary_key=True)
+    category = db.Column(db.String(50), primary_key=True)
+    total_amount = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    transaction_count = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<BusinessMonthlyRollup {self.year}-{self.month:02d} {self.transaction_type}/{self.category}: ${self.total_amount}>'
+    
+    def to_dict(self):
+        """Convert to dictionary for JSON serialization"""
+        return {
+            'year': self.year,
+            'month': self.month,
+            'transaction_type': self.transaction_type,
+            'category': self.category,
+            'total_amount': float(self.total_amount) if self.total_amount else 0.0,
+            'transaction_count': self.transaction_count
         }
 
 class BusinessAsset(db.Model):
@@ -86,6 +144,13 @@ class BusinessAsset(db.Model):
 class BusinessInventory(db.Model):
     """Business inventory items for fashion business"""
     __tablename__ = 'business_inventory'
+    __table_args__ = (
+        # Sold revenue/velocity over a sold_date range (covers SUM(sold_price))
+        db.Index('ix_business_inventory_status_sold_date', 'listing_status', 'sold_date', 'sold_price'),
+        # Comparable sold items by category/brand/condition (ProfitOptimization)
+        db.Index('ix_business_inventory_status_category_brand_condition',
+                 'listing_status', 'category', 'brand', 'condition', 'sold_price'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     sku = db.Column(db.String(50), unique=True, nullable=False, index=True)  # Timestamp-based unique identifier
@@ -309,7 +374,7 @@ class BusinessCondition(db.Model):
     
     @classmethod
     def create_condition(cls, name, description=None):
-        """Create a new condition with duplicate checking"""
+        """Create a new condition with duplicate checking (committed by the caller's unit of work)"""
         if cls.condition_exists(name):
             raise ValueError(f"Condition '{name}' already exists")
         
@@ -318,13 +383,11 @@ class BusinessCondition(db.Model):
             description=description.strip() if description else None
         )
         
-        try:
-            db.session.add(condition)
-            db.session.commit()
-            return condition
-        except Exception as e:
-            db.session.rollback()
-            raise e
+        from blueprints.utils.events import emit
+        db.session.add(condition)
+        db.session.flush()
+        emit('condition.created', ids=[condition.id])  # Published when the unit of work commits
+        return condition
     
     def to_dict(self):
         """Convert to dictionary for JSON serialization"""
@@ -337,30 +400,242 @@ class BusinessCondition(db.Model):
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
     
-# Helper functions for database operations
-def get_financial_summary(year=None, month=None):
-    """Get financial summary for a given period"""
-    from sqlalchemy import func, extract
+# Monthly rollup maintenance - runs inside the flush, so rollup and ledger commit together
+def _rollup_key(transaction_date, transaction_type, category):
+    """Rollup primary key for a transaction's date/type/category"""
+    return (transaction_date.year, transaction_date.month, transaction_type, category)
+
+def _apply_rollup_delta(connection, key, amount, count):
+    """Add ``amount``/``count`` to a rollup row, creating it if needed"""
+    from sqlalchemy import func
     
-    query = db.session.query(
+    if connection.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    
+    table = BusinessMonthlyRollup.__table__
+    year, month, transaction_type, category = key
+    stmt = insert(table).values(
+        year=year,
+        month=month,
+        transaction_type=transaction_type,
+        category=category,
+        total_amount=amount,
+        transaction_count=count
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['year', 'month', 'transaction_type', 'category'],
+        set_={
+            'total_amount': func.round(table.c.total_amount + stmt.excluded.total_amount, 2),
+            'transaction_count': table.c.transaction_count + stmt.excluded.transaction_count
+        }
+    )
+    connection.execute(stmt)
+    
+    if count < 0:
+        # Drop rows whose last transaction was removed
+        connection.execute(
+            table.delete().where(
+                table.c.year == year,
+                table.c.month == month,
+                table.c.transaction_type == transaction_type,
+                table.c.category == category,
+                table.c.transaction_count <= 0
+            )
+        )
+
+def _previous_value(state, attr_name):
+    """Value of an attribute before the pending flush"""
+    history = state.attrs[attr_name].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(state.object, attr_name)
+
+@event.listens_for(BusinessTransaction, 'after_insert')
+def _rollup_after_insert(mapper, connection, target):
+    _apply_rollup_delta(
+        connection,
+        _rollup_key(target.date, target.transaction_type, target.category),
+        float(target.amount or 0),
+        1
+    )
+
+@event.listens_for(BusinessTransaction, 'after_delete')
+def _rollup_after_delete(mapper, connection, target):
+    state = inspect(target)
+    _apply_rollup_delta(
+        connection,
+        _rollup_key(
+            _previous_value(state, 'date'),
+            _previous_value(state, 'transaction_type'),
+            _previous_value(state, 'category')
+        ),
+        -float(_previous_value(state, 'amount') or 0),
+        -1
+    )
+
+@event.listens_for(BusinessTransaction, 'after_update')
+def _rollup_after_update(mapper, connection, target):
+    state = inspect(target)
+    tracked = ('date', 'transaction_type', 'category', 'amount')
+    if not any(state.attrs[name].history.has_changes() for name in tracked):
+        return
+    
+    old_key = _rollup_key(
+        _previous_value(state, 'date'),
+        _previous_value(state, 'transaction_type'),
+        _previous_value(state, 'category')
+    )
+    new_key = _rollup_key(target.date, target.transaction_type, target.category)
+    old_amount = float(_previous_value(state, 'amount') or 0)
+    new_amount = float(target.amount or 0)
+    
+    if old_key == new_key:
+        _apply_rollup_delta(connection, new_key, new_amount - old_amount, 0)
+    else:
+        _apply_rollup_delta(connection, old_key, -old_amount, -1)
+        _apply_rollup_delta(connection, new_key, new_amount, 1)
+
+def apply_rollup_for_transactions(connection, transactions):
+    """Fold a batch of new transactions into the rollup with one upsert per key
+    
+    For bulk inserts (``session.execute(insert(...), rows)``) and raw SQL,
+    which skip the per-object flush events. ``transactions`` are mappings
+    with ``date``, ``transaction_type``, ``category`` and ``amount``.
+    """
+    deltas = {}
+    for row in transactions:
+        key = _rollup_key(row['date'], row['transaction_type'], row['category'])
+        amount, count = deltas.get(key, (0.0, 0))
+        deltas[key] = (amount + float(row['amount'] or 0), count + 1)
+    
+    for key, (amount, count) in deltas.items():
+        _apply_rollup_delta(connection, key, round(amount, 2), count)
+    return len(deltas)
+
+def rebuild_monthly_rollup():
+    """Recompute business_monthly_rollup from scratch in a single statement"""
+    from sqlalchemy import func, insert, select, cast, extract, Integer
+    
+    year_expr = cast(extract('year', BusinessTransaction.date), Integer)
+    month_expr = cast(extract('month', BusinessTransaction.date), Integer)
+    
+    aggregate = select(
+        year_expr,
+        month_expr,
         BusinessTransaction.transaction_type,
-        func.sum(BusinessTransaction.amount).label('total')
+        BusinessTransaction.category,
+        func.round(func.sum(BusinessTransaction.amount), 2),
+        func.count(BusinessTransaction.id)
+    ).group_by(year_expr, month_expr, BusinessTransaction.transaction_type, BusinessTransaction.category)
+    
+    table = BusinessMonthlyRollup.__table__
+    try:
+        db.session.execute(table.delete())
+        result = db.session.execute(
+            insert(table).from_select(
+                ['year', 'month', 'transaction_type', 'category', 'total_amount', 'transaction_count'],
+                aggregate
+            )
+        )
+        db.session.commit()
+        return result.rowcount
+    except Exception:
+        db.session.rollback()
+        raise
+
+def ensure_monthly_rollup():
+    """Build the rollup on first run against a database that predates it"""
+    if BusinessMonthlyRollup.query.first() is None and BusinessTransaction.query.first() is not None:
+        return rebuild_monthly_rollup()
+    return 0
+
+def ensure_columns():
+    """Add nullable columns declared on the models but missing from existing tables
+    
+    SQLite's ALTER TABLE can only append columns, which is all new optional
+    fields need. Returns ``table.column`` names that were added.
+    """
+    inspector = inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+    added = []
+    
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing_columns = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing_columns or not column.nullable:
+                continue
+            column_type = column.type.compile(dialect=db.engine.dialect)
+            with db.engine.begin() as conn:
+                conn.exec_driver_sql(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}')
+            added.append(f'{table.name}.{column.name}')
+    
+    return added
+
+def ensure_indexes():
+    """Create indexes declared on the models that are missing from an existing database
+    
+    ``db.create_all()`` skips tables that already exist, including their
+    indexes, so databases created before an index was added to a model never
+    get it. Returns the names of the indexes that were created.
+    """
+    inspector = inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+    created = []
+    
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing_indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing_indexes:
+                index.create(bind=db.engine, checkfirst=True)
+                created.append(index.name)
+    
+    if created:
+        # Refresh planner statistics so the new indexes are actually chosen
+        with db.engine.begin() as conn:
+            conn.exec_driver_sql('ANALYZE')
+    return created
+
+def get_rollup_totals(year=None, month=None, ytd=False, category=None):
+    """Income/expense totals for a period, read from the monthly rollup
+    
+    Returns ``{'income': float, 'expense': float, 'count': int}``. ``year`` and
+    ``month`` accept ints, numeric strings or ``'all'``.
+    """
+    from sqlalchemy import func
+    from blueprints.utils.periods import period_key_filters
+    
+    query = db.session.query(
+        BusinessMonthlyRollup.transaction_type,
+        func.sum(BusinessMonthlyRollup.total_amount).label('total'),
+        func.sum(BusinessMonthlyRollup.transaction_count).label('count')
+    ).filter(
+        *period_key_filters(BusinessMonthlyRollup.year, BusinessMonthlyRollup.month, year, month, ytd=ytd)
     )
     
-    if year:
-        query = query.filter(extract('year', BusinessTransaction.date) == year)
-    if month:
-        query = query.filter(extract('month', BusinessTransaction.date) == month)
+    if category and category != 'all':
+        query = query.filter(BusinessMonthlyRollup.category == category)
     
-    results = query.group_by(BusinessTransaction.transaction_type).all()
+    totals = {'income': 0.0, 'expense': 0.0, 'count': 0}
+    for transaction_type, total, count in query.group_by(BusinessMonthlyRollup.transaction_type).all():
+        key = transaction_type.lower()
+        if key in ('income', 'expense'):
+            totals[key] += float(total or 0)
+        totals['count'] += int(count or 0)
     
-    summary = {'income': 0, 'expense': 0}
-    for transaction_type, total in results:
-        if transaction_type.lower() == 'income':
-            summary['income'] = float(total)
-        elif transaction_type.lower() == 'expense':
-            summary['expense'] = float(total)
+    return totals
+
+# Helper functions for database operations
+def get_financial_summary(year=None, month=None):
+    """Get financial summary for a given period"""
+    totals = get_rollup_totals(year, month)
     
+    summary = {'income': totals['income'], 'expense': totals['expense']}
     summary['profit'] = summary['income'] - summary['expense']
     summary['profit_margin'] = (summary['profit'] / summary['income'] * 100) if summary['income'] > 0 else 0
     
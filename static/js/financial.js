@@ -955,7 +955,7 @@ document.addEventListener('DOMContentLoaded', function() {
     
     // Scroll to table if coming from pagination
     const urlParams = new URLSearchParams(window.location.search);
-    if (urlParams.get('page') && parseInt(urlParams.get('page')) > 1) {
+    if (urlParams.get('cursor')) {
         setTimeout(scrollToTransactionsTable, 100);
     }
     
@@ -15,16 +15,27 @@ class InventoryApi {
         try {
             console.log('📦 API: Fetching all inventory items...');
             
-            const response = await fetch(this.baseUrl);
-            const data = await response.json();
+            // The endpoint is cursor-paginated; follow next_cursor until the last page
+            const items = [];
+            let cursor = null;
+            do {
+                const params = new URLSearchParams({ limit: '500' });
+                if (cursor) params.set('cursor', cursor);
+                
+                const response = await fetch(`${this.baseUrl}?${params}`);
+                const data = await response.json();
+                
+                if (!data.success) {
+                    console.error('❌ API: Failed to get inventory:', data.error);
+                    throw new Error(data.error);
+                }
+                
+                items.push(...data.items);
+                cursor = data.pagination ? data.pagination.next_cursor : null;
+            } while (cursor);
             
-            if (data.success) {
-                console.log(`📦 API: Successfully retrieved ${data.items.length} items`);
-                return data.items;
-            } else {
-                console.error('❌ API: Failed to get inventory:', data.error);
-                throw new Error(data.error);
-            }
+            console.log(`📦 API: Successfully retrieved ${items.length} items`);
+            return items;
         } catch (error) {
             console.error('❌ API: Error fetching inventory:', error);
             throw error;
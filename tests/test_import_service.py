@@ -0,0 +1,51 @@
+"""
+CSV import tests for Girasoul Business Dashboard
+
+Run from the project root: python -m pytest -q
+"""
+
+import io
+from datetime import date
+import pytest
+from app import create_app
+from models import db, BusinessInventory, BusinessTransaction
+from blueprints.services.import_service import ImportService
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+INVENTORY_CSV = """SKU,Name,Category,Cost,Price,Brand,Size,Condition,Date,W Tax
+IMP-001,Levis Jeans,Jeans,5.00,25.00,Levis,32,Good,2026-01-04,27.08
+IMP-002,Coach Bag,Bags,10.00,60.00,Coach,OS,NWOT,Jan 5th,
+IMP-003,Nike Hoodie,Tops,4.00,30.00,Nike,M,Good,2026-01-06,abc
+IMP-004,Gap Shirt,Tops,3.00,15.00,Gap,L,Good,01/07/2026,
+"""
+
+
+def test_inventory_import_reports_bad_dates_and_prices_as_invalid_rows(app):
+    # Two rows per chunk: each chunk mixes a valid row with an invalid one
+    stats = ImportService.import_csv(io.StringIO(INVENTORY_CSV), 'inventory', chunk_size=2)
+
+    assert stats['success'], stats.get('error')
+    assert stats['rows_read'] == 4
+    assert stats['chunks'] == 2
+    assert stats['inserted'] == 2
+    assert stats['invalid'] == 2
+    assert [error['row'] for error in stats['errors']] == [3, 4]
+    assert 'Date added' in stats['errors'][0]['error']
+    assert 'Price with tax' in stats['errors'][1]['error']
+
+    skus = {sku for (sku,) in db.session.query(BusinessInventory.sku)}
+    assert skus == {'IMP-001', 'IMP-004'}
+
+    purchase_dates = sorted(
+        transaction.date for transaction in BusinessTransaction.query.filter_by(category='Inventory Purchase')
+    )
+    assert purchase_dates == [date(2026, 1, 4), date(2026, 1, 7)]